@@ -1,15 +1,43 @@
-from typing import List, Optional
+from datetime import datetime
+from typing import Literal, Optional
 
-from app.api.auth import get_current_user
+from app.api.auth import get_current_user, invalidate_cached_user, user_cache
+from app.api.festival import invalidate_public_responses, response_cache
 from app.core.config import settings
-from app.core.database import get_database
+from app.core.database import Collections, get_collections
+from app.core.etag import conditional_response, serialize_json
+from app.core.http_client import http_client
+from app.core.indexes import CASE_INSENSITIVE
+from app.core.pagination import keyset_page, parse_fields
+from app.models.booking import Booking
+from app.models.day import Day
 from app.models.user import User
-from fastapi import APIRouter, Depends, HTTPException
-from fastapi.responses import PlainTextResponse
+from app.services.availability import availability_broker
+from app.services.email import BulkRecipient, email_service
+from app.services.exports import (
+    EXPORT_MEDIA_TYPES,
+    EXPORT_WRITERS,
+    export_filename,
+    gzip_stream,
+    iter_booking_rows,
+    parquet_available,
+)
+from app.services.reference_data import reference_data
+from app.services.tickets import ticket_service
+from app.services.waitlist import waitlist_service
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
+from pymongo.errors import DuplicateKeyError
 
 router = APIRouter(prefix="/api/v1/admin", tags=["admin"])
 
+# Keyset pagination order for the admin listings; backed by indexes in app.core.indexes
+BOOKING_PAGE_KEYS = ("created_at", "booking_id")
+DAY_PAGE_KEYS = ("date", "day_id")
+BOOKING_FIELDS = tuple(Booking.model_fields)
+DAY_FIELDS = tuple(Day.model_fields)
+
 
 def require_admin(current_user: User = Depends(get_current_user)) -> User:
     if not getattr(current_user, "is_admin", False):
@@ -18,70 +46,136 @@ def require_admin(current_user: User = Depends(get_current_user)) -> User:
 
 
 @router.get("/bookings")
-def list_all_bookings(_: User = Depends(require_admin)):
-    db = get_database()
-    if not db:
-        raise HTTPException(status_code=500, detail="Database connection error")
-
-    bookings = list(db[settings.DATABASE_NAME].bookings.find({}, {"_id": 0}))
-    return {"count": len(bookings), "items": bookings}
+async def list_all_bookings(
+    limit: int = Query(100, ge=1, le=1000),
+    after: Optional[str] = Query(None, description="next_after from the previous page"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return"),
+    since: Optional[datetime] = Query(None, description="Only bookings updated after this time"),
+    _: User = Depends(require_admin),
+    collections: Collections = Depends(get_collections),
+):
+    """Page through bookings ordered by (created_at, booking_id).
+
+    ``count`` is the number of items on this page. Pass ``synced_at`` back as ``since`` to fetch only
+    bookings changed since this response (deleted bookings are not reported).
+    """
+    synced_at = datetime.utcnow()
+    query: dict = {"updated_at": {"$gt": since}} if since else {}
+    projection = parse_fields(fields, BOOKING_FIELDS, BOOKING_PAGE_KEYS)
+    page = await keyset_page(collections.bookings, query, BOOKING_PAGE_KEYS, limit, after, projection)
+    return {"count": len(page["items"]), **page, "synced_at": synced_at}
+
+
+def bookings_by_day_pipeline(limit: Optional[int] = None, offset: int = 0) -> list:
+    """Days sorted by date, each with its bookings joined to the booking user and sorted by name.
+
+    ``limit``/``offset`` page through each day's bookings; ``booking_count`` is always the full count.
+    """
+    page: list = [{"$skip": offset}] if offset else []
+    if limit is not None:
+        page.append({"$limit": limit})
+    return [
+        {"$sort": {"date": 1}},
+        {
+            "$lookup": {
+                "from": "bookings",
+                "let": {"day_id": "$day_id"},
+                "pipeline": [
+                    {"$match": {"$expr": {"$eq": ["$day_id", "$$day_id"]}}},
+                    {
+                        "$lookup": {
+                            "from": "users",
+                            "localField": "user_id",
+                            "foreignField": "user_id",
+                            "as": "user",
+                        }
+                    },
+                    {
+                        "$project": {
+                            "_id": 0,
+                            "booking_id": 1,
+                            "user_id": 1,
+                            "user_name": {"$ifNull": [{"$arrayElemAt": ["$user.name", 0]}, None]},
+                            "user_email": {"$ifNull": [{"$arrayElemAt": ["$user.email", 0]}, None]},
+                            "booking_date": 1,
+                            "status": 1,
+                            "sort_name": {"$toLower": {"$ifNull": [{"$arrayElemAt": ["$user.name", 0]}, ""]}},
+                        }
+                    },
+                    {"$sort": {"sort_name": 1}},
+                    {"$project": {"sort_name": 0}},
+                    *page,
+                ],
+                "as": "bookings",
+            }
+        },
+        {
+            "$lookup": {
+                "from": "bookings",
+                "let": {"day_id": "$day_id"},
+                "pipeline": [{"$match": {"$expr": {"$eq": ["$day_id", "$$day_id"]}}}, {"$count": "n"}],
+                "as": "booking_count",
+            }
+        },
+        {
+            "$project": {
+                "_id": 0,
+                "day_id": 1,
+                "date": 1,
+                "theme": 1,
+                "capacity": {"$ifNull": ["$capacity", 6]},
+                "booking_count": {"$ifNull": [{"$arrayElemAt": ["$booking_count.n", 0]}, 0]},
+                "bookings": 1,
+            }
+        },
+    ]
 
 
 @router.get("/bookings/by-day")
-def list_bookings_grouped_by_day(_: User = Depends(require_admin)):
-    """Return bookings grouped per day with user names and emails included."""
-    db = get_database()
-    if not db:
-        raise HTTPException(status_code=500, detail="Database connection error")
-
-    # Load days and index by day_id
-    days = list(db[settings.DATABASE_NAME].days.find({}, {"_id": 0}))
-    # Index maps could be used for additional fields if needed
-
-    # Load users and index by user_id
-    users = list(db[settings.DATABASE_NAME].users.find({}, {"_id": 0}))
-    user_by_id = {u["user_id"]: u for u in users}
-
-    # Prepare day containers
-    result = []
-    for d in sorted(days, key=lambda dd: dd.get("date")):
-        result.append(
-            {
-                "day_id": d["day_id"],
-                "date": d.get("date"),
-                "theme": d.get("theme"),
-                "capacity": d.get("capacity", 6),
-                "bookings": [],
-            }
-        )
-
-    result_by_day_id = {entry["day_id"]: entry for entry in result}
-
-    # Load bookings and attach
-    bookings = list(db[settings.DATABASE_NAME].bookings.find({}, {"_id": 0}))
-    for b in bookings:
-        day_id = b.get("day_id")
-        day_entry = result_by_day_id.get(day_id)
-        if not day_entry:
-            # Skip bookings for unknown days
-            continue
-        user = user_by_id.get(b.get("user_id"), {})
-        day_entry["bookings"].append(
-            {
-                "booking_id": b.get("booking_id"),
-                "user_id": b.get("user_id"),
-                "user_name": user.get("name"),
-                "user_email": user.get("email"),
-                "booking_date": b.get("booking_date"),
-                "status": b.get("status"),
-            }
-        )
+async def list_bookings_grouped_by_day(
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=500, description="Bookings per day"),
+    offset: int = Query(0, ge=0, description="Bookings to skip per day"),
+    _: User = Depends(require_admin),
+    collections: Collections = Depends(get_collections),
+):
+    """Return bookings grouped per day with user names and emails included.
+
+    Supports If-None-Match, answering 304 when the dashboard already has the current data.
+    """
+    cursor = await collections.days.aggregate(bookings_by_day_pipeline(limit, offset))
+    days = await cursor.to_list()
+    return conditional_response(request, serialize_json({"days": days}), headers={"Cache-Control": "no-cache"})
+
+
+# ---- Caches & Queues ----
+@router.get("/cache/stats")
+async def admin_cache_stats(_: User = Depends(require_admin)):
+    return {
+        "users": user_cache.stats(),
+        "email_renders": email_service.render_cache.stats(),
+        "availability": availability_broker.stats(),
+        "festival_responses": response_cache.stats(),
+        "reference_data": reference_data.stats(),
+        "outbound_http": http_client.stats(),
+    }
 
-    # Sort bookings by user name for readability
-    for entry in result:
-        entry["bookings"].sort(key=lambda bb: (bb.get("user_name") or "").lower())
 
-    return {"days": result}
+@router.delete("/cache/users")
+async def admin_clear_user_cache(user_id: Optional[str] = None, _: User = Depends(require_admin)):
+    """Drop cached users, e.g. after changing is_admin directly in the database."""
+    invalidate_cached_user(user_id=user_id)
+    return {"cleared": True, "users": user_cache.stats()}
+
+
+@router.get("/email/queue")
+async def admin_email_queue(_: User = Depends(require_admin)):
+    """Email queue depth and counters, plus the most recent dead letters."""
+    dead_letters = [
+        {"kind": m.kind, "to_address": m.to_address, "attempts": m.attempts, "error": m.last_error}
+        for m in list(email_service.dead_letters)[-50:]
+    ]
+    return {"queue": email_service.queue_stats(), "dead_letters": dead_letters}
 
 
 # ---- Content Management ----
@@ -93,21 +187,29 @@ class UpdateDayRequest(BaseModel):
 
 
 @router.get("/days")
-def admin_list_days(_: User = Depends(require_admin)):
-    db = get_database()
-    if not db:
-        raise HTTPException(status_code=500, detail="Database connection error")
-    days = list(db[settings.DATABASE_NAME].days.find({}, {"_id": 0}))
-    days.sort(key=lambda d: d.get("date"))
-    return {"items": days}
+async def admin_list_days(
+    limit: int = Query(100, ge=1, le=1000),
+    after: Optional[str] = Query(None, description="next_after from the previous page"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return"),
+    since: Optional[datetime] = Query(None, description="Only days updated after this time"),
+    _: User = Depends(require_admin),
+    collections: Collections = Depends(get_collections),
+):
+    """Page through days ordered by (date, day_id); see list_all_bookings for the parameters."""
+    synced_at = datetime.utcnow()
+    query: dict = {"updated_at": {"$gt": since}} if since else {}
+    projection = parse_fields(fields, DAY_FIELDS, DAY_PAGE_KEYS)
+    page = await keyset_page(collections.days, query, DAY_PAGE_KEYS, limit, after, projection)
+    return {**page, "synced_at": synced_at}
 
 
 @router.put("/days/{day_id}")
-def admin_update_day(day_id: str, req: UpdateDayRequest, _: User = Depends(require_admin)):
-    db = get_database()
-    if not db:
-        raise HTTPException(status_code=500, detail="Database connection error")
-
+async def admin_update_day(
+    day_id: str,
+    req: UpdateDayRequest,
+    _: User = Depends(require_admin),
+    collections: Collections = Depends(get_collections),
+):
     updates = {}
     if req.theme is not None:
         updates["theme"] = req.theme
@@ -116,8 +218,6 @@ def admin_update_day(day_id: str, req: UpdateDayRequest, _: User = Depends(requi
     if req.capacity is not None:
         updates["capacity"] = req.capacity
     if req.date is not None:
-        from datetime import datetime
-
         try:
             updates["date"] = datetime.fromisoformat(req.date.replace("Z", "+00:00"))
         except Exception:
@@ -125,11 +225,18 @@ def admin_update_day(day_id: str, req: UpdateDayRequest, _: User = Depends(requi
 
     if not updates:
         return {"updated": False}
+    updates["updated_at"] = datetime.utcnow()
 
-    result = db[settings.DATABASE_NAME].days.update_one({"day_id": day_id}, {"$set": updates})
+    result = await collections.days.update_one({"day_id": day_id}, {"$set": updates})
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Day not found")
-    day = db[settings.DATABASE_NAME].days.find_one({"day_id": day_id}, {"_id": 0})
+    if req.capacity is not None:
+        # Seats added to a full day go to its waitlist before they go on sale
+        await waitlist_service.fill(collections, day_id)
+    day = await collections.days.find_one({"day_id": day_id}, {"_id": 0})
+    availability_broker.notify(day)
+    reference_data.store_day(day)
+    invalidate_public_responses("days", "availability")
     return {"updated": True, "day": day}
 
 
@@ -141,15 +248,14 @@ class CreateDayRequest(BaseModel):
 
 
 @router.post("/days")
-def admin_create_day(req: CreateDayRequest, _: User = Depends(require_admin)):
+async def admin_create_day(
+    req: CreateDayRequest,
+    _: User = Depends(require_admin),
+    collections: Collections = Depends(get_collections),
+):
     import uuid
-    from datetime import datetime
-
-    db = get_database()
-    if not db:
-        raise HTTPException(status_code=500, detail="Database connection error")
 
-    festival = db[settings.DATABASE_NAME].festivals.find_one({})
+    festival = await collections.festivals.find_one({})
     if not festival:
         raise HTTPException(status_code=404, detail="Festival not found")
 
@@ -169,23 +275,31 @@ def admin_create_day(req: CreateDayRequest, _: User = Depends(require_admin)):
         "created_at": datetime.utcnow(),
         "updated_at": datetime.utcnow(),
     }
-    db[settings.DATABASE_NAME].days.insert_one(new_day)
+    await collections.days.insert_one(new_day)
+    availability_broker.notify(new_day)
+    reference_data.store_day(new_day)
+    invalidate_public_responses("days", "availability")
     return {"created": True, "day": {k: v for k, v in new_day.items() if k != "_id"}}
 
 
 @router.delete("/days/{day_id}")
-def admin_delete_day(day_id: str, _: User = Depends(require_admin)):
-    db = get_database()
-    if not db:
-        raise HTTPException(status_code=500, detail="Database connection error")
-
-    existing_bookings = db[settings.DATABASE_NAME].bookings.count_documents({"day_id": day_id})
+async def admin_delete_day(
+    day_id: str,
+    _: User = Depends(require_admin),
+    collections: Collections = Depends(get_collections),
+):
+    existing_bookings = await collections.bookings.count_documents({"day_id": day_id})
     if existing_bookings > 0:
         raise HTTPException(status_code=400, detail="Cannot delete day with existing bookings")
 
-    result = db[settings.DATABASE_NAME].days.delete_one({"day_id": day_id})
+    result = await collections.days.delete_one({"day_id": day_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Day not found")
+    # Its line goes with it, or those guests would still be shown waiting for a day that is gone
+    await collections.waitlist.delete_many({"day_id": day_id})
+    availability_broker.remove(day_id)
+    reference_data.remove_day(day_id)
+    invalidate_public_responses("days", "availability")
     return {"deleted": True, "day_id": day_id}
 
 
@@ -199,21 +313,22 @@ class UpdateFestivalRequest(BaseModel):
 
 
 @router.get("/festival")
-def admin_get_festival(_: User = Depends(require_admin)):
-    db = get_database()
-    if not db:
-        raise HTTPException(status_code=500, detail="Database connection error")
-    fest = db[settings.DATABASE_NAME].festivals.find_one({}, {"_id": 0})
+async def admin_get_festival(
+    _: User = Depends(require_admin),
+    collections: Collections = Depends(get_collections),
+):
+    fest = await collections.festivals.find_one({}, {"_id": 0})
     if not fest:
         raise HTTPException(status_code=404, detail="Festival not found")
     return fest
 
 
 @router.put("/festival")
-def admin_update_festival(req: UpdateFestivalRequest, _: User = Depends(require_admin)):
-    db = get_database()
-    if not db:
-        raise HTTPException(status_code=500, detail="Database connection error")
+async def admin_update_festival(
+    req: UpdateFestivalRequest,
+    _: User = Depends(require_admin),
+    collections: Collections = Depends(get_collections),
+):
     updates = {}
     if req.name is not None:
         updates["name"] = req.name
@@ -223,8 +338,6 @@ def admin_update_festival(req: UpdateFestivalRequest, _: User = Depends(require_
         updates["price"] = req.price
     if req.capacity_per_day is not None:
         updates["capacity_per_day"] = req.capacity_per_day
-    from datetime import datetime
-
     if req.start_date is not None:
         updates["start_date"] = datetime.fromisoformat(req.start_date.replace("Z", "+00:00"))
     if req.end_date is not None:
@@ -232,41 +345,81 @@ def admin_update_festival(req: UpdateFestivalRequest, _: User = Depends(require_
 
     if not updates:
         return {"updated": False}
-    db[settings.DATABASE_NAME].festivals.update_one({}, {"$set": updates})
-    fest = db[settings.DATABASE_NAME].festivals.find_one({}, {"_id": 0})
+    await collections.festivals.update_one({}, {"$set": updates})
+    fest = await collections.festivals.find_one({}, {"_id": 0})
+    if fest and "festival_id" in fest:
+        reference_data.store_festival(fest)
+    invalidate_public_responses("info")
     return {"updated": True, "festival": fest}
 
 
 # ---- Booking Management ----
+def prefix_range(prefix: str) -> dict:
+    """Match strings starting with ``prefix``; case-insensitive when queried with CASE_INSENSITIVE."""
+    # U+FFFF has the highest primary weight, so it bounds every string sharing the prefix
+    return {"$gte": prefix, "$lt": prefix + "\uffff"}
+
+
 @router.get("/bookings/search")
-def admin_search_bookings(
+async def admin_search_bookings(
     day_id: Optional[str] = None,
-    email: Optional[str] = None,
-    name: Optional[str] = None,
+    email: Optional[str] = Query(None, description="Case-insensitive email prefix"),
+    name: Optional[str] = Query(None, description="Case-insensitive name prefix"),
+    limit: int = Query(100, ge=1, le=500),
+    after: Optional[str] = Query(None, description="next_after from the previous page"),
     _: User = Depends(require_admin),
+    collections: Collections = Depends(get_collections),
 ):
-    db = get_database()
-    if not db:
-        raise HTTPException(status_code=500, detail="Database connection error")
+    """Search bookings by day and booking user, ordered by booking_id.
+
+    ``count`` is the total number of matches; pass ``next_after`` back as ``after`` for the next page.
+    """
     query: dict = {}
     if day_id:
         query["day_id"] = day_id
-    bookings = list(db[settings.DATABASE_NAME].bookings.find(query, {"_id": 0}))
     if email or name:
-        # Join users
-        users = list(db[settings.DATABASE_NAME].users.find({}, {"_id": 0}))
-        user_by_id = {u["user_id"]: u for u in users}
-
-        def match(b):
-            u = user_by_id.get(b.get("user_id"), {})
-            if email and email.lower() not in (u.get("email", "").lower()):
-                return False
-            if name and name.lower() not in (u.get("name", "").lower()):
-                return False
-            return True
-
-        bookings = [b for b in bookings if match(b)]
-    return {"count": len(bookings), "items": bookings}
+        return await search_bookings_by_user(collections, query, email, name, limit, after)
+
+    count = await collections.bookings.count_documents(query)
+    if after:
+        query["booking_id"] = {"$gt": after}
+    items = await collections.bookings.find(query, {"_id": 0}).sort("booking_id", 1).limit(limit + 1).to_list()
+    next_after = items[limit - 1]["booking_id"] if len(items) > limit else None
+    return {"count": count, "items": items[:limit], "next_after": next_after}
+
+
+async def search_bookings_by_user(
+    collections: Collections, query: dict, email: Optional[str], name: Optional[str], limit: int, after: Optional[str]
+) -> dict:
+    """admin_search_bookings filtered by the booking user, as one aggregation.
+
+    Joins each booking to its user (users.user_id index) instead of collecting the matching
+    user ids first: there are far fewer bookings than users, so a short prefix cannot blow up
+    the query. The collation makes the prefix matches case-insensitive.
+    """
+    user_match: dict = {}
+    if email:
+        user_match["user.email"] = prefix_range(email)
+    if name:
+        user_match["user.name"] = prefix_range(name)
+    page: list = [{"$match": {"booking_id": {"$gt": after}}}] if after else []
+    pipeline = [
+        {"$match": query},
+        {"$sort": {"booking_id": 1}},
+        {"$lookup": {"from": "users", "localField": "user_id", "foreignField": "user_id", "as": "user"}},
+        {"$match": user_match},
+        {
+            "$facet": {
+                "count": [{"$count": "count"}],
+                "items": [*page, {"$limit": limit + 1}, {"$project": {"_id": 0, "user": 0}}],
+            }
+        },
+    ]
+    result = await (await collections.bookings.aggregate(pipeline, collation=CASE_INSENSITIVE)).to_list()
+    count = result[0]["count"][0]["count"] if result and result[0]["count"] else 0
+    items = result[0]["items"] if result else []
+    next_after = items[limit - 1]["booking_id"] if len(items) > limit else None
+    return {"count": count, "items": items[:limit], "next_after": next_after}
 
 
 class AdminCreateBookingRequest(BaseModel):
@@ -275,31 +428,21 @@ class AdminCreateBookingRequest(BaseModel):
 
 
 @router.post("/bookings")
-def admin_create_booking(req: AdminCreateBookingRequest, _: User = Depends(require_admin)):
-    from datetime import datetime
-
-    db = get_database()
-    if not db:
-        raise HTTPException(status_code=500, detail="Database connection error")
-
-    # Validate day
-    day = db[settings.DATABASE_NAME].days.find_one({"day_id": req.day_id})
-    if not day:
-        raise HTTPException(status_code=404, detail="Day not found")
-
+async def admin_create_booking(
+    req: AdminCreateBookingRequest,
+    _: User = Depends(require_admin),
+    collections: Collections = Depends(get_collections),
+):
     # Find user by email
-    user = db[settings.DATABASE_NAME].users.find_one({"email": req.email})
+    user = await collections.users.find_one({"email": req.email})
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
-    # Enforce one booking per user
-    existing = db[settings.DATABASE_NAME].bookings.find_one({"user_id": user["user_id"]})
-    if existing:
-        raise HTTPException(status_code=400, detail="User already has a booking")
-
-    # Capacity check
-    count_for_day = db[settings.DATABASE_NAME].bookings.count_documents({"day_id": req.day_id})
-    if count_for_day >= day.get("capacity", 6):
+    # Validate day and take a seat atomically
+    day = await ticket_service.reserve_seat(collections.days, req.day_id)
+    if not day:
+        if not await collections.days.find_one({"day_id": req.day_id}, {"_id": 1}):
+            raise HTTPException(status_code=404, detail="Day not found")
         raise HTTPException(status_code=400, detail="Day is fully booked")
 
     # Create booking
@@ -315,39 +458,100 @@ def admin_create_booking(req: AdminCreateBookingRequest, _: User = Depends(requi
         "created_at": datetime.utcnow(),
         "updated_at": datetime.utcnow(),
     }
-    db[settings.DATABASE_NAME].bookings.insert_one(new_booking)
+    # The unique index on bookings.user_id enforces one booking per user
+    try:
+        await collections.bookings.insert_one(new_booking)
+    except DuplicateKeyError:
+        await waitlist_service.release_seat(collections, req.day_id)
+        raise HTTPException(status_code=400, detail="User already has a booking")
+    except Exception:
+        await waitlist_service.release_seat(collections, req.day_id)
+        raise
+    invalidate_public_responses("days", "availability")
     return {"booking": {k: v for k, v in new_booking.items() if k != "_id"}}
 
 
-@router.get("/bookings/export", response_class=PlainTextResponse)
-def admin_export_bookings(day_id: Optional[str] = None, _: User = Depends(require_admin)):
-    db = get_database()
-    if not db:
-        raise HTTPException(status_code=500, detail="Database connection error")
+@router.get("/bookings/export")
+async def admin_export_bookings(
+    day_id: Optional[str] = None,
+    fmt: Literal["csv", "ndjson", "parquet"] = Query("csv", alias="format"),
+    gzip: bool = False,
+    _: User = Depends(require_admin),
+    collections: Collections = Depends(get_collections),
+):
+    """Stream bookings as CSV (default), NDJSON or Parquet, optionally gzip-compressed."""
+    if fmt == "parquet" and not parquet_available():
+        raise HTTPException(status_code=400, detail="Parquet export requires pyarrow to be installed")
+
     query: dict = {}
     if day_id:
         query["day_id"] = day_id
-    bookings = list(db[settings.DATABASE_NAME].bookings.find(query, {"_id": 0}))
-    users = list(db[settings.DATABASE_NAME].users.find({}, {"_id": 0}))
-    user_by_id = {u["user_id"]: u for u in users}
-    # CSV header
-    lines: List[str] = ["booking_id,day_id,user_name,user_email,booking_date,status"]
-    from datetime import datetime
-
-    for b in bookings:
-        u = user_by_id.get(b.get("user_id"), {})
-        date_str = b.get("booking_date")
-        if isinstance(date_str, datetime):
-            date_str = date_str.isoformat()
-        line = ",".join(
-            [
-                str(b.get("booking_id", "")),
-                str(b.get("day_id", "")),
-                '"' + (u.get("name", "").replace('"', '""')) + '"',
-                u.get("email", ""),
-                str(date_str or ""),
-                b.get("status", ""),
-            ]
-        )
-        lines.append(line)
-    return "\n".join(lines)
+    body = EXPORT_WRITERS[fmt](iter_booking_rows(collections, query, settings.EXPORT_BATCH_SIZE))
+    media_type = EXPORT_MEDIA_TYPES[fmt]
+    if gzip:
+        body = gzip_stream(body)
+        media_type = "application/gzip"
+    filename = export_filename(fmt, day_id, gzip)
+    return StreamingResponse(
+        body, media_type=media_type, headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
+# ---- Announcements ----
+class AnnouncementRequest(BaseModel):
+    subject: str
+    message: str
+    day_id: Optional[str] = None  # None emails every guest with a booking
+    personalize: bool = False  # greet each guest by name (one render per guest)
+    dry_run: bool = False
+
+
+@router.post("/email/announcements")
+async def admin_send_announcement(
+    req: AnnouncementRequest,
+    _: User = Depends(require_admin),
+    collections: Collections = Depends(get_collections),
+):
+    """Email every opted-in guest booked on a day (or on any day) and report per-recipient results."""
+    day_query: dict = {"day_id": req.day_id} if req.day_id else {}
+    days = {
+        d["day_id"]: d
+        for d in await collections.days.find(day_query, {"_id": 0, "day_id": 1, "date": 1, "theme": 1}).to_list()
+    }
+    if req.day_id and not days:
+        raise HTTPException(status_code=404, detail="Day not found")
+
+    bookings = await collections.bookings.find(
+        {"day_id": {"$in": list(days)}}, {"_id": 0, "user_id": 1, "day_id": 1}
+    ).to_list()
+    day_by_user = {b["user_id"]: b["day_id"] for b in bookings}
+    users = await collections.users.find(
+        {"user_id": {"$in": list(day_by_user)}, "email_opt_in": {"$ne": False}},
+        {"_id": 0, "user_id": 1, "email": 1, "name": 1},
+    ).to_list()
+    festival = await collections.festivals.find_one({}, {"_id": 0, "location": 1}) or {}
+
+    recipients = []
+    for user in users:
+        day = days[day_by_user[user["user_id"]]]
+        day_date = day.get("date")
+        context = {
+            "day_theme": day.get("theme", ""),
+            "booking_date": day_date.strftime("%B %d, %Y") if isinstance(day_date, datetime) else str(day_date),
+            "location": festival.get("location", "Guldbergsgade 51A, 4. tv., 2200 København N"),
+        }
+        if req.personalize:
+            context["user_name"] = user.get("name")
+        recipients.append(BulkRecipient(to_address=user["email"], context=context))
+
+    result = await email_service.send_bulk(
+        "announcement", recipients, shared_context={"message": req.message}, subject=req.subject, dry_run=req.dry_run
+    )
+    return {
+        "recipients": len(recipients),
+        "rendered": result.rendered,
+        "sent": result.sent,
+        "failed": result.failed,
+        "dry_run": req.dry_run,
+        "results": result.results,
+    }
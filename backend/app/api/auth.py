@@ -1,11 +1,48 @@
+import logging
+import math
+import time
+from typing import Optional, Tuple
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.coordination import coordination
+from app.core.database import Collections, get_collections
+from app.core.http_client import UpstreamUnavailable
 from app.models.user import User
 from app.services.auth import auth_service
 from fastapi import APIRouter, Depends, HTTPException
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from pydantic import BaseModel
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter(prefix="/api/v1/auth", tags=["authentication"])
 security = HTTPBearer()
+optional_security = HTTPBearer(auto_error=False)
+
+# Decoded token subject (google_id) -> User, so the auth dependency skips the database on repeat requests
+user_cache: TTLCache[str, User] = TTLCache(settings.USER_CACHE_MAX_SIZE, settings.USER_CACHE_TTL_SECONDS)
+# Bearer token -> (google_id, expiry), so the rate limiter and the auth dependency verify it once
+token_cache: TTLCache[str, Tuple[str, float]] = TTLCache(settings.USER_CACHE_MAX_SIZE, settings.USER_CACHE_TTL_SECONDS)
+
+
+def _drop_cached_user(message: dict) -> None:
+    if message.get("google_id"):
+        user_cache.invalidate(message["google_id"])
+    elif message.get("user_id"):
+        user_cache.invalidate_where(lambda user: user.user_id == message["user_id"])
+    else:
+        user_cache.clear()
+
+
+def invalidate_cached_user(google_id: Optional[str] = None, user_id: Optional[str] = None) -> None:
+    """Drop a user (everyone when no id is given) from the user cache of every worker."""
+    message = {"google_id": google_id, "user_id": user_id}
+    _drop_cached_user(message)
+    coordination.publish_nowait("user-cache", message)
+
+
+coordination.subscribe("user-cache", _drop_cached_user)
 
 
 class GoogleLoginRequest(BaseModel):
@@ -19,27 +56,29 @@ class LoginResponse(BaseModel):
 
 
 @router.post("/google/login", response_model=LoginResponse)
-async def google_login(request: GoogleLoginRequest):
+async def google_login(request: GoogleLoginRequest, collections: Collections = Depends(get_collections)):
     """Login with Google OAuth"""
     try:
-        print(f"Received login request with token length: {len(request.id_token)}")
-
         # Verify Google token
         google_user_info = await auth_service.verify_google_token(request.id_token)
-        print(f"Google user info: {google_user_info}")
+        logger.debug("Google token verified", extra={"google_id": google_user_info.get("sub")})
 
         # Get or create user
-        user = await auth_service.get_or_create_user(google_user_info)
+        user = await auth_service.get_or_create_user(google_user_info, collections.users)
+        user_cache.set(user.google_id, user)
 
         # Create access token
         access_token = auth_service.create_access_token(data={"sub": user.google_id, "email": user.email})
 
         return LoginResponse(access_token=access_token, user=user)
+    except UpstreamUnavailable as e:
+        logger.warning("Google unavailable during login: %s", e)
+        raise HTTPException(status_code=503, detail="Google sign-in is unavailable, please try again shortly")
     except ValueError as e:
-        print(f"ValueError in login: {e}")
+        logger.info("Login rejected: %s", e)
         raise HTTPException(status_code=400, detail=str(e))
-    except Exception as e:
-        print(f"Exception in login: {e}")
+    except Exception:
+        logger.exception("Login failed")
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
@@ -49,31 +88,54 @@ async def logout():
     return {"message": "Successfully logged out"}
 
 
-async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> User:
+def token_subject(token: str) -> Optional[str]:
+    """The google_id an access token was issued to, or None when it is invalid or has expired."""
+    entry = token_cache.get(token)
+    if entry is None:
+        try:
+            payload = auth_service.verify_token(token)
+        except ValueError:
+            return None
+        if payload.get("sub") is None:
+            return None
+        entry = (payload["sub"], payload.get("exp", math.inf))
+        token_cache.set(token, entry)
+    google_id, expires_at = entry
+    return google_id if expires_at > time.time() else None
+
+
+async def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    collections: Collections = Depends(get_collections),
+) -> User:
     """Get current authenticated user"""
-    try:
-        payload = auth_service.verify_token(credentials.credentials)
-        google_id = payload.get("sub")
-        if google_id is None:
-            raise HTTPException(status_code=401, detail="Invalid token")
-    except ValueError:
+    google_id = token_subject(credentials.credentials)
+    if google_id is None:
         raise HTTPException(status_code=401, detail="Invalid token")
 
-    # Get user from database
-    from app.core.config import settings
-    from app.core.database import get_database
-
-    db = get_database()
-    if not db:
-        raise HTTPException(status_code=500, detail="Database connection error")
+    cached_user = user_cache.get(google_id)
+    if cached_user is not None:
+        return cached_user
 
-    users_collection = db[settings.DATABASE_NAME].users
-    user_data = users_collection.find_one({"google_id": google_id})
+    # Get user from database
+    user_data = await collections.users.find_one({"google_id": google_id})
 
     if user_data is None:
         raise HTTPException(status_code=401, detail="User not found")
 
-    return User(**user_data)
+    user = User(**user_data)
+    user_cache.set(google_id, user)
+    return user
+
+
+async def get_optional_user(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security),
+    collections: Collections = Depends(get_collections),
+) -> Optional[User]:
+    """The authenticated user, or None for anonymous requests (a bad token is still a 401)."""
+    if credentials is None:
+        return None
+    return await get_current_user(credentials, collections)
 
 
 @router.get("/me", response_model=User)
@@ -1,21 +1,58 @@
+import asyncio
+import hashlib
+import ipaddress
+import logging
 import uuid
 from datetime import datetime
-from typing import Optional
+from typing import Awaitable, Callable, Optional, Tuple, TypeVar
 
-from app.api.auth import get_current_user
+from app.api.auth import get_current_user, get_optional_user
+from app.api.festival import invalidate_public_responses, sse_event
 from app.core.config import settings
-from app.core.database import get_database
+from app.core.database import Collections, get_collections
 from app.models.booking import Booking
 from app.models.user import User
-from app.services.email import email_service
-from fastapi import APIRouter, Depends, HTTPException
+from app.services.admission import AdmissionRejected, AlreadyQueued, admission
+from app.services.availability import day_availability
+from app.services.email import booking_email_context, email_service
+from app.services.reference_data import reference_data
+from app.services.tickets import ticket_service
+from app.services.waitlist import waitlist_service
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
+from pymongo.errors import DuplicateKeyError
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/v1/bookings", tags=["bookings"])
 
+T = TypeVar("T")
+
 
 class CreateBookingRequest(BaseModel):
     day_id: str
+    hold_id: Optional[str] = None  # from POST /holds: book the held seat
+
+
+class HoldRequest(BaseModel):
+    day_id: str
+
+
+class HoldResponse(BaseModel):
+    hold_id: str
+    day_id: str
+    expires_at: datetime
+
+
+class WaitlistRequest(BaseModel):
+    day_id: str
+
+
+class WaitlistResponse(BaseModel):
+    day_id: str
+    position: Optional[int]  # 1 is next in line; None once promoted to a booking (see /my-booking)
+    joined_at: datetime
 
 
 class BookingResponse(BaseModel):
@@ -29,120 +66,328 @@ class BookingResponse(BaseModel):
     updated_at: datetime
 
 
-@router.post("/", response_model=BookingResponse)
-async def create_booking(request: CreateBookingRequest, current_user: User = Depends(get_current_user)):
-    """Create a new booking for the current user"""
-    print(f"Creating booking for user {current_user.user_id} for day {request.day_id}")
-
-    db = get_database()
-    if not db:
-        raise HTTPException(status_code=500, detail="Database connection error")
-
-    # Check if user already has a booking
-    existing_booking = db[settings.DATABASE_NAME].bookings.find_one({"user_id": current_user.user_id})
-    if existing_booking:
-        raise HTTPException(status_code=400, detail="You already have a booking. You can only book one ticket.")
-
-        # Check if the day exists in the database
-    day = db[settings.DATABASE_NAME].days.find_one({"day_id": request.day_id})
+async def take_seat(collections: Collections, day_id: str, user_id: str, hold_id: Optional[str]) -> dict:
+    """Take a seat on the day, the held one when ``hold_id`` is given. Returns the updated day."""
+    if hold_id:
+        day = await ticket_service.convert_hold(collections.days, day_id, hold_id, user_id)
+        if not day:
+            raise HTTPException(status_code=409, detail="Your seat hold has expired, please book again")
+        return day
+    # Fails atomically if the day is full
+    day = await ticket_service.reserve_seat(collections.days, day_id)
     if not day:
-        raise HTTPException(status_code=404, detail="Day not found")
-
-    # Check ticket availability
-    existing_bookings_for_day = db[settings.DATABASE_NAME].bookings.count_documents({"day_id": request.day_id})
-    if existing_bookings_for_day >= 6:  # Capacity per day
+        if not await reference_data.get_day(collections.days, day_id):
+            raise HTTPException(status_code=404, detail="Day not found")
         raise HTTPException(status_code=400, detail="This day is fully booked")
+    return day
+
+
+async def book_seat(
+    user: User, day_id: str, collections: Collections, hold_id: Optional[str] = None
+) -> Tuple[dict, Booking]:
+    """Take a seat on the day and insert the booking. Returns the updated day and the booking."""
+    day = await take_seat(collections, day_id, user.user_id, hold_id)
 
     # Create the booking
     new_booking = Booking(
         booking_id=str(uuid.uuid4()),
-        user_id=current_user.user_id,
-        day_id=request.day_id,
+        user_id=user.user_id,
+        day_id=day_id,
         festival_id=day["festival_id"],
         booking_date=datetime.utcnow(),
         status="confirmed",
     )
 
-    print(f"New booking data: {new_booking.model_dump()}")
+    # The unique index on bookings.user_id enforces one booking per user
+    try:
+        await collections.bookings.insert_one(new_booking.model_dump())
+    except DuplicateKeyError:
+        await waitlist_service.release_seat(collections, day_id)
+        raise HTTPException(status_code=400, detail="You already have a booking. You can only book one ticket.")
+    except Exception:
+        await waitlist_service.release_seat(collections, day_id)
+        raise
+
+    return day, new_booking
+
+
+async def through_waiting_room(queue_key: str, day_id: str, attempt: Callable[[], Awaitable[T]]) -> T:
+    """Run ``attempt`` once the waiting room admits it. Days known to be full get a 400 at once."""
+    if admission.sold_out(day_id):
+        raise HTTPException(status_code=400, detail="This day is fully booked")
+    try:
+        async with admission.slot(queue_key):
+            # The day may have sold out while we were queued
+            if admission.sold_out(day_id):
+                raise HTTPException(status_code=400, detail="This day is fully booked")
+            return await attempt()
+    except AlreadyQueued:
+        raise HTTPException(status_code=409, detail="Your booking is already being processed")
+    except AdmissionRejected as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(e.retry_after)})
 
-    db[settings.DATABASE_NAME].bookings.insert_one(new_booking.model_dump())
 
-    print(f"Booking created with ID: {new_booking.booking_id}")
+@router.post("/", response_model=BookingResponse)
+async def create_booking(
+    request: CreateBookingRequest,
+    current_user: User = Depends(get_current_user),
+    collections: Collections = Depends(get_collections),
+):
+    """Create a new booking for the current user.
+
+    Attempts go through the waiting room (``app.services.admission``): days known to be full are
+    answered straight away, and only a bounded number of attempts reach MongoDB at once. With a
+    ``hold_id`` the seat is already taken, so the held seat is booked without queueing again.
+    """
+    if request.hold_id:
+        day, new_booking = await book_seat(current_user, request.day_id, collections, request.hold_id)
+    else:
+        day, new_booking = await through_waiting_room(
+            current_user.user_id, request.day_id, lambda: book_seat(current_user, request.day_id, collections)
+        )
+
+    logger.info(
+        "Booking created",
+        extra={"booking_id": new_booking.booking_id, "user_id": current_user.user_id, "day_id": request.day_id},
+    )
+    invalidate_public_responses("days", "availability")
 
-    # Send confirmation email (best-effort)
+    # Queue confirmation email (best-effort)
     if getattr(current_user, "email_opt_in", True):
         try:
-            # Fetch festival for details
-            festival = db[settings.DATABASE_NAME].festivals.find_one({"festival_id": day["festival_id"]}) or {}
-
-            # Format date
-            day_date = day.get("date")
-            if isinstance(day_date, datetime):
-                booking_date_str = day_date.strftime("%B %d, %Y")
-            else:
-                booking_date_str = str(day_date)
-
-            context = {
-                "user_name": current_user.name,
-                "day_theme": day.get("theme", ""),
-                "booking_date": booking_date_str,
-                "price": str(festival.get("price", "50")),
-                "location": festival.get("location", "Guldbergsgade 51A, 4. tv., 2200 København N"),
-            }
-            email_service.send_booking_confirmation(current_user.email, context)
+            festival = await reference_data.get_festival(collections.festivals, day["festival_id"]) or {}
+            context = booking_email_context(current_user, day, festival)
+            email_service.enqueue("booking_confirmation", current_user.email, context)
         except Exception as e:
-            print(f"Email send failed (create): {e}")
+            logger.warning("Queueing confirmation email failed: %s", e)
 
     return BookingResponse(**new_booking.model_dump())
 
 
-@router.get("/my-booking", response_model=Optional[BookingResponse])
-async def get_my_booking(current_user: User = Depends(get_current_user)):
-    """Get the current user's booking"""
-    print(f"get_my_booking called for user: {current_user.user_id}")
+@router.get("/queue")
+async def get_queue_position(current_user: User = Depends(get_current_user)):
+    """Where the current user's booking attempt is in the waiting room.
 
-    db = get_database()
-    if not db:
-        print("Database connection error")
-        raise HTTPException(status_code=500, detail="Database connection error")
+    ``position`` is 1 for next in line, 0 while the attempt runs and null when there is none.
+    """
+    return {"position": admission.position(current_user.user_id), "waiting": admission.queued}
 
-    booking_data = db[settings.DATABASE_NAME].bookings.find_one({"user_id": current_user.user_id})
-    print(f"Found booking data: {booking_data}")
 
-    if not booking_data:
-        print("No booking found, returning None")
+@router.get("/queue/stream")
+async def stream_queue_position(current_user: User = Depends(get_current_user)):
+    """Server-Sent Events: a ``position`` event whenever the user's place changes, ending once it runs.
+
+    Open it right after sending the booking request; it ends at once when there is no attempt.
+    """
+    user_id = current_user.user_id
+
+    async def events():
+        last: Optional[int] = -1
+        while True:
+            position = admission.position(user_id)
+            if position != last:
+                yield sse_event("position", {"position": position, "waiting": admission.queued})
+                last = position
+            if not position:
+                return
+            await asyncio.sleep(settings.ADMISSION_POSITION_INTERVAL_SECONDS)
+
+    return StreamingResponse(
+        events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+def trusted_proxy(host: str) -> bool:
+    """Whether ``host`` is one of the FORWARDED_ALLOW_IPS proxies ("*" names none in particular)."""
+    try:
+        address = ipaddress.ip_address(host)
+    except ValueError:
+        return False
+    for entry in settings.FORWARDED_ALLOW_IPS.split(","):
+        try:
+            if address in ipaddress.ip_network(entry.strip(), strict=False):
+                return True
+        except ValueError:
+            continue
+    return False
+
+
+def client_key(request: Request) -> Optional[str]:
+    """A stand-in for the caller's address on anonymous seat holds, or None when it is not known.
+
+    Behind a proxy, uvicorn swaps in the caller's address from X-Forwarded-For only for proxies in
+    FORWARDED_ALLOW_IPS. An address still pointing at a proxy is every visitor's, so it is not used.
+    """
+    host = request.client.host if request.client else None
+    if not host or trusted_proxy(host):
+        return None
+    forwarded = request.headers.get("x-forwarded-for")
+    if forwarded and host not in {hop.strip() for hop in forwarded.split(",")}:
+        return None  # through a proxy missing from FORWARDED_ALLOW_IPS
+    return hashlib.blake2b(host.encode(), digest_size=8).hexdigest()
+
+
+@router.post("/holds", response_model=HoldResponse)
+async def hold_seat(
+    request: HoldRequest,
+    http_request: Request,
+    current_user: Optional[User] = Depends(get_optional_user),
+    collections: Collections = Depends(get_collections),
+):
+    """Hold a seat for SEAT_HOLD_TTL_SECONDS while the guest checks out, signed in or not.
+
+    Book it by passing ``hold_id`` to POST /bookings/; unused, the seat goes back on sale when the
+    hold expires. Signed-in users hold one seat at a time: a new hold replaces their hold on any
+    other day, and asking again for the same day returns the hold they have. Before sign-in a
+    client address gets SEAT_HOLD_ANONYMOUS_PER_CLIENT live holds per day, then a 429 (no limit
+    when the address is not known, see ``client_key``).
+    """
+    user_id = current_user.user_id if current_user else None
+    client = None if user_id else client_key(http_request)
+    if user_id:
+        if await collections.bookings.find_one({"user_id": user_id}, {"_id": 1}):
+            raise HTTPException(status_code=400, detail="You already have a booking. You can only book one ticket.")
+        released = await ticket_service.release_user_holds(collections.days, user_id, request.day_id)
+        if released is not None:
+            # The seat it kept goes to that day's waitlist, if it has one
+            await waitlist_service.fill(collections, released["day_id"])
+
+    hold_id = str(uuid.uuid4())
+    try:
+        day = await through_waiting_room(
+            user_id or f"hold:{client or hold_id}",
+            request.day_id,
+            lambda: ticket_service.hold_seat(
+                collections.days,
+                request.day_id,
+                hold_id,
+                user_id,
+                settings.SEAT_HOLD_TTL_SECONDS,
+                client=client,
+                client_limit=settings.SEAT_HOLD_ANONYMOUS_PER_CLIENT,
+            ),
+        )
+    except HTTPException as e:
+        if e.status_code != 400 or not user_id:
+            raise
+        day = None  # full, but perhaps with the user's own hold
+    if day is None:
+        current = await collections.days.find_one({"day_id": request.day_id}, {"holds": 1})
+        if current is None:
+            raise HTTPException(status_code=404, detail="Day not found")
+        now = datetime.utcnow()
+        live = [h for h in current.get("holds") or () if h["expires_at"] > now]
+        if client and sum(h.get("client") == client for h in live) >= settings.SEAT_HOLD_ANONYMOUS_PER_CLIENT:
+            raise HTTPException(status_code=429, detail="Too many seats held from your network, please sign in first")
+        held = [h for h in live if user_id and h["user_id"] == user_id]
+        if not held:
+            raise HTTPException(status_code=400, detail="This day is fully booked")
+        return HoldResponse(hold_id=held[0]["hold_id"], day_id=request.day_id, expires_at=held[0]["expires_at"])
+
+    invalidate_public_responses("days", "availability")
+    hold = next(h for h in day["holds"] if h["hold_id"] == hold_id)
+    return HoldResponse(hold_id=hold_id, day_id=request.day_id, expires_at=hold["expires_at"])
+
+
+@router.delete("/holds/{hold_id}")
+async def release_hold(hold_id: str, collections: Collections = Depends(get_collections)):
+    """Give a held seat back before the hold expires, e.g. when the guest abandons checkout."""
+    day = await ticket_service.release_hold(collections.days, hold_id)
+    if not day:
+        raise HTTPException(status_code=404, detail="No such seat hold")
+    # The seat goes to the day's waitlist, if it has one
+    await waitlist_service.fill(collections, day["day_id"])
+    invalidate_public_responses("days", "availability")
+    return {"message": "Seat hold released"}
+
+
+@router.post("/waitlist", response_model=WaitlistResponse)
+async def join_waitlist(
+    request: WaitlistRequest,
+    current_user: User = Depends(get_current_user),
+    collections: Collections = Depends(get_collections),
+):
+    """Join the waitlist of a full day, instead of polling it for cancellations.
+
+    Seats given back on the day go to the line in order, each booked straight away for the guest
+    at its head, who gets an email. A guest is on one waitlist at a time: joining another day's
+    leaves the first.
+    """
+    if await collections.bookings.find_one({"user_id": current_user.user_id}, {"_id": 1}):
+        raise HTTPException(status_code=400, detail="You already have a booking. You can only book one ticket.")
+    day = await collections.days.find_one({"day_id": request.day_id}, {"_id": 0})
+    if day is None:
+        raise HTTPException(status_code=404, detail="Day not found")
+    if day_availability(day)["available"] > 0:
+        raise HTTPException(status_code=400, detail="This day still has seats, book one instead")
+
+    entry = await waitlist_service.join(collections, request.day_id, current_user.user_id)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Day not found")
+    invalidate_public_responses("availability")
+    place = await waitlist_service.position(collections, current_user.user_id)
+    return WaitlistResponse(
+        day_id=request.day_id, position=place["position"] if place else None, joined_at=entry["joined_at"]
+    )
+
+
+@router.get("/waitlist", response_model=Optional[WaitlistResponse])
+async def get_waitlist_position(
+    current_user: User = Depends(get_current_user),
+    collections: Collections = Depends(get_collections),
+):
+    """The current user's place on a waitlist (1 is next), or null when they are not on one."""
+    place = await waitlist_service.position(collections, current_user.user_id)
+    if place is None:
         return None
+    return WaitlistResponse(**place)
+
+
+@router.delete("/waitlist")
+async def leave_waitlist(
+    current_user: User = Depends(get_current_user),
+    collections: Collections = Depends(get_collections),
+):
+    """Leave the waitlist the current user is on."""
+    if not await waitlist_service.leave(collections, current_user.user_id):
+        raise HTTPException(status_code=404, detail="You are not on a waitlist")
+    invalidate_public_responses("availability")
+    return {"message": "Left the waitlist"}
+
 
-    print("Returning booking response")
+@router.get("/my-booking", response_model=Optional[BookingResponse])
+async def get_my_booking(
+    current_user: User = Depends(get_current_user),
+    collections: Collections = Depends(get_collections),
+):
+    """Get the current user's booking"""
+    booking_data = await collections.bookings.find_one({"user_id": current_user.user_id})
+    if not booking_data:
+        return None
     return BookingResponse(**booking_data)
 
 
 @router.put("/my-booking", response_model=BookingResponse)
-async def update_my_booking(request: CreateBookingRequest, current_user: User = Depends(get_current_user)):
+async def update_my_booking(
+    request: CreateBookingRequest,
+    current_user: User = Depends(get_current_user),
+    collections: Collections = Depends(get_collections),
+):
     """Update the current user's booking to a different day"""
-    db = get_database()
-    if not db:
-        raise HTTPException(status_code=500, detail="Database connection error")
-
     # Check if user has an existing booking
-    existing_booking = db[settings.DATABASE_NAME].bookings.find_one({"user_id": current_user.user_id})
+    existing_booking = await collections.bookings.find_one({"user_id": current_user.user_id})
     if not existing_booking:
         raise HTTPException(status_code=404, detail="No booking found to update")
 
-        # Check if the new day exists in the database
-    try:
-        day = db[settings.DATABASE_NAME].days.find_one({"day_id": request.day_id})
+    previous_day_id = existing_booking["day_id"]
+    moving = request.day_id != previous_day_id
+    if moving:
+        # Take a seat on the new day (the held one, if any) before giving back the old one
+        day = await take_seat(collections, request.day_id, current_user.user_id, request.hold_id)
+    else:
+        day = await reference_data.get_day(collections.days, request.day_id)
         if not day:
             raise HTTPException(status_code=404, detail="Day not found")
-    except Exception:
-        raise HTTPException(status_code=400, detail="Invalid day ID format")
-
-    # Check ticket availability (excluding current user's booking)
-    existing_bookings_for_day = db[settings.DATABASE_NAME].bookings.count_documents(
-        {"day_id": request.day_id, "user_id": {"$ne": current_user.user_id}}
-    )
-    if existing_bookings_for_day >= 6:  # Capacity per day
-        raise HTTPException(status_code=400, detail="This day is fully booked")
 
     # Update the booking
     updated_booking = Booking(
@@ -154,75 +399,54 @@ async def update_my_booking(request: CreateBookingRequest, current_user: User =
         status="confirmed",
     )
 
-    db[settings.DATABASE_NAME].bookings.update_one(
-        {"_id": existing_booking["_id"]},
+    result = await collections.bookings.update_one(
+        {"_id": existing_booking["_id"], "day_id": previous_day_id},
         {"$set": {"day_id": request.day_id, "festival_id": day["festival_id"], "updated_at": datetime.utcnow()}},
     )
-
-    # Send update email (best-effort)
+    if result.matched_count == 0:
+        # The booking was cancelled or moved by a concurrent request
+        if moving:
+            await waitlist_service.release_seat(collections, request.day_id)
+        raise HTTPException(status_code=409, detail="Your booking changed while updating, please try again")
+    if moving:
+        await waitlist_service.release_seat(collections, previous_day_id)
+        invalidate_public_responses("days", "availability")
+
+    # Queue update email (best-effort)
     if getattr(current_user, "email_opt_in", True):
         try:
-            festival = db[settings.DATABASE_NAME].festivals.find_one({"festival_id": day["festival_id"]}) or {}
-            day_date = day.get("date")
-            if isinstance(day_date, datetime):
-                booking_date_str = day_date.strftime("%B %d, %Y")
-            else:
-                booking_date_str = str(day_date)
-
-            context = {
-                "user_name": current_user.name,
-                "day_theme": day.get("theme", ""),
-                "booking_date": booking_date_str,
-                "price": str(festival.get("price", "50")),
-                "location": festival.get("location", "Guldbergsgade 51A, 4. tv., 2200 København N"),
-            }
-            email_service.send_booking_update(current_user.email, context)
+            festival = await reference_data.get_festival(collections.festivals, day["festival_id"]) or {}
+            context = booking_email_context(current_user, day, festival)
+            email_service.enqueue("booking_update", current_user.email, context)
         except Exception as e:
-            print(f"Email send failed (update): {e}")
+            logger.warning("Queueing update email failed: %s", e)
 
     return BookingResponse(**updated_booking.model_dump())
 
 
 @router.delete("/my-booking")
-async def cancel_my_booking(current_user: User = Depends(get_current_user)):
+async def cancel_my_booking(
+    current_user: User = Depends(get_current_user),
+    collections: Collections = Depends(get_collections),
+):
     """Cancel the current user's booking"""
-    db = get_database()
-    if not db:
-        raise HTTPException(status_code=500, detail="Database connection error")
-
-    # Fetch current booking for email context before deletion
-    current_booking = db[settings.DATABASE_NAME].bookings.find_one({"user_id": current_user.user_id})
-
-    result = db[settings.DATABASE_NAME].bookings.delete_one({"user_id": current_user.user_id})
-
-    if result.deleted_count == 0:
+    # Delete and return the booking in one step, keeping it for the email context
+    current_booking = await collections.bookings.find_one_and_delete({"user_id": current_user.user_id})
+    if not current_booking:
         raise HTTPException(status_code=404, detail="No booking found to cancel")
 
-    # Send cancellation email (best-effort)
+    # Goes to the head of the day's waitlist, if it has one
+    await waitlist_service.release_seat(collections, current_booking["day_id"])
+    invalidate_public_responses("days", "availability")
+
+    # Queue cancellation email (best-effort)
     if getattr(current_user, "email_opt_in", True):
         try:
-            if current_booking:
-                print(f"Sending cancellation email for booking: {current_booking}")
-                day = db[settings.DATABASE_NAME].days.find_one({"day_id": current_booking.get("day_id")}) or {}
-                festival = (
-                    db[settings.DATABASE_NAME].festivals.find_one({"festival_id": current_booking.get("festival_id")})
-                    or {}
-                )
-                day_date = day.get("date")
-                if isinstance(day_date, datetime):
-                    booking_date_str = day_date.strftime("%B %d, %Y")
-                else:
-                    booking_date_str = str(day_date)
-
-                context = {
-                    "user_name": current_user.name,
-                    "day_theme": day.get("theme", ""),
-                    "booking_date": booking_date_str,
-                    "price": str(festival.get("price", "50")),
-                    "location": festival.get("location", "Guldbergsgade 51A, 4. tv., 2200 København N"),
-                }
-                email_service.send_booking_cancellation(current_user.email, context)
+            day = await reference_data.get_day(collections.days, current_booking["day_id"]) or {}
+            festival = await reference_data.get_festival(collections.festivals, current_booking["festival_id"]) or {}
+            context = booking_email_context(current_user, day, festival)
+            email_service.enqueue("booking_cancellation", current_user.email, context)
         except Exception as e:
-            print(f"Email send failed (cancel): {e}")
+            logger.warning("Queueing cancellation email failed: %s", e)
 
     return {"message": "Booking cancelled successfully"}
@@ -1,68 +1,199 @@
-from fastapi import APIRouter, HTTPException
+import asyncio
+import json
+import logging
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.coordination import coordination
+from app.core.database import Collections, get_collections
+from app.core.etag import conditional_response, make_etag, serialize_json
+from app.services.availability import availability_broker
+from app.services.tickets import WAITLIST_WAITING_EXPR, seats_taken_expr
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/v1/festival", tags=["festival"])
 
+# Pre-serialized responses keyed by endpoint, as (version, body, etag). Write paths call
+# invalidate_public_responses; for seat counts the version is the availability broker's publish
+# counter, which also moves for bookings made on other workers.
+response_cache: TTLCache[str, Tuple[int, bytes, str]] = TTLCache(8, settings.FESTIVAL_CACHE_TTL_SECONDS)
+CACHE_CONTROL = {
+    "info": f"public, max-age={settings.FESTIVAL_INFO_MAX_AGE_SECONDS}",
+    "days": "public, no-cache",
+    "availability": "public, no-cache",
+}
+_generation = 0
+_build_locks: Dict[str, asyncio.Lock] = {}
+
+
+def _drop_public_responses(message: dict) -> None:
+    global _generation
+    _generation += 1
+    for endpoint in message["endpoints"]:
+        response_cache.invalidate(endpoint)
+
+
+def invalidate_public_responses(*endpoints: str) -> None:
+    """Drop cached responses for ``endpoints`` (all of them when none are given) in every worker."""
+    message = {"endpoints": list(endpoints or CACHE_CONTROL)}
+    _drop_public_responses(message)
+    coordination.publish_nowait("festival-responses", message)
+
+
+coordination.subscribe("festival-responses", _drop_public_responses)
+
+
+async def cached_response(
+    request: Request, endpoint: str, build: Callable[[], Awaitable[Any]], version: int = 0
+) -> Response:
+    """Serve ``endpoint`` from the response cache, building it once on a miss."""
+    entry = response_cache.get(endpoint)
+    if entry is None or entry[0] != version:
+        async with _build_locks.setdefault(endpoint, asyncio.Lock()):
+            entry = response_cache.get(endpoint)
+            if entry is None or entry[0] != version:
+                generation = _generation
+                body = serialize_json(await build())
+                entry = (version, body, make_etag(body))
+                # Don't store a response that a write invalidated while it was being built
+                if generation == _generation:
+                    response_cache.set(endpoint, entry)
+    _, body, etag = entry
+    return conditional_response(request, body, etag, headers={"Cache-Control": CACHE_CONTROL[endpoint]})
+
+
+FESTIVAL_INFO_DEFAULTS = {
+    "name": "Food & Friends Festival",
+    "start_date": "2024-11-03T00:00:00Z",
+    "end_date": "2024-11-07T23:59:59Z",
+    "location": "Guldbergsgade 51A, 4. tv., 2200 København N",
+    "price": 50.0,
+    "capacity_per_day": 6,
+}
+
 
 @router.get("/info")
-async def get_festival_info():
+async def get_festival_info(request: Request, collections: Collections = Depends(get_collections)):
     """Get festival information"""
-    return {
-        "name": "Food & Friends Festival",
-        "start_date": "2024-11-03T00:00:00Z",
-        "end_date": "2024-11-07T23:59:59Z",
-        "location": "Guldbergsgade 51A, 4. tv., 2200 København N",
-        "price": 50.0,
-        "capacity_per_day": 6,
-    }
 
+    async def build() -> dict:
+        festival = await collections.festivals.find_one({}, {"_id": 0}) or {}
+        info = {key: festival.get(key, default) for key, default in FESTIVAL_INFO_DEFAULTS.items()}
+        for key in ("start_date", "end_date"):
+            if isinstance(info[key], datetime):
+                info[key] = info[key].strftime("%Y-%m-%dT%H:%M:%SZ")
+        return info
 
-@router.get("/days")
-async def get_festival_days():
-    """Get all festival days with menus"""
-    from app.core.config import settings
-    from app.core.database import get_database
+    return await cached_response(request, "info", build)
 
-    db = get_database()
-    if not db:
-        raise HTTPException(status_code=500, detail="Database connection error")
-    try:
-        # Get all days from database
-        days_cursor = db[settings.DATABASE_NAME].days.find()
-        days = []
 
-        for day in days_cursor:
-            # Count bookings for this day
-            bookings_count = db[settings.DATABASE_NAME].bookings.count_documents({"day_id": day["day_id"]})
+# Every day with its seats sold and available, sorted by date, in one round trip. ``tickets_sold``
+# is the counter reserve_seat maintains, so "available" is the same number booking checks: seats
+# not sold or held for checkouts in progress (live at ``now``), and none while the day has a waitlist.
+def days_with_availability_pipeline(now: datetime) -> list:
+    free = {"$max": [{"$subtract": ["$capacity", seats_taken_expr(now)]}, 0]}
+    return [
+        {"$sort": {"date": 1}},
+        {
+            "$project": {
+                "_id": 0,
+                "id": "$day_id",
+                "date": 1,
+                "theme": 1,
+                "menu": 1,
+                "tickets_sold": {"$ifNull": ["$tickets_sold", 0]},
+                "capacity": 1,
+                "available": {"$cond": [WAITLIST_WAITING_EXPR, 0, free]},
+            }
+        },
+    ]
 
+
+async def load_festival_days(collections: Collections) -> list:
+    try:
+        cursor = await collections.days.aggregate(days_with_availability_pipeline(datetime.utcnow()))
+        days = []
+        async for day in cursor:
             days.append(
                 {
-                    "id": day["day_id"],  # Use our own day_id
+                    "id": day["id"],
                     "date": day["date"].isoformat(),
                     "theme": day["theme"],
                     "menu": day["menu"],
-                    "tickets_sold": bookings_count,
+                    "tickets_sold": day["tickets_sold"],
                     "capacity": day["capacity"],
-                    "available": day["capacity"] - bookings_count,
+                    "available": day["available"],
                 }
             )
-
-        # Sort by date
-        days.sort(key=lambda x: x["date"])
         return days
 
-    except Exception as e:
-        print(f"Error fetching days from database: {e}")
+    except Exception:
+        logger.exception("Error fetching days from database")
         raise HTTPException(status_code=500, detail="Database connection error")
 
 
+@router.get("/days")
+async def get_festival_days(request: Request, collections: Collections = Depends(get_collections)):
+    """Get all festival days with menus"""
+    return await cached_response(
+        request, "days", lambda: load_festival_days(collections), version=availability_broker.published
+    )
+
+
 @router.get("/availability")
-async def get_ticket_availability():
+async def get_ticket_availability(request: Request, collections: Collections = Depends(get_collections)):
     """Get ticket availability for all days"""
-    availability = [
-        {"day_id": "1", "date": "2024-11-03", "tickets_sold": 3, "available": 3, "total_capacity": 6},
-        {"day_id": "2", "date": "2024-11-04", "tickets_sold": 2, "available": 4, "total_capacity": 6},
-        {"day_id": "3", "date": "2024-11-05", "tickets_sold": 4, "available": 2, "total_capacity": 6},
-        {"day_id": "4", "date": "2024-11-06", "tickets_sold": 1, "available": 5, "total_capacity": 6},
-        {"day_id": "5", "date": "2024-11-07", "tickets_sold": 5, "available": 1, "total_capacity": 6},
-    ]
-    return availability
+
+    async def build() -> list:
+        return [
+            {
+                "day_id": day["day_id"],
+                "date": day["date"],
+                "tickets_sold": day["tickets_sold"],
+                "held": day["held"],
+                "waitlist": day["waitlist"],
+                "available": day["available"],
+                "total_capacity": day["capacity"],
+            }
+            for day in availability_broker.snapshot()
+        ]
+
+    if availability_broker.source == "stopped":
+        # No live broker (lifespan not running): read the days on every request
+        await availability_broker.load(collections.days)
+        return await build()
+    return await cached_response(request, "availability", build, version=availability_broker.published)
+
+
+def sse_event(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@router.get("/availability/stream")
+async def stream_ticket_availability():
+    """Server-Sent Events: a ``snapshot`` of every day, then ``availability`` events with changed days.
+
+    Changed days carry the same fields as the snapshot; a deleted day is sent as ``{"day_id", "removed": true}``.
+    """
+    if not availability_broker.accepting():
+        raise HTTPException(status_code=503, detail="Too many live listeners, please poll /availability")
+
+    async def events():
+        subscriber = availability_broker.subscribe()
+        try:
+            yield f"retry: 5000\n{sse_event('snapshot', availability_broker.snapshot())}"
+            while True:
+                changes = await subscriber.next_changes(settings.AVAILABILITY_HEARTBEAT_SECONDS)
+                # Comments keep proxies from closing idle connections
+                yield sse_event("availability", changes) if changes else ": keep-alive\n\n"
+        finally:
+            availability_broker.unsubscribe(subscriber)
+
+    return StreamingResponse(
+        events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -0,0 +1,133 @@
+import secrets
+from typing import Callable, Dict, Optional
+
+from app.api.auth import user_cache
+from app.api.festival import response_cache
+from app.core.config import settings
+from app.core.http_client import http_client
+from app.core.idempotency import idempotency_keys
+from app.core.metrics import CallbackMetric, Labels, registry
+from app.services.admission import admission
+from app.services.availability import availability_broker
+from app.services.email import email_service
+from app.services.reference_data import reference_data
+from app.services.waitlist import waitlist_service
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import PlainTextResponse
+
+router = APIRouter(tags=["metrics"])
+
+# In-process caches, each reporting hits/misses/size through its stats()
+CACHES: Dict[str, Callable[[], Dict]] = {
+    "users": user_cache.stats,
+    "email_renders": email_service.render_cache.stats,
+    "festival_responses": response_cache.stats,
+    "reference_data": reference_data.stats,
+}
+EMAIL_QUEUE_GAUGES = ("depth", "in_flight", "waiting_retry")
+EMAIL_QUEUE_COUNTERS = ("enqueued", "sent", "retried", "dead_lettered", "rejected")
+
+
+def _per_cache(field: str) -> Callable[[], Dict[Labels, float]]:
+    return lambda: {(name,): stats[field] for name, read in CACHES.items() if field in (stats := read())}
+
+
+def _admission(field: str) -> Callable[[], float]:
+    return lambda: admission.stats()[field]
+
+
+def _idempotency(field: str) -> Callable[[], float]:
+    return lambda: idempotency_keys.stats()[field]
+
+
+def _waitlist(field: str) -> Callable[[], float]:
+    return lambda: waitlist_service.stats()[field]
+
+
+def _email_queue(field: str) -> Callable[[], float]:
+    return lambda: email_service.queue_stats()[field]
+
+
+for field, name, kind in (
+    ("hits", "hits_total", "counter"),
+    ("misses", "misses_total", "counter"),
+    ("hit_rate", "hit_ratio", "gauge"),
+):
+    registry.register(
+        CallbackMetric(
+            f"cache_{name}", f"In-process cache {field.replace('_', ' ')}.", _per_cache(field), ("cache",), kind
+        )
+    )
+registry.register(CallbackMetric("cache_entries", "Entries held by each cache.", _per_cache("size"), ("cache",)))
+for field in EMAIL_QUEUE_GAUGES:
+    registry.register(
+        CallbackMetric(f"email_queue_{field}", f"Email queue {field.replace('_', ' ')}.", _email_queue(field))
+    )
+for field in EMAIL_QUEUE_COUNTERS:
+    registry.register(
+        CallbackMetric(
+            f"email_{field}_total", f"Emails {field.replace('_', ' ')}.", _email_queue(field), kind="counter"
+        )
+    )
+for field, kind in (
+    ("active", "gauge"),
+    ("waiting", "gauge"),
+    ("sold_out_answers", "counter"),
+    ("rejected", "counter"),
+):
+    name = f"booking_admission_{field}" + ("_total" if kind == "counter" else "")
+    registry.register(
+        CallbackMetric(name, f"Booking waiting room {field.replace('_', ' ')}.", _admission(field), kind=kind)
+    )
+for field in ("executed", "replayed", "coalesced", "conflicts"):
+    registry.register(
+        CallbackMetric(
+            f"idempotent_requests_{field}_total",
+            f"Requests with an Idempotency-Key {field}.",
+            _idempotency(field),
+            kind="counter",
+        )
+    )
+for field in ("joined", "left", "promoted", "passed_over"):
+    registry.register(
+        CallbackMetric(
+            f"waitlist_{field}_total", f"Waitlist tickets {field.replace('_', ' ')}.", _waitlist(field), kind="counter"
+        )
+    )
+registry.register(
+    CallbackMetric(
+        "availability_subscribers", "Open availability streams.", lambda: len(availability_broker.subscribers)
+    )
+)
+registry.register(
+    CallbackMetric(
+        "outbound_http_circuit_open",
+        "1 while calls to the host are short-circuited.",
+        lambda: {(host,): breaker.state == "open" for host, breaker in http_client.breakers.items()},
+        ("host",),
+    )
+)
+
+
+def require_metrics_token(authorization: Optional[str] = Header(None)) -> None:
+    """Check the scraper's bearer token when METRICS_TOKEN is set.
+
+    The metrics show the route table, traffic volumes and database round trips, so deployments
+    reachable from outside should set a token (Prometheus: ``authorization.credentials``).
+    """
+    if not settings.METRICS_TOKEN:
+        return
+    expected = f"Bearer {settings.METRICS_TOKEN}".encode()
+    if not secrets.compare_digest((authorization or "").encode(), expected):
+        raise HTTPException(status_code=401, detail="Invalid metrics token", headers={"WWW-Authenticate": "Bearer"})
+
+
+@router.get(
+    "/metrics",
+    response_class=PlainTextResponse,
+    include_in_schema=False,
+    dependencies=[Depends(require_metrics_token)],
+)
+async def metrics():
+    """Metrics of this worker process in the Prometheus text format."""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
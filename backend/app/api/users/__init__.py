@@ -1,9 +1,8 @@
 from datetime import datetime
 from typing import Any, Dict, Optional
 
-from app.api.auth import get_current_user
-from app.core.config import settings
-from app.core.database import get_database
+from app.api.auth import get_current_user, invalidate_cached_user
+from app.core.database import Collections, get_collections
 from app.models.user import User
 from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
@@ -22,11 +21,11 @@ async def get_profile(current_user: User = Depends(get_current_user)) -> User:
 
 
 @router.put("/profile", response_model=User)
-async def update_profile(request: UpdateProfileRequest, current_user: User = Depends(get_current_user)) -> User:
-    db = get_database()
-    if not db:
-        raise HTTPException(status_code=500, detail="Database connection error")
-
+async def update_profile(
+    request: UpdateProfileRequest,
+    current_user: User = Depends(get_current_user),
+    collections: Collections = Depends(get_collections),
+) -> User:
     updates: Dict[str, Any] = {}
     if request.name is not None:
         updates["name"] = request.name
@@ -38,7 +37,8 @@ async def update_profile(request: UpdateProfileRequest, current_user: User = Dep
 
     updates["updated_at"] = datetime.utcnow()
 
-    result = db[settings.DATABASE_NAME].users.update_one({"user_id": current_user.user_id}, {"$set": updates})
+    result = await collections.users.update_one({"user_id": current_user.user_id}, {"$set": updates})
+    invalidate_cached_user(google_id=current_user.google_id)
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="User not found")
 
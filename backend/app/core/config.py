@@ -8,15 +8,37 @@ class Settings(BaseSettings):
     MONGODB_CONNECTION_STRING: str = "mongodb://localhost:27017"
     MONGODB_URI: str = "mongodb://localhost:27017"  # Alternative name
     DATABASE_NAME: str = "foodandfriends"
+    MONGODB_MAX_POOL_SIZE: int = 100
+    MONGODB_MIN_POOL_SIZE: int = 0
+    MONGODB_WAIT_QUEUE_TIMEOUT_MS: int = 5000
+    MONGODB_ENSURE_INDEXES: bool = True
 
     # JWT
     JWT_SECRET_KEY: str = "your-secret-key"
     JWT_ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
 
+    # Authenticated-user cache (keyed by the token subject)
+    USER_CACHE_MAX_SIZE: int = 2048
+    USER_CACHE_TTL_SECONDS: float = 60.0
+
     # Google OAuth
     GOOGLE_CLIENT_ID: str = ""
     GOOGLE_CLIENT_SECRET: str = ""
+    # "local" verifies ID tokens against Google's cached signing keys; "tokeninfo" asks Google per login
+    GOOGLE_TOKEN_VERIFICATION: str = "local"
+    GOOGLE_JWKS_URL: str = "https://www.googleapis.com/oauth2/v3/certs"
+    GOOGLE_TOKENINFO_URL: str = "https://oauth2.googleapis.com/tokeninfo"
+
+    # Outbound HTTP (one pooled client for the process, see app/core/http_client.py)
+    HTTP_CONNECT_TIMEOUT_SECONDS: float = 3.0
+    HTTP_READ_TIMEOUT_SECONDS: float = 5.0
+    HTTP_MAX_CONNECTIONS: int = 100
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    HTTP_KEEPALIVE_EXPIRY_SECONDS: float = 30.0
+    HTTP_HTTP2: bool = False  # needs the h2 package (pip install backend[http2])
+    HTTP_BREAKER_FAILURES: int = 5  # failures in a row before calls to a host fail fast
+    HTTP_BREAKER_RESET_SECONDS: float = 30.0
 
     # AWS SES
     AWS_ACCESS_KEY_ID: str = ""
@@ -28,6 +50,82 @@ class Settings(BaseSettings):
     EMAIL_FROM_NAME: str = "Food & Friends"
     EMAIL_REPLY_TO: str = ""
     EMAIL_ENABLE_SENDING: bool = False
+    EMAIL_WORKERS: int = 4
+    EMAIL_QUEUE_MAX_SIZE: int = 1000
+    EMAIL_MAX_ATTEMPTS: int = 5
+    EMAIL_RETRY_BASE_SECONDS: float = 1.0
+    EMAIL_RETRY_MAX_SECONDS: float = 60.0
+    EMAIL_DEAD_LETTER_MAX: int = 500
+    EMAIL_SHUTDOWN_TIMEOUT_SECONDS: float = 10.0
+    EMAIL_MAX_SEND_RATE: float = 14.0  # SES default sending rate (messages per second)
+    EMAIL_BULK_CONCURRENCY: int = 10
+    EMAIL_BULK_BATCH_SIZE: int = 50
+    EMAIL_TEMPLATE_BYTECODE_DIR: str = ""  # e.g. /tmp/jinja-cache to persist compiled templates
+    EMAIL_RENDER_CACHE_SIZE: int = 256
+    EMAIL_RENDER_CACHE_TTL_SECONDS: float = 3600.0
+
+    # Admin exports
+    EXPORT_BATCH_SIZE: int = 1000
+
+    # Live availability (Server-Sent Events)
+    # "auto" follows a MongoDB change stream when the deployment supports one, else in-process updates
+    AVAILABILITY_SOURCE: str = "auto"
+    AVAILABILITY_MAX_SUBSCRIBERS: int = 10000
+    AVAILABILITY_HEARTBEAT_SECONDS: float = 15.0
+
+    # Public festival responses (cached in-process, invalidated by the write paths)
+    FESTIVAL_CACHE_TTL_SECONDS: float = 30.0  # bounds staleness from admin edits made on other workers
+    FESTIVAL_INFO_MAX_AGE_SECONDS: int = 60
+
+    # Days and festivals kept in memory for the booking and email paths
+    REFERENCE_DATA_REFRESH_SECONDS: float = 60.0
+
+    # Seat holds while a guest finishes checking out
+    SEAT_HOLD_TTL_SECONDS: float = 180.0
+    # Live holds per day from one client address before sign-in. Behind a proxy, list it in
+    # FORWARDED_ALLOW_IPS so the address is the visitor's; with no known address there is no limit
+    SEAT_HOLD_ANONYMOUS_PER_CLIENT: int = 1
+
+    # Waitlists for full days (entries in the waitlist collection)
+    WAITLIST_TOMBSTONE_TTL_SECONDS: float = 30 * 86400.0  # how long passed-over tickets are remembered
+    WAITLIST_RETRY_SECONDS: float = 30.0  # before booking a promotion again after a database error
+
+    # Waiting room in front of booking creation (per worker process)
+    ADMISSION_MAX_ACTIVE: int = 8  # booking attempts running against MongoDB at once
+    ADMISSION_MAX_WAITING: int = 20000
+    ADMISSION_MAX_WAIT_SECONDS: float = 30.0
+    ADMISSION_POSITION_INTERVAL_SECONDS: float = 1.0  # how often the queue stream reports a position
+
+    # Rate limiting: token buckets per caller (user, else client IP) and router
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_PUBLIC_RATE: float = 10.0  # requests per second, sustained
+    RATE_LIMIT_PUBLIC_BURST: int = 50
+    RATE_LIMIT_BOOKINGS_RATE: float = 2.0
+    RATE_LIMIT_BOOKINGS_BURST: int = 10
+    RATE_LIMIT_ADMIN_RATE: float = 20.0
+    RATE_LIMIT_ADMIN_BURST: int = 100
+    RATE_LIMIT_MAX_KEYS: int = 100000  # in-process buckets kept per worker
+
+    # Idempotency-Key on booking mutations (responses kept in the idempotency_keys collection)
+    IDEMPOTENCY_TTL_SECONDS: float = 86400.0  # how long a response is replayed to retries
+    IDEMPOTENCY_RUNNING_TIMEOUT_SECONDS: float = 60.0  # a claim older than this was abandoned
+    IDEMPOTENCY_WAIT_SECONDS: float = 10.0  # duplicates wait this long for the first request, then 409
+    IDEMPOTENCY_CACHE_SIZE: int = 10000
+
+    # Multi-worker deployment (see serve.py)
+    WEB_CONCURRENCY: int = 1
+    # Proxies trusted to set X-Forwarded-For (comma-separated IPs or networks, "*" for any)
+    FORWARDED_ALLOW_IPS: str = "127.0.0.1"
+    # "memory" for a single process; "redis" shares invalidations, availability and the email queue
+    COORDINATION_BACKEND: str = "memory"
+    REDIS_URL: str = "redis://localhost:6379/0"
+    COORDINATION_PREFIX: str = "foodandfriends:"
+
+    # Observability
+    LOG_LEVEL: str = "INFO"
+    LOG_FORMAT: str = "json"  # "json" (one object per line) or "text"
+    METRICS_ENABLED: bool = False  # request/MongoDB metrics and the Prometheus /metrics endpoint
+    METRICS_TOKEN: str = ""  # when set, /metrics requires "Authorization: Bearer <token>"
 
     # Environment
     ENVIRONMENT: str = "local"
@@ -44,8 +142,3 @@ class Settings(BaseSettings):
 
 
 settings = Settings()
-
-# Debug: Print the MongoDB connection string (without password for security)
-print(f"MongoDB Connection String: {settings.MONGODB_CONNECTION_STRING[:20]}...")
-print(f"Database Name: {settings.DATABASE_NAME}")
-print(f"Google Client ID: {settings.GOOGLE_CLIENT_ID[:20] if settings.GOOGLE_CLIENT_ID else 'NOT SET'}...")
@@ -0,0 +1,236 @@
+import asyncio
+import logging
+import uuid
+from collections import defaultdict
+from typing import Any, Callable, Coroutine, Dict, List, Optional, Set
+
+from app.core.config import settings
+from app.core.rate_limit import TokenBuckets
+from bson import json_util
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[dict], None]
+
+
+class CoordinationBackend:
+    """State that has to agree across API worker processes.
+
+    - ``publish``/``subscribe``: broadcast messages such as cache invalidations and availability
+      changes. Handlers only receive messages from *other* processes; the publisher applies its
+      own change locally before publishing, so it never waits on the round trip. Subscribe at
+      import time, before ``start``.
+    - ``push``/``pop``: named FIFO work queues shared by every worker (the email queue).
+    - ``take_token``: rate-limit token buckets, so a caller's budget holds across workers.
+
+    ``shared`` is False when only one process can be attached, so callers can skip the work.
+    """
+
+    shared = False
+
+    def __init__(self) -> None:
+        self.instance_id = uuid.uuid4().hex
+        self._handlers: Dict[str, List[Handler]] = defaultdict(list)
+        self._tasks: Set[asyncio.Task] = set()
+        self.buckets = TokenBuckets(settings.RATE_LIMIT_MAX_KEYS)
+
+    def subscribe(self, channel: str, handler: Handler) -> None:
+        self._handlers[channel].append(handler)
+
+    def _dispatch(self, channel: str, message: dict) -> None:
+        if message.get("origin") == self.instance_id:
+            return
+        for handler in self._handlers.get(channel, []):
+            try:
+                handler(message)
+            except Exception:
+                logger.exception("Handler for %s failed", channel)
+
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def publish(self, channel: str, message: dict) -> None:
+        raise NotImplementedError
+
+    async def push(self, queue: str, item: dict) -> bool:
+        raise NotImplementedError
+
+    async def pop(self, queue: str, timeout: float) -> Optional[dict]:
+        raise NotImplementedError
+
+    async def queue_size(self, queue: str) -> int:
+        raise NotImplementedError
+
+    async def take_token(self, key: str, rate: float, burst: int) -> float:
+        """Take a token from bucket ``key``: 0.0 when allowed, else seconds until one is available."""
+        return self.buckets.take(key, rate, burst)
+
+    # Fire-and-forget variants for synchronous callers
+    def publish_nowait(self, channel: str, message: dict) -> None:
+        if self.shared:
+            self.spawn(self.publish(channel, message))
+
+    def spawn(self, coro: Coroutine[Any, Any, Any]) -> None:
+        """Run ``coro`` in the background, keeping a reference until it finishes."""
+        task = asyncio.get_running_loop().create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+
+class MemoryBackend(CoordinationBackend):
+    """Single process: there is nobody to broadcast to, and queues are plain asyncio queues."""
+
+    def __init__(self, queue_max_size: int = 0) -> None:
+        super().__init__()
+        self.queue_max_size = queue_max_size
+        self._queues: Dict[str, asyncio.Queue] = {}
+
+    def _queue(self, name: str) -> asyncio.Queue:
+        if name not in self._queues:
+            self._queues[name] = asyncio.Queue(maxsize=self.queue_max_size)
+        return self._queues[name]
+
+    async def publish(self, channel: str, message: dict) -> None:
+        pass  # no other process to tell
+
+    async def push(self, queue: str, item: dict) -> bool:
+        try:
+            self._queue(queue).put_nowait(item)
+        except asyncio.QueueFull:
+            return False
+        return True
+
+    async def pop(self, queue: str, timeout: float) -> Optional[dict]:
+        try:
+            return await asyncio.wait_for(self._queue(queue).get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    async def queue_size(self, queue: str) -> int:
+        return self._queue(queue).qsize()
+
+
+# Refill and take in one step, on the Redis clock so workers with skewed clocks agree.
+# Buckets expire once they would be full again anyway.
+TAKE_TOKEN_SCRIPT = """
+local rate, burst = tonumber(ARGV[1]), tonumber(ARGV[2])
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'at')
+local tokens = tonumber(bucket[1]) or burst
+local at = tonumber(bucket[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - at) * rate)
+local wait = 0
+if tokens >= 1 then tokens = tokens - 1 else wait = (1 - tokens) / rate end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'at', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(burst / rate * 1000) + 1000)
+return tostring(wait)
+"""
+
+
+class RedisBackend(CoordinationBackend):
+    """Redis (or anything speaking its protocol) shared by every worker.
+
+    Messages go over pub/sub, queues are lists and rate-limit buckets are hashes, all under
+    ``prefix``. Pass ``client`` to use an existing ``redis.asyncio`` compatible client, e.g.
+    ``fakeredis.aioredis.FakeRedis()``.
+    """
+
+    shared = True
+
+    def __init__(self, url: str, prefix: str, queue_max_size: int = 0, client: Any = None) -> None:
+        super().__init__()
+        self.url = url
+        self.prefix = prefix
+        self.queue_max_size = queue_max_size
+        self.client = client
+        self._listener: Optional[asyncio.Task] = None
+        self._take_token: Any = None
+
+    async def start(self) -> None:
+        if self.client is None:
+            try:
+                import redis.asyncio as redis
+            except ImportError:
+                raise RuntimeError("COORDINATION_BACKEND=redis requires the redis package (pip install backend[redis])")
+            self.client = redis.from_url(self.url)
+        self._take_token = self.client.register_script(TAKE_TOKEN_SCRIPT)
+        if self._handlers and self._listener is None:
+            pubsub = self.client.pubsub()
+            await pubsub.subscribe(*[self.prefix + channel for channel in self._handlers])
+            self._listener = asyncio.create_task(self._listen(pubsub))
+
+    async def stop(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            await asyncio.gather(self._listener, return_exceptions=True)
+            self._listener = None
+        await super().stop()
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+            self._take_token = None
+
+    async def _listen(self, pubsub: Any) -> None:
+        async with pubsub:
+            while True:
+                try:
+                    event = await pubsub.get_message(ignore_subscribe_messages=True, timeout=5.0)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logger.warning("Coordination subscription error, retrying: %s", e)
+                    await asyncio.sleep(1.0)
+                    continue
+                if event is None:
+                    continue
+                channel = _text(event["channel"]).removeprefix(self.prefix)
+                self._dispatch(channel, json_util.loads(event["data"]))
+
+    async def publish(self, channel: str, message: dict) -> None:
+        await self.client.publish(self.prefix + channel, json_util.dumps({**message, "origin": self.instance_id}))
+
+    async def push(self, queue: str, item: dict) -> bool:
+        key = self.prefix + queue
+        if self.queue_max_size and await self.client.llen(key) >= self.queue_max_size:
+            return False
+        await self.client.lpush(key, json_util.dumps(item))
+        return True
+
+    async def pop(self, queue: str, timeout: float) -> Optional[dict]:
+        result = await self.client.brpop([self.prefix + queue], timeout=timeout)
+        return json_util.loads(result[1]) if result else None
+
+    async def queue_size(self, queue: str) -> int:
+        return await self.client.llen(self.prefix + queue)
+
+    async def take_token(self, key: str, rate: float, burst: int) -> float:
+        if self._take_token is None:  # not started, e.g. in scripts
+            return await super().take_token(key, rate, burst)
+        try:
+            wait = await self._take_token(keys=[self.prefix + "ratelimit:" + key], args=[rate, burst])
+        except Exception as e:
+            # Fall back to this worker's buckets rather than turning everyone away or letting everyone in
+            logger.warning("Shared rate limit unavailable, limiting per worker: %s", e)
+            return await super().take_token(key, rate, burst)
+        return float(wait)
+
+
+def _text(value: Any) -> str:
+    return value.decode() if isinstance(value, bytes) else value
+
+
+def create_backend() -> CoordinationBackend:
+    if settings.COORDINATION_BACKEND == "redis":
+        return RedisBackend(settings.REDIS_URL, settings.COORDINATION_PREFIX, settings.EMAIL_QUEUE_MAX_SIZE)
+    if settings.COORDINATION_BACKEND != "memory":
+        raise ValueError(f"Unknown COORDINATION_BACKEND: {settings.COORDINATION_BACKEND}")
+    return MemoryBackend(settings.EMAIL_QUEUE_MAX_SIZE)
+
+
+coordination = create_backend()
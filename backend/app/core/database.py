@@ -1,26 +1,63 @@
+import logging
 from typing import Optional
 
 from app.core.config import settings
-from pymongo import MongoClient
+from app.core.metrics import command_metrics
+from fastapi import HTTPException
+from pymongo import AsyncMongoClient
+from pymongo.asynchronous.collection import AsyncCollection
+from pymongo.asynchronous.database import AsyncDatabase
+
+logger = logging.getLogger(__name__)
+
+
+class Collections:
+    """Handles for the collections used by the API, bound to the configured database."""
+
+    def __init__(self, database: AsyncDatabase):
+        self.database = database
+        self.users: AsyncCollection = database.users
+        self.bookings: AsyncCollection = database.bookings
+        self.days: AsyncCollection = database.days
+        self.festivals: AsyncCollection = database.festivals
+        self.idempotency_keys: AsyncCollection = database.idempotency_keys
+        self.waitlist: AsyncCollection = database.waitlist
 
 
 class Database:
-    client: Optional[MongoClient] = None
+    client: Optional[AsyncMongoClient] = None
+    collections: Optional[Collections] = None
 
 
 db = Database()
 
 
-def get_database() -> Optional[MongoClient]:
+def get_database() -> Optional[AsyncMongoClient]:
     return db.client
 
 
-def connect_to_mongo():
-    db.client = MongoClient(settings.MONGODB_CONNECTION_STRING)
-    print("Connected to MongoDB.")
+def get_collections() -> Collections:
+    """FastAPI dependency that injects the collection handles."""
+    if db.collections is None:
+        raise HTTPException(status_code=500, detail="Database connection error")
+    return db.collections
+
+
+async def connect_to_mongo():
+    db.client = AsyncMongoClient(
+        settings.MONGODB_CONNECTION_STRING,
+        maxPoolSize=settings.MONGODB_MAX_POOL_SIZE,
+        minPoolSize=settings.MONGODB_MIN_POOL_SIZE,
+        waitQueueTimeoutMS=settings.MONGODB_WAIT_QUEUE_TIMEOUT_MS,
+        event_listeners=[command_metrics] if settings.METRICS_ENABLED else [],
+    )
+    db.collections = Collections(db.client[settings.DATABASE_NAME])
+    logger.info("Connected to MongoDB database %s", settings.DATABASE_NAME)
 
 
-def close_mongo_connection():
-    if db.client:
-        db.client.close()
-        print("Disconnected from MongoDB.")
+async def close_mongo_connection():
+    if db.client is not None:
+        await db.client.close()
+        db.client = None
+        db.collections = None
+        logger.info("Disconnected from MongoDB")
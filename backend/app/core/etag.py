@@ -0,0 +1,35 @@
+import hashlib
+import json
+from typing import Any, Dict, Optional
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+
+
+def serialize_json(payload: Any) -> bytes:
+    """Serialize a response payload the same way FastAPI would, as compact UTF-8 JSON."""
+    return json.dumps(jsonable_encoder(payload), ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def make_etag(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """True if the request's If-None-Match header names ``etag`` (or is ``*``)."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return "*" in candidates or etag in candidates
+
+
+def conditional_response(
+    request: Request, body: bytes, etag: Optional[str] = None, headers: Optional[Dict[str, str]] = None
+) -> Response:
+    """Return ``body`` as JSON with an ETag, or an empty 304 if the client already has it."""
+    etag = etag or make_etag(body)
+    response_headers = {"ETag": etag, **(headers or {})}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=response_headers)
+    return Response(content=body, media_type="application/json", headers=response_headers)
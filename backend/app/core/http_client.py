@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import importlib.util
+import time
+from typing import TYPE_CHECKING, Any, Dict, Optional
+from urllib.parse import urlsplit
+
+from app.core.config import settings
+
+if TYPE_CHECKING:
+    import httpx
+
+
+class UpstreamUnavailable(Exception):
+    """An outbound call could not connect, timed out, or was refused by an open circuit."""
+
+
+class CircuitBreaker:
+    """Stops calling an upstream that keeps failing.
+
+    After ``failure_threshold`` failures in a row the circuit opens and calls fail immediately.
+    Once every ``reset_seconds`` a single trial call is let through (half-open); a success
+    closes the circuit again.
+    """
+
+    def __init__(self, failure_threshold: int, reset_seconds: float) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "open" if time.monotonic() - self.opened_at < self.reset_seconds else "half_open"
+
+    def allow(self) -> bool:
+        if self.opened_at is None:
+            return True
+        now = time.monotonic()
+        if now - self.opened_at < self.reset_seconds:
+            return False
+        # Let this call through as the trial and hold everything else off for another period
+        self.opened_at = now
+        return True
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+
+
+class HttpClient:
+    """The process-wide client for outbound HTTP calls (Google sign-in).
+
+    One ``httpx.AsyncClient`` lives for the whole process, so connections (and their TLS
+    sessions) are kept alive and reused between calls. Every call gets the HTTP_* timeouts and
+    goes through a CircuitBreaker for its host. Pass ``transport`` (e.g. ``httpx.MockTransport``)
+    to talk to a local stub instead of the network.
+    """
+
+    def __init__(self, transport: Any = None) -> None:
+        self.transport = transport
+        self.client: Optional[httpx.AsyncClient] = None
+        self.breakers: Dict[str, CircuitBreaker] = {}
+
+    async def start(self) -> None:
+        if self.client is not None:
+            return
+        import httpx  # imported here rather than at module level to keep startup fast
+
+        if settings.HTTP_HTTP2 and importlib.util.find_spec("h2") is None:
+            raise RuntimeError("HTTP_HTTP2=true requires the h2 package (pip install backend[http2])")
+        self.client = httpx.AsyncClient(
+            http2=settings.HTTP_HTTP2,
+            timeout=httpx.Timeout(settings.HTTP_READ_TIMEOUT_SECONDS, connect=settings.HTTP_CONNECT_TIMEOUT_SECONDS),
+            limits=httpx.Limits(
+                max_connections=settings.HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY_SECONDS,
+            ),
+            transport=self.transport,
+        )
+
+    async def stop(self) -> None:
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+
+    def breaker(self, host: str) -> CircuitBreaker:
+        if host not in self.breakers:
+            self.breakers[host] = CircuitBreaker(settings.HTTP_BREAKER_FAILURES, settings.HTTP_BREAKER_RESET_SECONDS)
+        return self.breakers[host]
+
+    async def request(self, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        """Send a request. Raises UpstreamUnavailable on connection errors, timeouts and open circuits.
+
+        5xx responses are returned to the caller but count as failures for the circuit.
+        """
+        if self.client is None:
+            await self.start()  # used outside the app lifespan, e.g. from scripts
+        import httpx
+
+        host = urlsplit(url).netloc
+        breaker = self.breaker(host)
+        if not breaker.allow():
+            raise UpstreamUnavailable(f"{host} is failing, not calling it for now")
+        try:
+            response = await self.client.request(method, url, **kwargs)
+        except httpx.TransportError as e:
+            breaker.record_failure()
+            raise UpstreamUnavailable(f"{host}: {e!r}") from e
+        if response.status_code >= 500:
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+        return response
+
+    async def get(self, url: str, **kwargs: Any) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    def stats(self) -> Dict:
+        return {
+            "started": self.client is not None,
+            "http2": settings.HTTP_HTTP2,
+            "breakers": {
+                host: {"state": breaker.state, "failures": breaker.failures} for host, breaker in self.breakers.items()
+            },
+        }
+
+
+http_client = HttpClient()
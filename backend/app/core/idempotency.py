@@ -0,0 +1,307 @@
+import asyncio
+import hashlib
+import logging
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.database import db
+from pymongo.asynchronous.collection import AsyncCollection
+from pymongo.errors import DuplicateKeyError
+from starlette.responses import JSONResponse
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENT_METHODS = frozenset({"POST", "PUT", "PATCH", "DELETE"})
+IDEMPOTENT_PATHS: Sequence[str] = ("/api/v1/bookings", "/api/v1/admin/bookings")
+MAX_KEY_LENGTH = 255
+# Answers a retry should not get back, because trying again may well go differently
+TRANSIENT_STATUSES = frozenset({408, 409, 425, 429})
+POLL_SECONDS = 0.05
+
+
+class StoredResponse(NamedTuple):
+    fingerprint: str
+    status: int
+    headers: List[Tuple[str, str]]
+    body: bytes
+
+
+class IdempotencyConflict(Exception):
+    """The key was already used for a different request."""
+
+
+class IdempotencyInProgress(Exception):
+    """The first request with the key is still running elsewhere."""
+
+
+class IdempotencyKeys:
+    """Responses to mutations sent with an ``Idempotency-Key``, replayed to retries.
+
+    The first request with a key claims it in the ``idempotency_keys`` collection (the key is
+    the ``_id``), runs, and leaves its response there until ``expires_at`` (a TTL index). A retry
+    gets the stored response without the handler running again. Duplicates arriving while the
+    first still runs wait for it: in this process on a shared event, across workers by polling
+    the claim. Recent responses are also kept in memory, so retries to the same worker skip the
+    database. Without a database connection (e.g. in scripts) keys are kept in memory only.
+    """
+
+    def __init__(self, ttl_seconds: float, running_seconds: float, wait_seconds: float, cache_size: int) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.running_seconds = running_seconds
+        self.wait_seconds = wait_seconds
+        self.cache: TTLCache[str, StoredResponse] = TTLCache(cache_size, ttl_seconds)
+        self.running: Dict[str, asyncio.Event] = {}  # keys this process is executing
+        self.executed = 0
+        self.replayed = 0
+        self.coalesced = 0
+        self.conflicts = 0
+
+    def _collection(self) -> Optional[AsyncCollection]:
+        return db.collections.idempotency_keys if db.collections is not None else None
+
+    async def begin(self, key: str, fingerprint: str) -> Optional[StoredResponse]:
+        """The stored response for ``key``, or None when the caller now owns it and must run.
+
+        An owner must call ``finish`` or ``abandon``. Raises IdempotencyConflict when the key
+        belongs to a different request and IdempotencyInProgress when the first request did not
+        finish within ``wait_seconds``, in this process or another.
+        """
+        deadline = asyncio.get_running_loop().time() + self.wait_seconds
+        while True:
+            stored = self.cache.get(key)
+            if stored is not None:
+                return self._replay(stored, fingerprint)
+            event = self.running.get(key)
+            if event is None:
+                break
+            self.coalesced += 1
+            try:
+                # Then replay, or run ourselves if the first request gave up
+                await asyncio.wait_for(event.wait(), max(deadline - asyncio.get_running_loop().time(), 0))
+            except asyncio.TimeoutError:
+                raise IdempotencyInProgress()
+
+        self.running[key] = asyncio.Event()
+        try:
+            stored = await self._claim(key, fingerprint)
+        except BaseException:
+            self._done(key)
+            raise
+        if stored is None:
+            self.executed += 1
+            return None
+        self.cache.set(key, stored)
+        self._done(key)
+        return self._replay(stored, fingerprint)
+
+    def _replay(self, stored: StoredResponse, fingerprint: str) -> StoredResponse:
+        if stored.fingerprint != fingerprint:
+            self.conflicts += 1
+            raise IdempotencyConflict()
+        self.replayed += 1
+        return stored
+
+    async def _claim(self, key: str, fingerprint: str) -> Optional[StoredResponse]:
+        collection = self._collection()
+        if collection is None:
+            return None
+        deadline = asyncio.get_running_loop().time() + self.wait_seconds
+        while True:
+            now = datetime.utcnow()
+            claim = {"fingerprint": fingerprint, "state": "running", "expires_at": now + self._running_for()}
+            try:
+                await collection.insert_one({"_id": key, **claim})
+                return None
+            except DuplicateKeyError:
+                pass
+            doc = await collection.find_one({"_id": key})
+            if doc is None:
+                continue  # expired in between
+            if doc["expires_at"] <= now:
+                # A stored response past its TTL, or a claim whose worker went away: take it over
+                taken = await collection.find_one_and_update(
+                    {"_id": key, "expires_at": doc["expires_at"]},
+                    {"$set": claim, "$unset": {"status": "", "headers": "", "body": ""}},
+                )
+                if taken is not None:
+                    return None
+                continue
+            if doc["state"] == "done":
+                headers = [(name, value) for name, value in doc["headers"]]
+                return StoredResponse(doc["fingerprint"], doc["status"], headers, bytes(doc["body"]))
+            if doc["fingerprint"] != fingerprint:
+                self.conflicts += 1
+                raise IdempotencyConflict()
+            if asyncio.get_running_loop().time() >= deadline:
+                raise IdempotencyInProgress()
+            await asyncio.sleep(POLL_SECONDS)
+
+    def _running_for(self) -> timedelta:
+        return timedelta(seconds=self.running_seconds)
+
+    async def finish(self, key: str, response: Optional[StoredResponse]) -> None:
+        """Store the owner's response for retries, or release the key when it is not worth keeping."""
+        if response is None:
+            await self.abandon(key)
+            return
+        self.cache.set(key, response)
+        self._done(key)
+        collection = self._collection()
+        if collection is None:
+            return
+        try:
+            await collection.update_one(
+                {"_id": key},
+                {
+                    "$set": {
+                        "state": "done",
+                        "status": response.status,
+                        "headers": [list(header) for header in response.headers],
+                        "body": response.body,
+                        "expires_at": datetime.utcnow() + timedelta(seconds=self.ttl_seconds),
+                    }
+                },
+            )
+        except Exception as e:
+            logger.warning("Storing idempotent response failed: %s", e)
+
+    async def abandon(self, key: str) -> None:
+        """Release a claimed key without a response, so the next retry runs the request."""
+        self._done(key)
+        collection = self._collection()
+        if collection is None:
+            return
+        try:
+            await collection.delete_one({"_id": key, "state": "running"})
+        except Exception as e:
+            logger.warning("Releasing idempotency key failed: %s", e)
+
+    def _done(self, key: str) -> None:
+        event = self.running.pop(key, None)
+        if event is not None:
+            event.set()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "executed": self.executed,
+            "replayed": self.replayed,
+            "coalesced": self.coalesced,
+            "conflicts": self.conflicts,
+            "running": len(self.running),
+        }
+
+
+idempotency_keys = IdempotencyKeys(
+    settings.IDEMPOTENCY_TTL_SECONDS,
+    settings.IDEMPOTENCY_RUNNING_TIMEOUT_SECONDS,
+    settings.IDEMPOTENCY_WAIT_SECONDS,
+    settings.IDEMPOTENCY_CACHE_SIZE,
+)
+
+
+def _error(status: int, detail: str, headers: Optional[Dict[str, str]] = None) -> JSONResponse:
+    return JSONResponse({"detail": detail}, status_code=status, headers=headers)
+
+
+class IdempotencyMiddleware:
+    """ASGI middleware honouring ``Idempotency-Key`` on booking mutations.
+
+    Keys are scoped to the caller (``identify`` maps a bearer token to its subject), method and
+    path. A retry with the same key and body gets the first response back, marked with
+    ``Idempotent-Replayed: true``; the same key with a different body is a 422. Requests without
+    a key or a valid token pass straight through.
+    """
+
+    def __init__(self, app, identify: Callable[[str], Optional[str]], keys: IdempotencyKeys = idempotency_keys) -> None:
+        self.app = app
+        self.identify = identify
+        self.keys = keys
+
+    def _key_and_subject(self, scope) -> Tuple[Optional[str], Optional[str]]:
+        key = subject = None
+        for name, value in scope["headers"]:
+            if name == b"idempotency-key":
+                key = value.decode("latin-1").strip()
+            elif name == b"authorization":
+                scheme, _, token = value.decode("latin-1").partition(" ")
+                subject = self.identify(token) if scheme.lower() == "bearer" and token else None
+        return key, subject
+
+    async def __call__(self, scope, receive, send) -> None:
+        if (
+            scope["type"] != "http"
+            or scope["method"] not in IDEMPOTENT_METHODS
+            or not scope["path"].startswith(IDEMPOTENT_PATHS)
+        ):
+            await self.app(scope, receive, send)
+            return
+        key, subject = self._key_and_subject(scope)
+        if key is None or subject is None:
+            await self.app(scope, receive, send)
+            return
+        if not key or len(key) > MAX_KEY_LENGTH:
+            await _error(400, f"Idempotency-Key must be 1-{MAX_KEY_LENGTH} characters")(scope, receive, send)
+            return
+
+        body = b""
+        more_body = True
+        while more_body:
+            message = await receive()
+            if message["type"] != "http.request":
+                return  # client went away
+            body += message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+        method, path = scope["method"], scope["path"]
+        fingerprint = hashlib.blake2b(body, digest_size=16).hexdigest()
+        scoped_key = f"{subject}:{method}:{path}:{key}"
+        try:
+            stored = await self.keys.begin(scoped_key, fingerprint)
+        except IdempotencyConflict:
+            response = _error(422, "Idempotency-Key was already used for a different request")
+            await response(scope, receive, send)
+            return
+        except IdempotencyInProgress:
+            response = _error(409, "A request with this Idempotency-Key is still running", {"Retry-After": "1"})
+            await response(scope, receive, send)
+            return
+        if stored is not None:
+            headers = [(name.encode("latin-1"), value.encode("latin-1")) for name, value in stored.headers]
+            headers.append((b"idempotent-replayed", b"true"))
+            await send({"type": "http.response.start", "status": stored.status, "headers": headers})
+            await send({"type": "http.response.body", "body": stored.body})
+            return
+
+        body_sent = False
+
+        async def replay_body():
+            nonlocal body_sent
+            if not body_sent:
+                body_sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        status = 500
+        response_headers: List[Tuple[str, str]] = []
+        chunks: List[bytes] = []
+
+        async def capture(message) -> None:
+            nonlocal status, response_headers
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                response_headers = [(n.decode("latin-1"), v.decode("latin-1")) for n, v in message["headers"]]
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, replay_body, capture)
+        except BaseException:
+            await self.keys.abandon(scoped_key)
+            raise
+        keep = status < 500 and status not in TRANSIENT_STATUSES
+        await self.keys.finish(
+            scoped_key, StoredResponse(fingerprint, status, response_headers, b"".join(chunks)) if keep else None
+        )
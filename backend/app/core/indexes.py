@@ -0,0 +1,130 @@
+import logging
+from typing import Dict, List
+
+from pymongo import ASCENDING, IndexModel
+from pymongo.asynchronous.database import AsyncDatabase
+from pymongo.collation import Collation
+from pymongo.errors import OperationFailure
+
+logger = logging.getLogger(__name__)
+
+# Case-insensitive comparison; queries must pass the same collation to use the *_ci indexes.
+CASE_INSENSITIVE = Collation(locale="en", strength=2)
+
+# Indexes backing the hot query paths, keyed by collection name.
+INDEXES: Dict[str, List[IndexModel]] = {
+    "bookings": [
+        # One booking per user is enforced here rather than with a find_one pre-check
+        IndexModel([("user_id", ASCENDING)], name="user_id_unique", unique=True),
+        IndexModel([("day_id", ASCENDING)], name="day_id"),
+        IndexModel([("booking_id", ASCENDING)], name="booking_id_unique", unique=True),
+        # Admin listing: keyset pagination and incremental sync
+        IndexModel([("created_at", ASCENDING), ("booking_id", ASCENDING)], name="created_at_booking_id"),
+        IndexModel([("updated_at", ASCENDING)], name="updated_at"),
+    ],
+    "users": [
+        IndexModel([("google_id", ASCENDING)], name="google_id_unique", unique=True),
+        IndexModel([("user_id", ASCENDING)], name="user_id_unique", unique=True),
+        IndexModel([("email", ASCENDING)], name="email"),
+        # Admin search by email/name prefix
+        IndexModel([("email", ASCENDING)], name="email_ci", collation=CASE_INSENSITIVE),
+        IndexModel([("name", ASCENDING)], name="name_ci", collation=CASE_INSENSITIVE),
+    ],
+    "days": [
+        IndexModel([("day_id", ASCENDING)], name="day_id_unique", unique=True),
+        # Sorting by date and keyset pagination of the admin listing
+        IndexModel([("date", ASCENDING), ("day_id", ASCENDING)], name="date_day_id"),
+    ],
+    "festivals": [
+        IndexModel([("festival_id", ASCENDING)], name="festival_id"),
+    ],
+    "idempotency_keys": [
+        # Stored responses and abandoned claims are removed by MongoDB once expires_at passes
+        IndexModel([("expires_at", ASCENDING)], name="expires_at_ttl", expireAfterSeconds=0),
+    ],
+    "waitlist": [
+        # One entry per ticket number, so a promotion and a late join cannot both claim one
+        IndexModel([("day_id", ASCENDING), ("seq", ASCENDING)], name="day_id_seq_unique", unique=True),
+        # One place in line per user
+        IndexModel(
+            [("user_id", ASCENDING)],
+            name="user_id_waiting_unique",
+            unique=True,
+            partialFilterExpression={"status": "waiting"},
+        ),
+        # Position lookups count the people who left ahead of a ticket
+        IndexModel([("day_id", ASCENDING), ("status", ASCENDING), ("seq", ASCENDING)], name="day_id_status_seq"),
+        # "Skipped" tombstones are removed by MongoDB once expires_at passes
+        IndexModel([("expires_at", ASCENDING)], name="expires_at_ttl", expireAfterSeconds=0),
+    ],
+}
+
+
+# Indexes that correctness depends on, not just speed. The app refuses to start without them.
+REQUIRED_INDEXES: Dict[str, List[str]] = {
+    # One booking per user: no code path checks before inserting
+    "bookings": ["user_id_unique"],
+    # Ticket numbers claimed by exactly one entry, and one place in line per user: the waitlist
+    # finds both kinds of collision only through DuplicateKeyError
+    "waitlist": ["day_id_seq_unique", "user_id_waiting_unique"],
+}
+
+
+class MissingRequiredIndex(RuntimeError):
+    """A REQUIRED_INDEXES index does not exist, or lacks the uniqueness or filter it is declared with."""
+
+
+async def check_required_indexes(database: AsyncDatabase) -> None:
+    """Raise MissingRequiredIndex unless every REQUIRED_INDEXES index exists as declared."""
+    for collection_name, names in REQUIRED_INDEXES.items():
+        declared = {model.document["name"]: model.document for model in INDEXES[collection_name]}
+        existing = {index["name"]: index async for index in await database[collection_name].list_indexes()}
+        for name in names:
+            index = existing.get(name)
+            expected = declared[name]
+            if (
+                index is None
+                or (expected.get("unique") and not index.get("unique"))
+                or index.get("partialFilterExpression") != expected.get("partialFilterExpression")
+            ):
+                raise MissingRequiredIndex(
+                    f"Index {collection_name}.{name} is missing or not as declared; create it (MONGODB_ENSURE_INDEXES=true "
+                    "creates it at startup, after any duplicate data blocking it is removed)"
+                )
+
+
+async def ensure_indexes(database: AsyncDatabase) -> Dict[str, Dict[str, List[str]]]:
+    """Create any declared index that is missing and report indexes nobody declared.
+
+    Safe to run on every startup: existing indexes are left untouched. Returns a report of
+    ``{collection: {"created": [...], "extra": [...], "failed": [...]}}``.
+    """
+    report: Dict[str, Dict[str, List[str]]] = {}
+    for collection_name, models in INDEXES.items():
+        collection = database[collection_name]
+        existing = {index["name"] async for index in await collection.list_indexes()}
+        declared = {model.document["name"] for model in models}
+
+        created: List[str] = []
+        failed: List[str] = []
+        for model in models:
+            name = model.document["name"]
+            if name in existing:
+                continue
+            try:
+                await collection.create_indexes([model])
+                created.append(name)
+            except OperationFailure as e:
+                # e.g. duplicate data blocking a unique index; surfaced here, fatal for REQUIRED_INDEXES
+                failed.append(f"{name}: {e}")
+
+        extra = sorted(existing - declared - {"_id_"})
+        report[collection_name] = {"created": created, "extra": extra, "failed": failed}
+
+        for name in created:
+            logger.info("Created index %s.%s", collection_name, name)
+        for name in extra:
+            logger.warning("Extra index %s.%s is not declared in app.core.indexes", collection_name, name)
+        for message in failed:
+            logger.error("Failed to create index %s.%s", collection_name, message)
+    return report
@@ -0,0 +1,229 @@
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple, TypeVar, Union
+
+from pymongo import monitoring
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+ROUND_TRIP_BUCKETS = (0, 1, 2, 3, 4, 6, 8, 12, 16, 32, 64)
+
+Labels = Tuple[str, ...]
+M = TypeVar("M", bound="Metric")
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+
+    def samples(self) -> Iterator[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}", *self.samples()]
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, help, labelnames)
+        self.values: Dict[Labels, float] = {} if self.labelnames else {(): 0.0}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        self.values[labels] = self.values.get(labels, 0.0) + amount
+
+    def samples(self) -> Iterator[str]:
+        for labels, value in self.values.items():
+            yield f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}"
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *labels: str, amount: float = 1.0) -> None:
+        self.inc(*labels, amount=-amount)
+
+
+class Histogram(Metric):
+    """Cumulative-bucket histogram; one bucket list, sum and count per label combination."""
+
+    kind = "histogram"
+
+    def __init__(
+        self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS
+    ) -> None:
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(buckets)
+        self.series: Dict[Labels, List[float]] = {}  # per-bucket counts (+Inf last), then sum
+
+    def observe(self, value: float, *labels: str) -> None:
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = [0.0] * (len(self.buckets) + 2)
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def samples(self) -> Iterator[str]:
+        for labels, series in self.series.items():
+            cumulative = 0.0
+            for bound, count in zip((*self.buckets, "+Inf"), series):
+                cumulative += count
+                le = f'le="{bound if bound == "+Inf" else _number(bound)}"'
+                yield f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {_number(cumulative)}"
+            yield f"{self.name}_sum{_labels(self.labelnames, labels)} {_number(series[-1])}"
+            yield f"{self.name}_count{_labels(self.labelnames, labels)} {_number(cumulative)}"
+
+
+class CallbackMetric(Metric):
+    """Read at scrape time from ``read``, which returns a value or ``{label values: value}``."""
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        read: Callable[[], Union[float, Dict[Labels, float]]],
+        labelnames: Sequence[str] = (),
+        kind: str = "gauge",
+    ) -> None:
+        super().__init__(name, help, labelnames)
+        self.read = read
+        self.kind = kind  # "counter" for totals kept elsewhere, e.g. cache hits
+
+    def samples(self) -> Iterator[str]:
+        value = self.read()
+        values = value if isinstance(value, dict) else {(): value}
+        for labels, sample in values.items():
+            yield f"{self.name}{_labels(self.labelnames, labels)} {_number(sample)}"
+
+
+class Registry:
+    def __init__(self) -> None:
+        self.metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: M) -> M:
+        self.metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        return "\n".join(metric.render() for metric in self.metrics.values()) + "\n"
+
+
+registry = Registry()
+
+http_requests = registry.register(
+    Counter("http_requests_total", "HTTP requests by route and status.", ("method", "route", "status"))
+)
+http_latency = registry.register(
+    Histogram("http_request_duration_seconds", "Time to handle a request, by route.", ("method", "route"))
+)
+http_in_progress = registry.register(Gauge("http_requests_in_progress", "Requests being handled."))
+request_round_trips = registry.register(
+    Histogram(
+        "http_request_db_round_trips", "MongoDB commands sent per request.", ("method", "route"), ROUND_TRIP_BUCKETS
+    )
+)
+request_db_time = registry.register(
+    Histogram("http_request_db_seconds", "Time spent in MongoDB commands per request.", ("method", "route"))
+)
+db_commands = registry.register(
+    Histogram("mongodb_command_duration_seconds", "MongoDB command latency, by command.", ("command", "outcome"))
+)
+
+
+class RequestStats:
+    __slots__ = ("round_trips", "db_seconds")
+
+    def __init__(self) -> None:
+        self.round_trips = 0
+        self.db_seconds = 0.0
+
+
+# The request being handled by the current task, if any; commands are charged to it
+_current_request: ContextVar[Optional[RequestStats]] = ContextVar("current_request", default=None)
+
+
+class CommandMetrics(monitoring.CommandListener):
+    """pymongo command listener feeding ``mongodb_command_duration_seconds`` and the per-request counts."""
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        pass
+
+    def _finished(self, event, outcome: str) -> None:
+        seconds = event.duration_micros / 1_000_000
+        db_commands.observe(seconds, event.command_name, outcome)
+        stats = _current_request.get()
+        if stats is not None:
+            stats.round_trips += 1
+            stats.db_seconds += seconds
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        self._finished(event, "success")
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        self._finished(event, "failure")
+
+
+command_metrics = CommandMetrics()
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency, status and MongoDB usage per route.
+
+    Routes are labelled by their path template (``/api/v1/admin/days/{day_id}``), so the label
+    set stays bounded; requests that match no route are counted as ``unmatched``.
+    """
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        stats = RequestStats()
+        token = _current_request.set(stats)
+
+        async def send_wrapper(message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        http_in_progress.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            http_in_progress.dec()
+            _current_request.reset(token)
+            route = scope.get("route")
+            labels = (scope["method"], getattr(route, "path", "unmatched"))
+            http_requests.inc(*labels, str(status))
+            http_latency.observe(elapsed, *labels)
+            request_round_trips.observe(stats.round_trips, *labels)
+            request_db_time.observe(stats.db_seconds, *labels)
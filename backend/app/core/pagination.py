@@ -0,0 +1,69 @@
+import base64
+from typing import Any, Dict, List, Optional, Sequence
+
+from bson import json_util
+from fastapi import HTTPException
+from pymongo.asynchronous.collection import AsyncCollection
+
+
+def encode_cursor(document: dict, keys: Sequence[str]) -> str:
+    """Opaque cursor pointing just past ``document`` in a listing sorted by ``keys``."""
+    raw = json_util.dumps([document.get(key) for key in keys])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, keys: Sequence[str]) -> List[Any]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json_util.loads(raw)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(values, list) or len(values) != len(keys):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
+
+
+def keyset_filter(keys: Sequence[str], values: Sequence[Any]) -> dict:
+    """Documents sorting strictly after ``values`` in ascending ``keys`` order."""
+    clauses = []
+    for i, key in enumerate(keys):
+        clause: Dict[str, Any] = {k: v for k, v in zip(keys[:i], values[:i])}
+        clause[key] = {"$gt": values[i]}
+        clauses.append(clause)
+    return {"$or": clauses}
+
+
+def parse_fields(fields: Optional[str], allowed: Sequence[str], required: Sequence[str]) -> Optional[dict]:
+    """Projection for a comma-separated ``fields=`` parameter.
+
+    ``required`` fields (the sort keys) are always included so the next cursor can be built.
+    Returns None when no fields were requested, meaning every field except ``_id``.
+    """
+    if not fields:
+        return None
+    requested = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = sorted(set(requested) - set(allowed))
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    return {"_id": 0, **{f: 1 for f in [*required, *requested]}}
+
+
+async def keyset_page(
+    collection: AsyncCollection,
+    query: dict,
+    keys: Sequence[str],
+    limit: int,
+    after: Optional[str] = None,
+    projection: Optional[dict] = None,
+) -> dict:
+    """One page of ``collection`` sorted by ``keys``, as ``{"items", "next_after"}``.
+
+    Pages are found by seeking past the last key of the previous page, so deep pages cost the
+    same as the first one when an index on ``keys`` exists.
+    """
+    if after:
+        query = {"$and": [query, keyset_filter(keys, decode_cursor(after, keys))]}
+    cursor = collection.find(query, projection or {"_id": 0}).sort([(key, 1) for key in keys]).limit(limit + 1)
+    items = await cursor.to_list()
+    next_after = encode_cursor(items[limit - 1], keys) if len(items) > limit else None
+    return {"items": items[:limit], "next_after": next_after}
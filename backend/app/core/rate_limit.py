@@ -0,0 +1,127 @@
+import math
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from app.core.config import settings
+from app.core.metrics import Counter, registry
+from starlette.responses import JSONResponse
+
+rate_limited = registry.register(
+    Counter("http_rate_limited_total", "Requests answered 429 by the rate limiter, by budget.", ("budget",))
+)
+
+
+class Budget(NamedTuple):
+    rate: float  # tokens added per second
+    burst: int  # bucket size: requests allowed back to back after a quiet spell
+
+
+class TokenBuckets:
+    """Token buckets by key, refilled lazily when touched, for the event loop thread.
+
+    Each bucket is ``[tokens, last update]``. A bucket idle long enough to have refilled is the
+    same as no bucket, so when ``max_keys`` is reached the full ones are dropped first.
+    """
+
+    def __init__(self, max_keys: int, clock: Callable[[], float] = time.monotonic) -> None:
+        self.max_keys = max_keys
+        self._clock = clock
+        self._buckets: Dict[str, List[float]] = {}
+
+    def take(self, key: str, rate: float, burst: int) -> float:
+        """Take a token. Returns 0.0 when one was available, else the seconds until there is one."""
+        now = self._clock()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            if len(self._buckets) >= self.max_keys:
+                self._prune(now, rate, burst)
+            self._buckets[key] = [burst - 1.0, now]
+            return 0.0
+        tokens = min(burst, bucket[0] + (now - bucket[1]) * rate)
+        bucket[1] = now
+        if tokens >= 1.0:
+            bucket[0] = tokens - 1.0
+            return 0.0
+        bucket[0] = tokens
+        return (1.0 - tokens) / rate
+
+    def _prune(self, now: float, rate: float, burst: int) -> None:
+        # Buckets refill to full within burst / rate seconds of their last use
+        idle = burst / rate
+        self._buckets = {key: bucket for key, bucket in self._buckets.items() if now - bucket[1] < idle}
+        if len(self._buckets) >= self.max_keys:
+            self._buckets.clear()  # everyone is busy: start over rather than grow without bound
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+def budgets_from_settings() -> Dict[str, Budget]:
+    return {
+        "public": Budget(settings.RATE_LIMIT_PUBLIC_RATE, settings.RATE_LIMIT_PUBLIC_BURST),
+        "bookings": Budget(settings.RATE_LIMIT_BOOKINGS_RATE, settings.RATE_LIMIT_BOOKINGS_BURST),
+        "admin": Budget(settings.RATE_LIMIT_ADMIN_RATE, settings.RATE_LIMIT_ADMIN_BURST),
+    }
+
+
+# Path prefix -> budget; anything else is "public"
+ROUTER_BUDGETS: Sequence[Tuple[str, str]] = (("/api/v1/bookings", "bookings"), ("/api/v1/admin", "admin"))
+EXEMPT_PATHS = frozenset({"/health", "/metrics"})
+
+
+class RateLimitMiddleware:
+    """ASGI middleware answering ``429`` with ``Retry-After`` once a caller's budget is spent.
+
+    Callers are the token subject when the request carries a valid bearer token (``identify``
+    maps a token to its subject, or None) and the client address otherwise. Each router has its
+    own budget, so admin work never eats into booking attempts. Buckets live wherever ``backend``
+    keeps them: in-process for one worker, in Redis when workers share a coordination backend.
+    """
+
+    def __init__(
+        self,
+        app,
+        backend,
+        identify: Callable[[str], Optional[str]],
+        budgets: Optional[Dict[str, Budget]] = None,
+    ) -> None:
+        self.app = app
+        self.backend = backend
+        self.identify = identify
+        self.budgets = budgets or budgets_from_settings()
+
+    def caller(self, scope) -> str:
+        for name, value in scope["headers"]:
+            if name == b"authorization":
+                scheme, _, token = value.decode("latin-1").partition(" ")
+                subject = self.identify(token) if scheme.lower() == "bearer" and token else None
+                if subject is not None:
+                    return "user:" + subject
+                break
+        client = scope.get("client")
+        return "ip:" + (client[0] if client else "unknown")
+
+    async def __call__(self, scope, receive, send) -> None:
+        path = scope.get("path", "") if scope["type"] == "http" else ""
+        if not path or path in EXEMPT_PATHS or scope["method"] == "OPTIONS":
+            await self.app(scope, receive, send)
+            return
+
+        name = "public"
+        for prefix, budget_name in ROUTER_BUDGETS:
+            if path.startswith(prefix):
+                name = budget_name
+                break
+        budget = self.budgets[name]
+        wait = await self.backend.take_token(f"{name}:{self.caller(scope)}", budget.rate, budget.burst)
+        if not wait:
+            await self.app(scope, receive, send)
+            return
+
+        rate_limited.inc(name)
+        response = JSONResponse(
+            {"detail": "Too many requests, please slow down"},
+            status_code=429,
+            headers={"Retry-After": str(max(1, math.ceil(wait)))},
+        )
+        await response(scope, receive, send)
@@ -1,23 +1,64 @@
+import asyncio
 from contextlib import asynccontextmanager
 
 from app.api.admin import router as admin_router
 from app.api.auth import router as auth_router
+from app.api.auth import token_subject
 from app.api.bookings import router as bookings_router
 from app.api.festival import router as festival_router
+from app.api.metrics import router as metrics_router
 from app.api.users import router as users_router
 from app.core.config import settings
-from app.core.database import close_mongo_connection, connect_to_mongo
+from app.core.coordination import coordination
+from app.core.database import close_mongo_connection, connect_to_mongo, get_collections
+from app.core.http_client import http_client
+from app.core.idempotency import IdempotencyMiddleware
+from app.core.indexes import check_required_indexes, ensure_indexes
+from app.core.log import configure_logging
+from app.core.metrics import MetricsMiddleware
+from app.core.rate_limit import RateLimitMiddleware
+from app.services.auth import auth_service
+from app.services.availability import availability_broker
+from app.services.email import email_service
+from app.services.reference_data import reference_data
+from app.services.tickets import ticket_service
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    connect_to_mongo()
+    configure_logging()
+    await coordination.start()
+    await http_client.start()
+    await connect_to_mongo()
+    collections = get_collections()
+    if settings.GOOGLE_TOKEN_VERIFICATION == "local":
+        auth_service.google_keys.start()
+    email_service.start()
+
+    async def start_availability() -> None:
+        # Days from before the seat counter get theirs first, so availability starts from real counts
+        await ticket_service.backfill_tickets_sold(collections.days, collections.bookings)
+        await availability_broker.start(collections.days)
+
+    # Independent round trips, so a new instance only waits for the slowest one
+    startup = [start_availability(), reference_data.start(collections)]
+    if settings.MONGODB_ENSURE_INDEXES:
+        startup.append(ensure_indexes(collections.database))
+    await asyncio.gather(*startup)
+    # Built above, or by whoever manages the indexes; either way the app cannot run without them
+    await check_required_indexes(collections.database)
     try:
         yield
     finally:
-        close_mongo_connection()
+        await reference_data.stop()
+        await availability_broker.stop()
+        await email_service.stop()
+        await auth_service.google_keys.stop()
+        await close_mongo_connection()
+        await http_client.stop()
+        await coordination.stop()
 
 
 app = FastAPI(
@@ -28,6 +69,12 @@ app = FastAPI(
 )
 
 
+# Middleware added last runs first: metrics see every response, CORS headers go on 429s too,
+# and a replayed booking response still costs the caller a rate-limit token
+app.add_middleware(IdempotencyMiddleware, identify=token_subject)
+if settings.RATE_LIMIT_ENABLED:
+    app.add_middleware(RateLimitMiddleware, backend=coordination, identify=token_subject)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -36,6 +83,8 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
 
 # Include routers
 app.include_router(festival_router)
@@ -43,6 +92,8 @@ app.include_router(auth_router)
 app.include_router(bookings_router)
 app.include_router(admin_router)
 app.include_router(users_router)
+if settings.METRICS_ENABLED:
+    app.include_router(metrics_router)
 
 
 @app.get("/")
@@ -1,8 +1,16 @@
 from datetime import datetime
+from typing import List, Optional
 
 from pydantic import BaseModel, Field
 
 
+class SeatHold(BaseModel):
+    hold_id: str
+    user_id: Optional[str] = None  # None for holds placed before signing in
+    client: Optional[str] = None  # hash of the client address, for holds placed before signing in
+    expires_at: datetime
+
+
 class Day(BaseModel):
     day_id: str  # Our own ID field for business logic
     festival_id: str
@@ -11,6 +19,9 @@ class Day(BaseModel):
     menu: str
     tickets_sold: int = 0
     capacity: int = 6
+    holds: List[SeatHold] = []  # seats kept for checkouts in progress, see TicketService
+    waitlist_issued: int = 0  # waitlist tickets handed out, see TicketService
+    waitlist_promoted: int = 0  # waitlist tickets served or passed over
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
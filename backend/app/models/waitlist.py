@@ -0,0 +1,17 @@
+from datetime import datetime
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+
+class WaitlistEntry(BaseModel):
+    day_id: str
+    seq: int  # ticket number, from Day.waitlist_issued; served in this order
+    user_id: Optional[str] = None  # None for tombstones of tickets passed over, see WaitlistService
+    status: str = "waiting"  # "waiting", "left", "skipped"
+    joined_at: datetime = Field(default_factory=datetime.utcnow)
+    expires_at: Optional[datetime] = None  # set on "skipped" tombstones, removed by a TTL index
+    seated: bool = False  # handed a seat but not booked yet, after a database error; see WaitlistService
+
+    class Config:
+        json_encoders = {datetime: lambda v: v.isoformat()}
@@ -0,0 +1,139 @@
+import asyncio
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Deque, Dict, Optional, Set
+
+from app.core.config import settings
+from app.services.availability import availability_broker
+
+
+class AdmissionRejected(Exception):
+    """The waiting room is full, or the wait ran out. Try again after ``retry_after`` seconds."""
+
+    def __init__(self, reason: str, retry_after: int) -> None:
+        super().__init__(reason)
+        self.retry_after = retry_after
+
+
+class AlreadyQueued(Exception):
+    """The user already has a booking attempt waiting or running."""
+
+
+class Ticket:
+    __slots__ = ("number", "admitted")
+
+    def __init__(self, number: int) -> None:
+        self.number = number
+        self.admitted: asyncio.Future = asyncio.get_running_loop().create_future()
+
+
+class AdmissionControl:
+    """Waiting room in front of booking attempts, for the rush when bookings open.
+
+    At most ``max_active`` attempts run against MongoDB at once; the rest wait in arrival order,
+    up to ``max_waiting`` of them for at most ``max_wait_seconds``. Days the availability broker
+    reports as full are answered without a queue slot or a database call (``sold_out``).
+    Queues are per worker process.
+    """
+
+    def __init__(self, max_active: int, max_waiting: int, max_wait_seconds: float) -> None:
+        self.max_active = max_active
+        self.max_waiting = max_waiting
+        self.max_wait_seconds = max_wait_seconds
+        self.active = 0
+        self.queued = 0  # tickets still waiting; the deque may also hold ones whose request gave up
+        self.waiting: Deque[Ticket] = deque()
+        self.tickets: Dict[str, Ticket] = {}  # waiting tickets by user_id
+        self.users: Set[str] = set()  # users with an attempt waiting or running
+        self.issued = 0
+        self.admitted = 0
+        self.sold_out_answers = 0
+        self.rejected = 0
+        self.timed_out = 0
+
+    def sold_out(self, day_id: str) -> bool:
+        """True when the day is known to be full. Unknown days go to the database (for the 404)."""
+        entry = availability_broker.days.get(day_id) if availability_broker.source != "stopped" else None
+        if entry is None or entry["available"] > 0:
+            return False
+        self.sold_out_answers += 1
+        return True
+
+    def position(self, user_id: str) -> Optional[int]:
+        """Place in the queue (1 is next), 0 while the attempt runs, None without an attempt.
+
+        Counted from the head ticket, so requests ahead that gave up still count: an upper bound.
+        """
+        if user_id not in self.users:
+            return None
+        ticket = self.tickets.get(user_id)
+        if ticket is None or ticket.admitted.done():
+            return 0
+        return ticket.number - self.waiting[0].number + 1
+
+    @asynccontextmanager
+    async def slot(self, user_id: str) -> AsyncIterator[None]:
+        """Hold one of the ``max_active`` booking slots, queueing for it first if needed."""
+        if user_id in self.users:
+            raise AlreadyQueued()
+        if self.active < self.max_active and not self.queued:
+            self.active += 1
+            self.users.add(user_id)
+        else:
+            await self._wait(user_id)
+        self.admitted += 1
+        try:
+            yield
+        finally:
+            self.users.discard(user_id)
+            self._release()
+
+    async def _wait(self, user_id: str) -> None:
+        if self.queued >= self.max_waiting:
+            self.rejected += 1
+            raise AdmissionRejected("Too many people are booking right now, please try again shortly", 5)
+        self.issued += 1
+        ticket = Ticket(self.issued)
+        self.waiting.append(ticket)
+        self.queued += 1
+        self.tickets[user_id] = ticket
+        self.users.add(user_id)
+        try:
+            await asyncio.wait_for(ticket.admitted, self.max_wait_seconds)
+        except BaseException as e:
+            self.users.discard(user_id)
+            if ticket.admitted.cancelled():
+                self.queued -= 1
+            else:
+                self._release()  # admitted just as the request gave up
+            if isinstance(e, asyncio.TimeoutError):
+                self.timed_out += 1
+                raise AdmissionRejected("Still queued, please try again", 1) from None
+            raise
+        finally:
+            del self.tickets[user_id]
+
+    def _release(self) -> None:
+        self.active -= 1
+        while self.waiting and self.active < self.max_active:
+            ticket = self.waiting.popleft()
+            if not ticket.admitted.done():  # skip requests that gave up while queued
+                self.queued -= 1
+                self.active += 1
+                ticket.admitted.set_result(None)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "active": self.active,
+            "waiting": self.queued,
+            "issued": self.issued,
+            "admitted": self.admitted,
+            "sold_out_answers": self.sold_out_answers,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+        }
+
+
+admission = AdmissionControl(
+    settings.ADMISSION_MAX_ACTIVE, settings.ADMISSION_MAX_WAITING, settings.ADMISSION_MAX_WAIT_SECONDS
+)
@@ -1,32 +1,69 @@
 import uuid
 from datetime import datetime, timedelta
+from typing import Optional
 
-import httpx
 from app.core.config import settings
 from app.core.database import get_database
+from app.core.http_client import HttpClient, UpstreamUnavailable, http_client
 from app.models.user import User
+from app.services.google_keys import GOOGLE_ISSUERS, GoogleKeyCache, HttpKeySource, KeySource
 from jose import JWTError, jwt
+from pymongo.asynchronous.collection import AsyncCollection
 
 
 class AuthService:
-    def __init__(self):
+    def __init__(self, google_key_source: Optional[KeySource] = None, http: Optional[HttpClient] = None):
         self.google_client_id = settings.GOOGLE_CLIENT_ID
         self.google_client_secret = settings.GOOGLE_CLIENT_SECRET
         self.jwt_secret = settings.JWT_SECRET_KEY
         self.jwt_algorithm = settings.JWT_ALGORITHM
         self.access_token_expire_minutes = settings.ACCESS_TOKEN_EXPIRE_MINUTES
+        self.google_token_verification = settings.GOOGLE_TOKEN_VERIFICATION
+        self.google_tokeninfo_url = settings.GOOGLE_TOKENINFO_URL
+        self.http = http or http_client
+        self.google_keys = GoogleKeyCache(google_key_source or HttpKeySource(settings.GOOGLE_JWKS_URL, self.http))
 
     async def verify_google_token(self, token: str) -> dict:
         """Verify Google ID token and return user info"""
+        if self.google_token_verification == "tokeninfo":
+            return await self._verify_google_token_remote(token)
+        return await self._verify_google_token_local(token)
+
+    async def _verify_google_token_local(self, token: str) -> dict:
+        """Check the token's signature, audience, issuer and expiry against Google's cached keys"""
+        if not self.google_client_id:
+            raise ValueError("Error verifying Google token: GOOGLE_CLIENT_ID is not configured")
+        try:
+            kid = jwt.get_unverified_header(token).get("kid")
+            key = await self.google_keys.get_key(kid) if kid else None
+            if key is None:
+                raise ValueError("unknown signing key")
+            return jwt.decode(
+                token,
+                key,
+                algorithms=["RS256"],
+                audience=self.google_client_id,
+                issuer=GOOGLE_ISSUERS,
+                options={"verify_at_hash": False},
+            )
+        except UpstreamUnavailable:
+            raise
+        except Exception as e:
+            raise ValueError(f"Error verifying Google token: {str(e)}")
+
+    async def _verify_google_token_remote(self, token: str) -> dict:
+        """Ask Google's tokeninfo endpoint to verify the token"""
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(f"https://oauth2.googleapis.com/tokeninfo?id_token={token}")
-                if response.status_code == 200:
-                    return response.json()
-                else:
-                    raise ValueError("Invalid Google token")
+            response = await self.http.get(self.google_tokeninfo_url, params={"id_token": token})
+        except UpstreamUnavailable:
+            raise
         except Exception as e:
             raise ValueError(f"Error verifying Google token: {str(e)}")
+        if response.status_code >= 500:
+            raise UpstreamUnavailable(f"Google tokeninfo answered {response.status_code}")
+        if response.status_code != 200:
+            raise ValueError("Error verifying Google token: Invalid Google token")
+        return response.json()
 
     def create_access_token(self, data: dict) -> str:
         """Create JWT access token"""
@@ -44,20 +81,14 @@ class AuthService:
         except JWTError:
             raise ValueError("Invalid token")
 
-    async def get_or_create_user(self, google_user_info: dict) -> User:
+    async def get_or_create_user(self, google_user_info: dict, users_collection: AsyncCollection) -> User:
         """Get existing user or create new user from Google info"""
-        db = get_database()
-        if not db:
-            raise ValueError("Database connection not available")
-
-        users_collection = db[settings.DATABASE_NAME].users
-
         # Check if user exists
-        existing_user = users_collection.find_one({"google_id": google_user_info["sub"]})
+        existing_user = await users_collection.find_one({"google_id": google_user_info["sub"]})
 
         if existing_user:
             # Update last login
-            users_collection.update_one(
+            await users_collection.update_one(
                 {"google_id": google_user_info["sub"]}, {"$set": {"updated_at": datetime.utcnow()}}
             )
             return User(**existing_user)
@@ -74,7 +105,7 @@ class AuthService:
                 updated_at=datetime.utcnow(),
             )
 
-            users_collection.insert_one(new_user.model_dump())
+            await users_collection.insert_one(new_user.model_dump())
             return new_user
 
     def get_database(self):
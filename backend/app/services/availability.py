@@ -0,0 +1,244 @@
+import asyncio
+import logging
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Sequence, Set
+
+from app.core.config import settings
+from app.core.coordination import coordination
+from pymongo.asynchronous.change_stream import AsyncChangeStream
+from pymongo.asynchronous.collection import AsyncCollection
+from pymongo.errors import OperationFailure, PyMongoError
+
+logger = logging.getLogger(__name__)
+
+_DAY_FIELDS = {
+    "_id": 0,
+    "day_id": 1,
+    "date": 1,
+    "tickets_sold": 1,
+    "capacity": 1,
+    "holds": 1,
+    "waitlist_issued": 1,
+    "waitlist_promoted": 1,
+}
+
+
+def hold_expiries(day: dict, now: datetime) -> List[datetime]:
+    """When the day's live seat holds run out, soonest first."""
+    return sorted(hold["expires_at"] for hold in day.get("holds") or () if hold["expires_at"] > now)
+
+
+def day_availability(day: dict, now: Optional[datetime] = None) -> dict:
+    capacity = day.get("capacity", 6)
+    tickets_sold = day.get("tickets_sold", 0)
+    held = len(hold_expiries(day, now or datetime.utcnow()))
+    # Tickets not yet promoted, including those of people who left the line since
+    waitlist = max(day.get("waitlist_issued", 0) - day.get("waitlist_promoted", 0), 0)
+    date = day.get("date")
+    return {
+        "day_id": day["day_id"],
+        "date": date.date().isoformat() if isinstance(date, datetime) else date,
+        "tickets_sold": tickets_sold,
+        "held": held,
+        "waitlist": waitlist,
+        "capacity": capacity,
+        # Free seats go to the waitlist first, so they are not on sale while anyone is on it
+        "available": 0 if waitlist else max(capacity - tickets_sold - held, 0),
+    }
+
+
+class Subscriber:
+    """One live listener.
+
+    Keeps at most one pending entry per day (newer state replaces older), so an idle or slow
+    client costs a small dict and an event no matter how many changes it has not read yet.
+    """
+
+    __slots__ = ("pending", "wakeup")
+
+    def __init__(self) -> None:
+        self.pending: Dict[str, dict] = {}
+        self.wakeup = asyncio.Event()
+
+    def push(self, entry: dict) -> None:
+        self.pending[entry["day_id"]] = entry
+        self.wakeup.set()
+
+    async def next_changes(self, timeout: float) -> List[dict]:
+        """Wait up to ``timeout`` seconds for changes. Returns [] on timeout."""
+        if not self.pending:
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                return []
+        self.wakeup.clear()
+        changes = list(self.pending.values())
+        self.pending.clear()
+        return changes
+
+
+class AvailabilityBroker:
+    """Current per-day availability, fanned out to live subscribers when it changes.
+
+    Changes come from a change stream on the days collection when MongoDB supports one (replica
+    set / Atlas), which also covers bookings made by other workers. Otherwise the API calls
+    ``notify`` after every seat change, and workers pass those on through the coordination backend.
+
+    A seat hold running out is not a write, so nothing reports it: the broker keeps each day's
+    hold expiry times and republishes the day itself when the next one passes. If that frees a
+    seat while people are on the day's waitlist, the ``seats_freed`` callbacks are told, so the
+    seat goes to the line.
+    """
+
+    def __init__(self) -> None:
+        self.days: Dict[str, dict] = {}
+        self.hold_expiries: Dict[str, List[datetime]] = {}
+        self._hold_timers: Dict[str, asyncio.TimerHandle] = {}
+        self.subscribers: Set[Subscriber] = set()
+        self.seats_freed: List[Callable[[str], None]] = []
+        self.source = "stopped"  # "change_stream", "local" or "stopped"
+        self.published = 0
+        self._watcher: Optional[asyncio.Task] = None
+
+    async def load(self, days: AsyncCollection) -> None:
+        """Replace the current state with the days collection, publishing any differences."""
+        now = datetime.utcnow()
+        current = {day["day_id"]: day async for day in days.find({}, _DAY_FIELDS)}
+        for day_id in set(self.days) - set(current):
+            self._remove(day_id)
+        for day in current.values():
+            self._publish(day_availability(day, now), hold_expiries(day, now))
+
+    async def start(self, days: AsyncCollection) -> None:
+        if self.source != "stopped":
+            return
+        await self.load(days)
+        self.source = "local"
+        if settings.AVAILABILITY_SOURCE != "auto":
+            return
+        try:
+            stream = await days.watch(full_document="updateLookup")
+        except OperationFailure as e:
+            # Standalone mongod: change streams need a replica set
+            logger.info("Change streams unavailable, publishing availability in-process: %s", e)
+            return
+        self.source = "change_stream"
+        self._watcher = asyncio.create_task(self._follow(stream, days))
+
+    async def stop(self) -> None:
+        if self._watcher is not None:
+            self._watcher.cancel()
+            await asyncio.gather(self._watcher, return_exceptions=True)
+            self._watcher = None
+        for timer in self._hold_timers.values():
+            timer.cancel()
+        self._hold_timers.clear()
+        self.source = "stopped"
+
+    async def _follow(self, stream: AsyncChangeStream, days: AsyncCollection) -> None:
+        try:
+            async with stream:
+                async for change in stream:
+                    document = change.get("fullDocument")
+                    if document is not None:
+                        now = datetime.utcnow()
+                        self._publish(day_availability(document, now), hold_expiries(document, now))
+                    else:
+                        # Deletes only carry the _id, so resync
+                        await self.load(days)
+        except PyMongoError as e:
+            logger.warning("Availability change stream stopped, publishing in-process: %s", e)
+            self.source = "local"
+            self._watcher = None
+            await self.load(days)
+
+    # Publishing
+    def notify(self, day: dict) -> None:
+        """Report a day document written by this process (ignored while a change stream is followed)."""
+        if self.source != "change_stream":
+            now = datetime.utcnow()
+            entry, expiries = day_availability(day, now), hold_expiries(day, now)
+            self._publish(entry, expiries)
+            coordination.publish_nowait("availability", {"entry": entry, "hold_expiries": expiries})
+
+    def remove(self, day_id: str) -> None:
+        if self.source != "change_stream":
+            coordination.publish_nowait("availability", {"removed_day_id": day_id})
+        self._remove(day_id)
+
+    def _remote_change(self, message: dict) -> None:
+        """A seat change reported by another worker."""
+        if self.source == "change_stream":
+            return
+        if "entry" in message:
+            self._publish(message["entry"], message.get("hold_expiries", []))
+        else:
+            self._remove(message["removed_day_id"])
+
+    def _remove(self, day_id: str) -> None:
+        self._track_holds(day_id, [])
+        if self.days.pop(day_id, None) is not None:
+            self._fan_out({"day_id": day_id, "removed": True})
+
+    def _publish(self, entry: dict, expiries: Sequence[datetime] = ()) -> None:
+        self._track_holds(entry["day_id"], expiries)
+        if self.days.get(entry["day_id"]) == entry:
+            return
+        self.days[entry["day_id"]] = entry
+        self._fan_out(entry)
+
+    def _track_holds(self, day_id: str, expiries: Sequence[datetime]) -> None:
+        timer = self._hold_timers.pop(day_id, None)
+        if timer is not None:
+            timer.cancel()
+        if not expiries:
+            self.hold_expiries.pop(day_id, None)
+            return
+        self.hold_expiries[day_id] = list(expiries)
+        delay = (expiries[0] - datetime.utcnow()).total_seconds()
+        self._hold_timers[day_id] = asyncio.get_running_loop().call_later(max(delay, 0.0), self._holds_expired, day_id)
+
+    def _holds_expired(self, day_id: str) -> None:
+        self._hold_timers.pop(day_id, None)
+        entry = self.days.get(day_id)
+        if entry is None:
+            return
+        expiries = [expiry for expiry in self.hold_expiries.get(day_id, []) if expiry > datetime.utcnow()]
+        held = len(expiries)
+        free = max(entry["capacity"] - entry["tickets_sold"] - held, 0)
+        self._publish({**entry, "held": held, "available": 0 if entry["waitlist"] else free}, expiries)
+        if free and entry["waitlist"]:
+            for callback in self.seats_freed:
+                callback(day_id)
+
+    def _fan_out(self, entry: dict) -> None:
+        self.published += 1
+        for subscriber in self.subscribers:
+            subscriber.push(entry)
+
+    # Subscribing
+    def accepting(self) -> bool:
+        return len(self.subscribers) < settings.AVAILABILITY_MAX_SUBSCRIBERS
+
+    def subscribe(self) -> Subscriber:
+        subscriber = Subscriber()
+        self.subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        self.subscribers.discard(subscriber)
+
+    def snapshot(self) -> List[dict]:
+        return sorted(self.days.values(), key=lambda entry: str(entry["date"]))
+
+    def stats(self) -> Dict:
+        return {
+            "source": self.source,
+            "subscribers": len(self.subscribers),
+            "days": len(self.days),
+            "published": self.published,
+        }
+
+
+availability_broker = AvailabilityBroker()
+coordination.subscribe("availability", availability_broker._remote_change)
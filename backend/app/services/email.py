@@ -1,12 +1,111 @@
 from __future__ import annotations
 
+import asyncio
+import json
+import logging
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
 from pathlib import Path
-from typing import Dict, Optional
+from typing import TYPE_CHECKING, Any, Deque, Dict, List, Optional, Tuple
 
-import boto3
+from app.core.cache import TTLCache
 from app.core.config import settings
-from botocore.client import BaseClient
-from jinja2 import Environment, FileSystemLoader, select_autoescape
+from app.core.coordination import coordination
+from app.models.user import User
+from markupsafe import Markup, escape
+
+if TYPE_CHECKING:
+    from botocore.client import BaseClient
+    from jinja2 import Environment
+
+logger = logging.getLogger(__name__)
+
+# Email kind -> (template, subject)
+EMAIL_TEMPLATES: Dict[str, tuple] = {
+    "booking_confirmation": ("emails/booking_confirmation.html", "Your booking is confirmed – Food & Friends"),
+    "booking_update": ("emails/booking_update.html", "Your booking was updated – Food & Friends"),
+    "booking_cancellation": ("emails/booking_cancellation.html", "Your booking was cancelled – Food & Friends"),
+    "waitlist_promotion": (
+        "emails/waitlist_promotion.html",
+        "A seat opened up, your booking is confirmed – Food & Friends",
+    ),
+    "announcement": ("emails/announcement.html", "News from Food & Friends"),
+}
+
+# Context fields that differ per recipient. Templates must output them verbatim ({{ user_name }}), which
+# lets a render be cached for the shared (day/festival) part and only these fields filled in per guest.
+PERSONAL_FIELDS = ("user_name",)
+_FIELD_MARK = "\x00"
+
+# Name of the shared queue when the coordination backend is shared between workers
+EMAIL_QUEUE_NAME = "email"
+
+
+def booking_email_context(user: User, day: dict, festival: dict) -> dict:
+    day_date = day.get("date")
+    return {
+        "user_name": user.name,
+        "day_theme": day.get("theme", ""),
+        "booking_date": day_date.strftime("%B %d, %Y") if isinstance(day_date, datetime) else str(day_date),
+        "price": str(festival.get("price", "50")),
+        "location": festival.get("location", "Guldbergsgade 51A, 4. tv., 2200 København N"),
+    }
+
+
+@dataclass
+class EmailMessage:
+    kind: str
+    to_address: str
+    context: Dict
+    attempts: int = 0
+    last_error: Optional[str] = None
+
+
+@dataclass
+class BulkRecipient:
+    to_address: str
+    context: Dict = field(default_factory=dict)
+
+
+@dataclass
+class BulkSendResult:
+    rendered: int
+    results: List[Dict]
+
+    @property
+    def sent(self) -> int:
+        return sum(1 for r in self.results if r["status"] == "sent")
+
+    @property
+    def failed(self) -> int:
+        return sum(1 for r in self.results if r["status"] == "failed")
+
+
+class _SendRateLimiter:
+    """Spaces calls at least 1/rate seconds apart (no limit when rate <= 0)."""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next_slot = 0.0
+
+    async def wait(self) -> None:
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        slot = max(now, self._next_slot)
+        self._next_slot = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+@dataclass
+class EmailQueueStats:
+    enqueued: int = 0
+    sent: int = 0
+    retried: int = 0
+    dead_lettered: int = 0
+    rejected: int = 0
 
 
 class EmailService:
@@ -14,28 +113,108 @@ class EmailService:
 
     Sending is gated by EMAIL_ENABLE_SENDING. When disabled, renders and returns
     the HTML so callers can log or test without attempting delivery.
+
+    Request handlers should use ``enqueue``: messages go into a bounded queue that a pool of
+    background workers (started from the app lifespan) drains, retrying failed sends with
+    exponential backoff and parking messages that keep failing in a dead-letter list. With a
+    shared coordination backend, ``enqueue`` pushes to a queue every worker process feeds from.
     """
 
-    def __init__(self) -> None:
+    def __init__(self, ses_client: Optional[BaseClient] = None) -> None:
         self.templates_dir = Path(__file__).resolve().parents[1] / "templates"
-        self.jinja_env = Environment(
-            loader=FileSystemLoader(str(self.templates_dir)),
-            autoescape=select_autoescape(["html", "xml"]),
-            enable_async=False,
+        # boto3 and Jinja take a while to import, so both are set up on first use (see warm_up)
+        self._jinja_env: Optional[Environment] = None
+        self._ses_client: Optional[BaseClient] = ses_client
+        self._client_lock = threading.Lock()
+        # (template, shared context) -> rendered HTML split around the personal fields
+        self.render_cache: TTLCache[tuple, List[str]] = TTLCache(
+            settings.EMAIL_RENDER_CACHE_SIZE, settings.EMAIL_RENDER_CACHE_TTL_SECONDS
         )
+        self._render_lock = threading.Lock()
+
+        self.queue: Optional[asyncio.Queue[EmailMessage]] = None
+        self.dead_letters: Deque[EmailMessage] = deque(maxlen=settings.EMAIL_DEAD_LETTER_MAX)
+        self.stats = EmailQueueStats()
+        self._workers: List[asyncio.Task] = []
+        self._feeder: Optional[asyncio.Task] = None
+        # id(message) -> (timer, message) for messages waiting out their backoff
+        self._retries: Dict[int, Tuple[asyncio.TimerHandle, EmailMessage]] = {}
+        self._in_flight = 0
+        self._warmup: Optional[asyncio.Task] = None
+
+    @property
+    def jinja_env(self) -> Environment:
+        if self._jinja_env is None:
+            with self._client_lock:
+                if self._jinja_env is None:
+                    from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, select_autoescape
+
+                    self._jinja_env = Environment(
+                        loader=FileSystemLoader(str(self.templates_dir)),
+                        autoescape=select_autoescape(["html", "xml"]),
+                        enable_async=False,
+                        bytecode_cache=(
+                            FileSystemBytecodeCache(settings.EMAIL_TEMPLATE_BYTECODE_DIR)
+                            if settings.EMAIL_TEMPLATE_BYTECODE_DIR
+                            else None
+                        ),
+                    )
+        return self._jinja_env
+
+    @property
+    def ses_client(self) -> Optional[BaseClient]:
+        """The SES client, or None when sending is disabled or AWS credentials are missing."""
+        if self._ses_client is None and (
+            settings.EMAIL_ENABLE_SENDING and settings.AWS_ACCESS_KEY_ID and settings.AWS_SECRET_ACCESS_KEY
+        ):
+            with self._client_lock:
+                if self._ses_client is None:
+                    import boto3
+
+                    self._ses_client = boto3.client(
+                        "ses",
+                        aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
+                        aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
+                        region_name=settings.AWS_REGION,
+                    )
+        return self._ses_client
+
+    def warm_up(self) -> None:
+        """Create the SES client and compile the templates, so the first send doesn't pay for it."""
+        try:
+            self.ses_client
+            self.precompile_templates()
+        except Exception as e:
+            logger.warning("Email warm-up failed, will retry on first send: %s", e)
 
-        self.ses_client: Optional[BaseClient] = None
-        if settings.EMAIL_ENABLE_SENDING and settings.AWS_ACCESS_KEY_ID and settings.AWS_SECRET_ACCESS_KEY:
-            self.ses_client = boto3.client(
-                "ses",
-                aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-                aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-                region_name=settings.AWS_REGION,
-            )
+    def precompile_templates(self) -> None:
+        """Compile every email template up front so the first send doesn't pay for it."""
+        for template_name, _ in EMAIL_TEMPLATES.values():
+            self.jinja_env.get_template(template_name)
 
     def _render(self, template_name: str, context: Dict) -> str:
-        template = self.jinja_env.get_template(template_name)
-        return template.render(**context)
+        personal = {k: context[k] for k in PERSONAL_FIELDS if k in context}
+        if not all(personal.values()):
+            # Falsy values may take a different branch in the template, so render those directly
+            return self.jinja_env.get_template(template_name).render(**context)
+
+        shared = {k: v for k, v in context.items() if k not in personal}
+        try:
+            key = (template_name, frozenset(shared.items()), frozenset(personal))
+            hash(key)
+        except TypeError:
+            key = (template_name, json.dumps(shared, sort_keys=True, default=str), frozenset(personal))
+        with self._render_lock:
+            parts = self.render_cache.get(key)
+        if parts is None:
+            placeholders = {k: Markup(f"{_FIELD_MARK}{k}{_FIELD_MARK}") for k in personal}
+            html = self.jinja_env.get_template(template_name).render(**shared, **placeholders)
+            parts = html.split(_FIELD_MARK)
+            with self._render_lock:
+                self.render_cache.set(key, parts)
+
+        # Even positions are template output, odd positions name a personal field
+        return "".join(part if i % 2 == 0 else str(escape(personal[part])) for i, part in enumerate(parts))
 
     def _send_html_email(self, to_address: str, subject: str, html: str) -> Dict:
         if not self.ses_client:
@@ -64,21 +243,229 @@ class EmailService:
 
         return self.ses_client.send_email(**kwargs)  # type: ignore[arg-type]
 
+    def send(self, kind: str, to_address: str, context: Dict) -> Dict:
+        """Render and send one email synchronously (blocks on SES)."""
+        template_name, subject = EMAIL_TEMPLATES[kind]
+        html = self._render(template_name, context)
+        return self._send_html_email(to_address, subject, html)
+
     # Public API
     def send_booking_confirmation(self, to_address: str, context: Dict) -> Dict:
-        html = self._render("emails/booking_confirmation.html", context)
-        subject = "Your booking is confirmed – Food & Friends"
-        return self._send_html_email(to_address, subject, html)
+        return self.send("booking_confirmation", to_address, context)
 
     def send_booking_update(self, to_address: str, context: Dict) -> Dict:
-        html = self._render("emails/booking_update.html", context)
-        subject = "Your booking was updated – Food & Friends"
-        return self._send_html_email(to_address, subject, html)
+        return self.send("booking_update", to_address, context)
 
     def send_booking_cancellation(self, to_address: str, context: Dict) -> Dict:
-        html = self._render("emails/booking_cancellation.html", context)
-        subject = "Your booking was cancelled – Food & Friends"
-        return self._send_html_email(to_address, subject, html)
+        return self.send("booking_cancellation", to_address, context)
+
+    def send_waitlist_promotion(self, to_address: str, context: Dict) -> Dict:
+        return self.send("waitlist_promotion", to_address, context)
+
+    async def send_bulk(
+        self,
+        kind: str,
+        recipients: List[BulkRecipient],
+        shared_context: Optional[Dict] = None,
+        subject: Optional[str] = None,
+        dry_run: bool = False,
+    ) -> BulkSendResult:
+        """Send one template to many recipients, respecting the SES send rate.
+
+        The template is rendered once per distinct context (shared context merged with each
+        recipient's own), and messages go out in batches of EMAIL_BULK_BATCH_SIZE with at most
+        EMAIL_BULK_CONCURRENCY sends in flight and no more than EMAIL_MAX_SEND_RATE per second.
+        With ``dry_run`` everything is rendered but nothing is sent.
+        """
+        template_name, default_subject = EMAIL_TEMPLATES[kind]
+        subject = subject or default_subject
+
+        rendered: Dict[str, str] = {}
+        jobs: List[Tuple[str, str]] = []
+        for recipient in recipients:
+            context = {**(shared_context or {}), **recipient.context}
+            key = json.dumps(context, sort_keys=True, default=str)
+            if key not in rendered:
+                rendered[key] = self._render(template_name, {"subject": subject, **context})
+            jobs.append((recipient.to_address, rendered[key]))
+
+        limiter = _SendRateLimiter(settings.EMAIL_MAX_SEND_RATE)
+        semaphore = asyncio.Semaphore(settings.EMAIL_BULK_CONCURRENCY)
+
+        async def deliver(to_address: str, html: str) -> Dict:
+            if dry_run:
+                return {"to_address": to_address, "status": "dry_run", "length": len(html)}
+            async with semaphore:
+                await limiter.wait()
+                try:
+                    response = await asyncio.to_thread(self._send_html_email, to_address, subject, html)
+                except Exception as e:
+                    return {"to_address": to_address, "status": "failed", "error": str(e)}
+            status = "sent" if response.get("Enabled", True) else "dry_run"
+            return {"to_address": to_address, "status": status, "message_id": response.get("MessageId")}
+
+        results: List[Dict] = []
+        batch_size = max(1, settings.EMAIL_BULK_BATCH_SIZE)
+        for start in range(0, len(jobs), batch_size):
+            batch = jobs[start : start + batch_size]
+            results.extend(await asyncio.gather(*[deliver(to_address, html) for to_address, html in batch]))
+        return BulkSendResult(rendered=len(rendered), results=results)
+
+    # Background delivery
+    def enqueue(self, kind: str, to_address: str, context: Dict) -> bool:
+        """Queue an email for the background workers. Returns False if it could not be queued."""
+        if kind not in EMAIL_TEMPLATES:
+            raise ValueError(f"Unknown email kind: {kind}")
+        if self.queue is None:
+            logger.warning("Email queue not running, dropping email", extra={"kind": kind})
+            self.stats.rejected += 1
+            return False
+        if coordination.shared:
+            # Whether the shared queue had room is only known later; _push_shared counts rejections
+            coordination.spawn(self._push_shared({"kind": kind, "to_address": to_address, "context": context}))
+            self.stats.enqueued += 1
+            return True
+        try:
+            self.queue.put_nowait(EmailMessage(kind=kind, to_address=to_address, context=context))
+        except asyncio.QueueFull:
+            logger.warning("Email queue full, dropping email", extra={"kind": kind})
+            self.stats.rejected += 1
+            return False
+        self.stats.enqueued += 1
+        return True
+
+    def start(self, workers: Optional[int] = None) -> None:
+        if self.queue is not None:
+            return
+        self.queue = asyncio.Queue(maxsize=settings.EMAIL_QUEUE_MAX_SIZE)
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(workers or settings.EMAIL_WORKERS)]
+        if coordination.shared:
+            self._feeder = asyncio.create_task(self._feed())
+        # Off the event loop and out of the startup path; a send before it finishes just waits for the lock
+        self._warmup = asyncio.create_task(asyncio.to_thread(self.warm_up))
+
+    async def stop(self, timeout: Optional[float] = None) -> None:
+        """Drain the queue (up to ``timeout`` seconds), then stop the workers.
+
+        Messages still waiting for a retry, or left in the queue when the timeout expires, are
+        moved to the dead-letter list so they are not lost silently.
+        """
+        if self.queue is None:
+            return
+        queue = self.queue
+        timeout = settings.EMAIL_SHUTDOWN_TIMEOUT_SECONDS if timeout is None else timeout
+        if self._warmup is not None:
+            await asyncio.gather(self._warmup, return_exceptions=True)
+            self._warmup = None
+        if self._feeder is not None:
+            # Stop taking shared work; what is left there is sent by the other workers
+            self._feeder.cancel()
+            await asyncio.gather(self._feeder, return_exceptions=True)
+            self._feeder = None
+        for handle, message in self._retries.values():
+            handle.cancel()
+            self._dead_letter(message, "shutdown before retry")
+        self._retries.clear()
+
+        try:
+            await asyncio.wait_for(queue.join(), timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Email queue did not drain within %ss", timeout)
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        while not queue.empty():
+            self._dead_letter(queue.get_nowait(), "shutdown before send")
+        self.queue = None
+
+    def queue_stats(self) -> Dict[str, Any]:
+        return {
+            "running": self.queue is not None,
+            "shared": coordination.shared,
+            "workers": len(self._workers),
+            "depth": self.queue.qsize() if self.queue is not None else 0,
+            "max_size": settings.EMAIL_QUEUE_MAX_SIZE,
+            "in_flight": self._in_flight,
+            "waiting_retry": len(self._retries),
+            "enqueued": self.stats.enqueued,
+            "sent": self.stats.sent,
+            "retried": self.stats.retried,
+            "dead_lettered": self.stats.dead_lettered,
+            "rejected": self.stats.rejected,
+        }
+
+    async def _worker(self) -> None:
+        assert self.queue is not None
+        queue = self.queue
+        while True:
+            message = await queue.get()
+            self._in_flight += 1
+            try:
+                await asyncio.to_thread(self.send, message.kind, message.to_address, message.context)
+                self.stats.sent += 1
+            except Exception as e:
+                message.attempts += 1
+                message.last_error = str(e)
+                self._retry_or_dead_letter(message)
+            finally:
+                self._in_flight -= 1
+                queue.task_done()
+
+    async def _push_shared(self, item: Dict) -> None:
+        try:
+            queued = await coordination.push(EMAIL_QUEUE_NAME, item)
+        except Exception as e:
+            logger.warning("Could not queue email on the shared queue: %s", e, extra={"kind": item["kind"]})
+            queued = False
+        if not queued:
+            logger.warning("Shared email queue full, dropping email", extra={"kind": item["kind"]})
+            self.stats.rejected += 1
+
+    async def _feed(self) -> None:
+        """Move messages from the shared queue into this worker's queue as it has room."""
+        assert self.queue is not None
+        queue = self.queue
+        while True:
+            try:
+                item = await coordination.pop(EMAIL_QUEUE_NAME, timeout=1.0)
+            except Exception as e:
+                logger.warning("Reading the shared email queue failed: %s", e)
+                await asyncio.sleep(1.0)
+                continue
+            if item is None:
+                continue
+            try:
+                await queue.put(EmailMessage(**item))
+            except asyncio.CancelledError:
+                # Stopped while our queue was full: hand the message back to the other workers
+                await coordination.push(EMAIL_QUEUE_NAME, item)
+                raise
+
+    def _retry_or_dead_letter(self, message: EmailMessage) -> None:
+        if message.attempts >= settings.EMAIL_MAX_ATTEMPTS:
+            self._dead_letter(message, message.last_error or "max attempts reached")
+            return
+        delay = min(settings.EMAIL_RETRY_BASE_SECONDS * 2 ** (message.attempts - 1), settings.EMAIL_RETRY_MAX_SECONDS)
+        self.stats.retried += 1
+        handle = asyncio.get_running_loop().call_later(delay, self._requeue, message)
+        self._retries[id(message)] = (handle, message)
+
+    def _requeue(self, message: EmailMessage) -> None:
+        self._retries.pop(id(message), None)
+        if self.queue is None:
+            self._dead_letter(message, "queue stopped before retry")
+            return
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self._dead_letter(message, "queue full on retry")
+
+    def _dead_letter(self, message: EmailMessage, reason: str) -> None:
+        message.last_error = reason
+        self.dead_letters.append(message)
+        self.stats.dead_lettered += 1
+        logger.error("Email dead-lettered: %s", reason, extra={"kind": message.kind, "attempts": message.attempts})
 
 
 email_service = EmailService()
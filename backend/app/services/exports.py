@@ -0,0 +1,124 @@
+import csv
+import io
+import json
+import zlib
+from datetime import datetime
+from typing import AsyncIterator, Dict, List, Optional
+
+from app.core.database import Collections
+
+EXPORT_COLUMNS = ["booking_id", "day_id", "user_name", "user_email", "booking_date", "status"]
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+async def iter_booking_rows(
+    collections: Collections, query: Dict, batch_size: int = 1000
+) -> AsyncIterator[List[Dict[str, str]]]:
+    """Yield export rows in batches, joining only the users referenced by each batch."""
+    cursor = collections.bookings.find(
+        query, {"_id": 0, "booking_id": 1, "day_id": 1, "user_id": 1, "booking_date": 1, "status": 1}
+    ).batch_size(batch_size)
+    batch: List[Dict] = []
+    async for booking in cursor:
+        batch.append(booking)
+        if len(batch) >= batch_size:
+            yield await _join_users(collections, batch)
+            batch = []
+    if batch:
+        yield await _join_users(collections, batch)
+
+
+async def _join_users(collections: Collections, bookings: List[Dict]) -> List[Dict[str, str]]:
+    user_ids = list({b.get("user_id") for b in bookings})
+    user_by_id = {
+        u["user_id"]: u
+        async for u in collections.users.find(
+            {"user_id": {"$in": user_ids}}, {"_id": 0, "user_id": 1, "name": 1, "email": 1}
+        )
+    }
+    rows = []
+    for b in bookings:
+        u = user_by_id.get(b.get("user_id"), {})
+        date_str = b.get("booking_date")
+        if isinstance(date_str, datetime):
+            date_str = date_str.isoformat()
+        rows.append(
+            {
+                "booking_id": str(b.get("booking_id", "")),
+                "day_id": str(b.get("day_id", "")),
+                "user_name": u.get("name", ""),
+                "user_email": u.get("email", ""),
+                "booking_date": str(date_str or ""),
+                "status": b.get("status", ""),
+            }
+        )
+    return rows
+
+
+async def export_csv(batches: AsyncIterator[List[Dict[str, str]]]) -> AsyncIterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_COLUMNS, lineterminator="\n")
+    writer.writeheader()
+    async for rows in batches:
+        writer.writerows(rows)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+async def export_ndjson(batches: AsyncIterator[List[Dict[str, str]]]) -> AsyncIterator[bytes]:
+    async for rows in batches:
+        yield "".join(json.dumps(row, ensure_ascii=False) + "\n" for row in rows).encode()
+
+
+async def export_parquet(batches: AsyncIterator[List[Dict[str, str]]]) -> AsyncIterator[bytes]:
+    """Columnar export; each batch becomes one Parquet row group. Requires pyarrow."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([(column, pa.string()) for column in EXPORT_COLUMNS])
+    sink = io.BytesIO()
+    writer = pq.ParquetWriter(sink, schema)
+    async for rows in batches:
+        writer.write_table(pa.Table.from_pylist(rows, schema=schema))
+        yield _drain(sink)
+    writer.close()
+    yield _drain(sink)
+
+
+def _drain(sink: io.BytesIO) -> bytes:
+    data = sink.getvalue()
+    sink.seek(0)
+    sink.truncate()
+    return data
+
+
+async def gzip_stream(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    compressor = zlib.compressobj(wbits=31)  # gzip container
+    async for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def parquet_available() -> bool:
+    try:
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+EXPORT_WRITERS = {"csv": export_csv, "ndjson": export_ndjson, "parquet": export_parquet}
+
+
+def export_filename(fmt: str, day_id: Optional[str], gzip: bool) -> str:
+    name = f"bookings-{day_id}" if day_id else "bookings"
+    return f"{name}.{fmt}" + (".gz" if gzip else "")
@@ -0,0 +1,129 @@
+import asyncio
+import logging
+import re
+import time
+from typing import Dict, Mapping, Optional, Protocol, Tuple
+
+from app.core.http_client import HttpClient, http_client
+
+logger = logging.getLogger(__name__)
+
+GOOGLE_JWKS_URL = "https://www.googleapis.com/oauth2/v3/certs"
+GOOGLE_ISSUERS = ("accounts.google.com", "https://accounts.google.com")
+
+_MAX_AGE = re.compile(r"max-age=(\d+)")
+
+
+class KeySource(Protocol):
+    async def fetch(self) -> Tuple[Dict, Optional[float]]:
+        """Return the JWK set and how many seconds it may be cached (None if unknown)."""
+        ...
+
+
+class HttpKeySource:
+    """Fetches a JWK set over HTTP and honours the response's Cache-Control max-age."""
+
+    def __init__(self, url: str = GOOGLE_JWKS_URL, http: Optional[HttpClient] = None):
+        self.url = url
+        self.http = http or http_client
+
+    async def fetch(self) -> Tuple[Dict, Optional[float]]:
+        response = await self.http.get(self.url)
+        response.raise_for_status()
+        return response.json(), _cache_lifetime(response.headers)
+
+
+class StaticKeySource:
+    """Serves a fixed JWK set, for tests and local development."""
+
+    def __init__(self, jwks: Dict, max_age: Optional[float] = None):
+        self.jwks = jwks
+        self.max_age = max_age
+
+    async def fetch(self) -> Tuple[Dict, Optional[float]]:
+        return self.jwks, self.max_age
+
+
+def _cache_lifetime(headers: Mapping[str, str]) -> Optional[float]:
+    cache_control = headers.get("cache-control", "")
+    if "no-cache" in cache_control or "no-store" in cache_control:
+        return 0.0
+    match = _MAX_AGE.search(cache_control)
+    if not match:
+        return None
+    age = headers.get("age", "0")
+    return max(0.0, float(match.group(1)) - (float(age) if age.isdigit() else 0.0))
+
+
+class GoogleKeyCache:
+    """Google's ID-token signing keys, cached in memory and refreshed in the background.
+
+    Keys are looked up by ``kid``. An unknown ``kid`` (Google rotated its keys before our
+    copy expired) triggers an immediate refresh, throttled to one per ``min_refresh_seconds``.
+    """
+
+    def __init__(
+        self,
+        source: KeySource,
+        default_ttl_seconds: float = 3600.0,
+        min_refresh_seconds: float = 60.0,
+        retry_seconds: float = 30.0,
+    ):
+        self.source = source
+        self.default_ttl_seconds = default_ttl_seconds
+        self.min_refresh_seconds = min_refresh_seconds
+        self.retry_seconds = retry_seconds
+        self._keys: Dict[str, Dict] = {}
+        self._expires_at = 0.0
+        self._last_refresh = float("-inf")
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    async def refresh(self) -> None:
+        async with self._lock:
+            await self._load()
+
+    async def get_key(self, kid: str) -> Optional[Dict]:
+        if self._needs_refresh(kid):
+            async with self._lock:
+                # Another request may have refreshed while we waited for the lock
+                if self._needs_refresh(kid):
+                    await self._load()
+        return self._keys.get(kid)
+
+    def _needs_refresh(self, kid: str) -> bool:
+        now = time.monotonic()
+        if now >= self._expires_at:
+            return True
+        return kid not in self._keys and now - self._last_refresh >= self.min_refresh_seconds
+
+    async def _load(self) -> None:
+        jwks, max_age = await self.source.fetch()
+        now = time.monotonic()
+        self._keys = {key["kid"]: key for key in jwks.get("keys", []) if "kid" in key}
+        ttl = self.default_ttl_seconds if max_age is None else max_age
+        self._expires_at = now + max(ttl, self.min_refresh_seconds)
+        self._last_refresh = now
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            try:
+                await self.refresh()
+                delay = max(self._expires_at - time.monotonic(), self.min_refresh_seconds)
+            except Exception as e:
+                logger.warning("Refreshing Google signing keys failed: %s", e)
+                delay = self.retry_seconds
+            await asyncio.sleep(delay)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -0,0 +1,120 @@
+import asyncio
+import logging
+from typing import Dict, Optional
+
+from app.core.config import settings
+from app.core.coordination import coordination
+from app.core.database import Collections
+from pymongo.asynchronous.collection import AsyncCollection
+
+logger = logging.getLogger(__name__)
+
+# Seat counters and holds change with every booking; read them from the database, never from here
+_COUNTERS = ("tickets_sold", "holds", "waitlist_issued", "waitlist_promoted")
+_DAY_FIELDS = {"_id": 0, **{field: 0 for field in _COUNTERS}}
+_FESTIVAL_FIELDS = {"_id": 0}
+
+
+def _without_counters(day: dict) -> dict:
+    return {key: value for key, value in day.items() if key != "_id" and key not in _COUNTERS}
+
+
+class ReferenceDataCache:
+    """In-memory copy of the days (by ``day_id``) and festivals (by ``festival_id``).
+
+    Both collections are tiny and change only through the admin endpoints, which write through
+    to this cache. A background reload every REFERENCE_DATA_REFRESH_SECONDS picks up edits made
+    on other workers or directly in the database. Misses fall back to the database.
+    """
+
+    def __init__(self) -> None:
+        self.days: Dict[str, dict] = {}
+        self.festivals: Dict[str, dict] = {}
+        self.hits = 0
+        self.misses = 0
+        self._task: Optional[asyncio.Task] = None
+
+    async def load(self, collections: Collections) -> None:
+        days = {day["day_id"]: day async for day in collections.days.find({}, _DAY_FIELDS)}
+        festivals = {
+            festival["festival_id"]: festival async for festival in collections.festivals.find({}, _FESTIVAL_FIELDS)
+        }
+        self.days, self.festivals = days, festivals
+
+    async def get_day(self, days: AsyncCollection, day_id: str) -> Optional[dict]:
+        day = self.days.get(day_id)
+        if day is not None:
+            self.hits += 1
+            return day
+        self.misses += 1
+        day = await days.find_one({"day_id": day_id}, _DAY_FIELDS)
+        if day is not None:
+            self.days[day_id] = day
+        return day
+
+    async def get_festival(self, festivals: AsyncCollection, festival_id: str) -> Optional[dict]:
+        festival = self.festivals.get(festival_id)
+        if festival is not None:
+            self.hits += 1
+            return festival
+        self.misses += 1
+        festival = await festivals.find_one({"festival_id": festival_id}, _FESTIVAL_FIELDS)
+        if festival is not None:
+            self.festivals[festival_id] = festival
+        return festival
+
+    # Write-through from the admin endpoints, shared with the other workers
+    def store_day(self, day: dict) -> None:
+        self._apply({"day": _without_counters(day)}, publish=True)
+
+    def remove_day(self, day_id: str) -> None:
+        self._apply({"removed_day_id": day_id}, publish=True)
+
+    def store_festival(self, festival: dict) -> None:
+        self._apply({"festival": {k: v for k, v in festival.items() if k != "_id"}}, publish=True)
+
+    def _apply(self, message: dict, publish: bool = False) -> None:
+        if "day" in message:
+            self.days[message["day"]["day_id"]] = message["day"]
+        if "removed_day_id" in message:
+            self.days.pop(message["removed_day_id"], None)
+        if "festival" in message:
+            self.festivals[message["festival"]["festival_id"]] = message["festival"]
+        if publish:
+            coordination.publish_nowait("reference-data", message)
+
+    async def _refresh_loop(self, collections: Collections) -> None:
+        while True:
+            await asyncio.sleep(settings.REFERENCE_DATA_REFRESH_SECONDS)
+            try:
+                await self.load(collections)
+            except Exception as e:
+                logger.warning("Reloading days and festivals failed: %s", e)
+
+    async def start(self, collections: Collections) -> None:
+        await self.load(collections)
+        if self._task is None:
+            self._task = asyncio.create_task(self._refresh_loop(collections))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "days": len(self.days),
+            "festivals": len(self.festivals),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+reference_data = ReferenceDataCache()
+coordination.subscribe("reference-data", reference_data._apply)
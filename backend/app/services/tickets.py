@@ -0,0 +1,272 @@
+from datetime import datetime, timedelta
+from typing import Optional
+
+from app.services.availability import availability_broker
+from pymongo import ReturnDocument
+from pymongo.asynchronous.collection import AsyncCollection
+
+_COUNT_BY_DAY = [{"$group": {"_id": "$day_id", "count": {"$sum": 1}}}]
+# Days from before the seat counter have no tickets_sold until backfill_tickets_sold gives them
+# one; seats are never taken on them meanwhile, as a missing counter would read as nothing sold
+COUNTED = {"tickets_sold": {"$exists": True}}
+
+
+def active_holds_expr(now: datetime) -> dict:
+    """The day's holds that have not expired by ``now``, as an aggregation expression."""
+    return {
+        "$filter": {"input": {"$ifNull": ["$holds", []]}, "as": "hold", "cond": {"$gt": ["$$hold.expires_at", now]}}
+    }
+
+
+def client_holds_expr(now: datetime, client: str) -> dict:
+    """The live holds placed by ``client`` before signing in, as an aggregation expression."""
+    return {"$filter": {"input": active_holds_expr(now), "as": "hold", "cond": {"$eq": ["$$hold.client", client]}}}
+
+
+def seats_taken_expr(now: datetime) -> dict:
+    """Seats sold plus seats held, as an aggregation expression."""
+    return {"$add": [{"$ifNull": ["$tickets_sold", 0]}, {"$size": active_holds_expr(now)}]}
+
+
+# Waitlist tickets issued and promoted so far; the line is empty once every issued one is promoted
+_ISSUED = {"$ifNull": ["$waitlist_issued", 0]}
+_PROMOTED = {"$ifNull": ["$waitlist_promoted", 0]}
+WAITLIST_EMPTY_EXPR = {"$lte": [_ISSUED, _PROMOTED]}
+WAITLIST_WAITING_EXPR = {"$gt": [_ISSUED, _PROMOTED]}
+
+
+class TicketService:
+    """Keeps ``Day.tickets_sold`` in step with bookings, and seat holds within capacity.
+
+    Seats are taken with a single conditional update on the day document, so the capacity check
+    and the reservation happen atomically on the database and concurrent requests can never
+    oversell a day.
+
+    A hold (``Day.holds``: ``hold_id``, ``user_id`` or None, ``expires_at``) keeps a seat for
+    someone still checking out. Holds live on the day document they count against, so every
+    capacity check sees them, and an expired one frees its seat at once: checks only count holds
+    that have not expired, and taking or holding a seat pulls expired ones out as it goes. Nothing
+    has to sweep the collection.
+
+    Once a day has a waitlist (``waitlist_issued`` tickets handed out, the first
+    ``waitlist_promoted`` of them served), its free seats belong to the line: reserving and
+    holding refuse while anyone waits, and a released seat passes to the next ticket in the same
+    write that frees it. Each ticket number is handed out by exactly one write, so concurrent
+    releases can never promote the same ticket twice. ``WaitlistService`` turns the ticket into a
+    booking.
+    """
+
+    async def reserve_seat(self, days: AsyncCollection, day_id: str) -> Optional[dict]:
+        """Take one seat on a day. Returns the updated day, or None if it is missing or full."""
+        now = datetime.utcnow()
+        day = await days.find_one_and_update(
+            {
+                "day_id": day_id,
+                **COUNTED,
+                "$expr": {"$and": [{"$lt": [seats_taken_expr(now), "$capacity"]}, WAITLIST_EMPTY_EXPR]},
+            },
+            {
+                "$inc": {"tickets_sold": 1},
+                "$pull": {"holds": {"expires_at": {"$lte": now}}},
+                "$set": {"updated_at": now},
+            },
+            return_document=ReturnDocument.AFTER,
+        )
+        if day is not None:
+            availability_broker.notify(day)
+        return day
+
+    async def release_seat(self, days: AsyncCollection, day_id: str) -> Optional[int]:
+        """Give back a seat previously taken with reserve_seat.
+
+        With people on the waitlist the seat stays sold and goes to the next ticket instead: its
+        number is returned for ``WaitlistService.promote``. None means the seat was freed.
+        """
+        now = datetime.utcnow()
+        day = await days.find_one_and_update(
+            {"day_id": day_id, "tickets_sold": {"$gt": 0}},
+            # Pipeline update: both fields see the counters as they were before this write
+            [
+                {
+                    "$set": {
+                        "tickets_sold": {
+                            "$cond": [WAITLIST_WAITING_EXPR, "$tickets_sold", {"$subtract": ["$tickets_sold", 1]}]
+                        },
+                        "waitlist_promoted": {"$cond": [WAITLIST_WAITING_EXPR, {"$add": [_PROMOTED, 1]}, _PROMOTED]},
+                        "updated_at": now,
+                    }
+                }
+            ],
+            return_document=ReturnDocument.BEFORE,
+        )
+        if day is None:
+            return None
+        ticket = None
+        if day.get("waitlist_issued", 0) > day.get("waitlist_promoted", 0):
+            ticket = day.get("waitlist_promoted", 0) + 1
+            day = {**day, "waitlist_promoted": ticket, "updated_at": now}
+        else:
+            day = {**day, "tickets_sold": day["tickets_sold"] - 1, "updated_at": now}
+        availability_broker.notify(day)
+        return ticket
+
+    async def fill_seat(self, days: AsyncCollection, day_id: str) -> Optional[int]:
+        """Give a free seat to the next waitlist ticket. Returns its number, or None.
+
+        Seats end up free while people wait when a hold expires, or when a seat was freed just
+        as someone joined; release_seat covers every other case.
+        """
+        now = datetime.utcnow()
+        day = await days.find_one_and_update(
+            {
+                "day_id": day_id,
+                **COUNTED,
+                "$expr": {"$and": [{"$lt": [seats_taken_expr(now), "$capacity"]}, WAITLIST_WAITING_EXPR]},
+            },
+            {
+                "$inc": {"tickets_sold": 1, "waitlist_promoted": 1},
+                "$pull": {"holds": {"expires_at": {"$lte": now}}},
+                "$set": {"updated_at": now},
+            },
+            return_document=ReturnDocument.AFTER,
+        )
+        if day is None:
+            return None
+        availability_broker.notify(day)
+        return day["waitlist_promoted"]
+
+    async def issue_waitlist_ticket(self, days: AsyncCollection, day_id: str) -> Optional[int]:
+        """Hand out the day's next waitlist ticket number, or None if the day is missing."""
+        day = await days.find_one_and_update(
+            {"day_id": day_id},
+            {"$inc": {"waitlist_issued": 1}, "$set": {"updated_at": datetime.utcnow()}},
+            return_document=ReturnDocument.AFTER,
+        )
+        if day is None:
+            return None
+        availability_broker.notify(day)
+        return day["waitlist_issued"]
+
+    async def hold_seat(
+        self,
+        days: AsyncCollection,
+        day_id: str,
+        hold_id: str,
+        user_id: Optional[str],
+        ttl_seconds: float,
+        client: Optional[str] = None,
+        client_limit: int = 1,
+    ) -> Optional[dict]:
+        """Hold a seat on a day for ``ttl_seconds``. Returns the updated day, or None.
+
+        Holds before sign-in (no ``user_id``) are counted per ``client``: at most ``client_limit``
+        live ones on the day. None means the day is missing or full (or has a waitlist), already
+        holds a seat for ``user_id``, or ``client`` is at its limit.
+        """
+        now = datetime.utcnow()
+        conditions = [{"$lt": [seats_taken_expr(now), "$capacity"]}, WAITLIST_EMPTY_EXPR]
+        if user_id is not None:
+            holders = {"$map": {"input": active_holds_expr(now), "as": "hold", "in": "$$hold.user_id"}}
+            conditions.append({"$not": {"$in": [user_id, holders]}})
+        elif client is not None:
+            conditions.append({"$lt": [{"$size": client_holds_expr(now, client)}, client_limit]})
+        hold = {
+            "hold_id": hold_id,
+            "user_id": user_id,
+            "client": None if user_id is not None else client,
+            "expires_at": now + timedelta(seconds=ttl_seconds),
+        }
+        day = await days.find_one_and_update(
+            {"day_id": day_id, **COUNTED, "$expr": {"$and": conditions}},
+            # Pipeline update: drop expired holds and add the new one in the same write
+            [{"$set": {"holds": {"$concatArrays": [active_holds_expr(now), [hold]]}, "updated_at": now}}],
+            return_document=ReturnDocument.AFTER,
+        )
+        if day is not None:
+            availability_broker.notify(day)
+        return day
+
+    async def convert_hold(self, days: AsyncCollection, day_id: str, hold_id: str, user_id: str) -> Optional[dict]:
+        """Turn a live hold into a sold seat in one write. Returns the updated day, or None.
+
+        None means the hold is unknown or expired, or was placed by someone else.
+        """
+        now = datetime.utcnow()
+        day = await days.find_one_and_update(
+            {
+                "day_id": day_id,
+                "holds": {
+                    "$elemMatch": {"hold_id": hold_id, "user_id": {"$in": [None, user_id]}, "expires_at": {"$gt": now}}
+                },
+            },
+            {
+                "$inc": {"tickets_sold": 1},
+                "$pull": {"holds": {"hold_id": hold_id}},
+                "$set": {"updated_at": now},
+            },
+            return_document=ReturnDocument.AFTER,
+        )
+        if day is not None:
+            availability_broker.notify(day)
+        return day
+
+    async def release_hold(self, days: AsyncCollection, hold_id: str) -> Optional[dict]:
+        """Give back a held seat before it expires. Returns the updated day, or None if not held."""
+        day = await days.find_one_and_update(
+            {"holds.hold_id": hold_id},
+            {"$pull": {"holds": {"hold_id": hold_id}}, "$set": {"updated_at": datetime.utcnow()}},
+            return_document=ReturnDocument.AFTER,
+        )
+        if day is not None:
+            availability_broker.notify(day)
+        return day
+
+    async def release_user_holds(self, days: AsyncCollection, user_id: str, except_day_id: str) -> Optional[dict]:
+        """Drop the user's holds on other days, so one person holds one seat at a time.
+
+        Returns the updated day a hold was dropped from, or None.
+        """
+        day = await days.find_one_and_update(
+            {"holds.user_id": user_id, "day_id": {"$ne": except_day_id}},
+            {"$pull": {"holds": {"user_id": user_id}}, "$set": {"updated_at": datetime.utcnow()}},
+            return_document=ReturnDocument.AFTER,
+        )
+        if day is not None:
+            availability_broker.notify(day)
+        return day
+
+    async def backfill_tickets_sold(self, days: AsyncCollection, bookings: AsyncCollection) -> int:
+        """Give days without a counter one, counted from their bookings. Returns days changed.
+
+        Safe while serving, unlike sync_tickets_sold: seats are not taken on these days until
+        they have a counter, and one already set is never overwritten.
+        """
+        missing = [day["day_id"] async for day in days.find({"tickets_sold": {"$exists": False}}, {"day_id": 1})]
+        if not missing:
+            return 0
+        pipeline = [{"$match": {"day_id": {"$in": missing}}}, *_COUNT_BY_DAY]
+        counts = {row["_id"]: row["count"] async for row in await bookings.aggregate(pipeline)}
+        changed = 0
+        for day_id in missing:
+            result = await days.update_one(
+                {"day_id": day_id, "tickets_sold": {"$exists": False}},
+                {"$set": {"tickets_sold": counts.get(day_id, 0), "updated_at": datetime.utcnow()}},
+            )
+            changed += result.modified_count
+        return changed
+
+    async def sync_tickets_sold(self, days: AsyncCollection, bookings: AsyncCollection) -> int:
+        """Recompute every day's counter from the bookings collection. Returns days changed."""
+        counts = {row["_id"]: row["count"] async for row in await bookings.aggregate(_COUNT_BY_DAY)}
+        changed = 0
+        async for day in days.find({}, {"day_id": 1, "tickets_sold": 1}):
+            sold = counts.get(day["day_id"], 0)
+            if day.get("tickets_sold") != sold:
+                await days.update_one(
+                    {"_id": day["_id"]}, {"$set": {"tickets_sold": sold, "updated_at": datetime.utcnow()}}
+                )
+                changed += 1
+        return changed
+
+
+ticket_service = TicketService()
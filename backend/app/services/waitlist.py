@@ -0,0 +1,266 @@
+import asyncio
+import logging
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Set
+
+from app.core.config import settings
+from app.core.database import Collections, db
+from app.models.booking import Booking
+from app.models.user import User
+from app.models.waitlist import WaitlistEntry
+from app.services.availability import availability_broker
+from app.services.email import booking_email_context, email_service
+from app.services.reference_data import reference_data
+from app.services.tickets import ticket_service
+from pymongo.asynchronous.collection import AsyncCollection
+from pymongo.errors import DuplicateKeyError
+
+logger = logging.getLogger(__name__)
+
+WAITING = "waiting"
+LEFT = "left"
+SKIPPED = "skipped"
+
+
+class WaitlistService:
+    """First-come, first-served waitlists for full days.
+
+    Joining hands out the day's next ticket number (``Day.waitlist_issued``) and stores an entry
+    for it in the ``waitlist`` collection. Seats never go back on sale while anyone waits: the
+    write that releases a seat passes it to the next ticket (``TicketService.release_seat``), and
+    ``promote`` books it for the ticket's holder and emails them. A ticket whose holder left the
+    line or booked elsewhere passes the seat on again, until the line is empty and it is freed.
+
+    A promotion whose booking fails on a database error keeps the seat: the entry goes back
+    marked ``seated``, and ``fill`` books it again (WAITLIST_RETRY_SECONDS later, or on the day's
+    next seat change). Only a holder who already booked elsewhere or left passes the seat on.
+
+    Leaving keeps the entry as a "left" tombstone until the line reaches it, so a position is
+    the distance to the head minus the tombstones in between: an index range count over the
+    people who left ahead, rather than a scan of the line. Those tombstones do not expire, or
+    positions behind them would jump back; only "skipped" ones, already behind the head, do.
+    """
+
+    def __init__(self, tombstone_ttl_seconds: float, retry_seconds: float) -> None:
+        self.tombstone_ttl_seconds = tombstone_ttl_seconds
+        self.retry_seconds = retry_seconds
+        self.joined = 0
+        self.left = 0
+        self.promoted = 0
+        self.passed_over = 0
+        self.retried = 0
+        self._fills: Set[asyncio.Task] = set()
+
+    async def join(self, collections: Collections, day_id: str, user_id: str) -> Optional[dict]:
+        """Put the user at the back of the day's line, leaving any other day's. Returns the entry.
+
+        None means the day is missing. Joining a line the user is already in returns their entry.
+        """
+        existing = await collections.waitlist.find_one({"user_id": user_id, "status": WAITING})
+        if existing is not None:
+            if existing["day_id"] == day_id:
+                return existing
+            await self.leave(collections, user_id)
+
+        while True:
+            seq = await ticket_service.issue_waitlist_ticket(collections.days, day_id)
+            if seq is None:
+                return None
+            entry = WaitlistEntry(day_id=day_id, seq=seq, user_id=user_id).model_dump()
+            try:
+                await collections.waitlist.insert_one(entry)
+                break
+            except DuplicateKeyError:
+                pass
+            mine = await collections.waitlist.find_one({"user_id": user_id, "status": WAITING})
+            if mine is not None:
+                # A concurrent join of the same user got in first; the line skips this ticket
+                await self._tombstone(collections.waitlist, day_id, seq, LEFT)
+                return mine
+            # A seat reached the ticket before the entry was stored and was passed on: queue again
+
+        self.joined += 1
+        # A seat freed just before the ticket was issued went back on sale, where nobody can book it now
+        await self.fill(collections, day_id)
+        return entry
+
+    async def leave(self, collections: Collections, user_id: str) -> Optional[dict]:
+        """Take the user out of the line they are in. Returns their entry, or None if not waiting."""
+        entry = await collections.waitlist.find_one_and_update(
+            {"user_id": user_id, "status": WAITING},
+            {"$set": {"status": LEFT}},
+        )
+        if entry is None:
+            return None
+        self.left += 1
+        # A seat already free (say a hold ran out unnoticed) would stay off sale behind the tombstone
+        await self.fill(collections, entry["day_id"])
+        return entry
+
+    async def position(self, collections: Collections, user_id: str) -> Optional[dict]:
+        """The user's entry with ``position`` (1 is next in line), or None when not waiting."""
+        entry = await collections.waitlist.find_one({"user_id": user_id, "status": WAITING}, {"_id": 0})
+        if entry is None:
+            return None
+        day = await collections.days.find_one({"day_id": entry["day_id"]}, {"_id": 0, "waitlist_promoted": 1})
+        head = (day or {}).get("waitlist_promoted", 0)
+        left_ahead = await collections.waitlist.count_documents(
+            {"day_id": entry["day_id"], "status": LEFT, "seq": {"$gt": head, "$lt": entry["seq"]}}
+        )
+        return {**entry, "position": max(entry["seq"] - head - left_ahead, 1)}
+
+    async def release_seat(self, collections: Collections, day_id: str) -> None:
+        """Give back a seat: to the head of the day's waitlist if anyone waits, else back on sale."""
+        await self.promote(collections, day_id, await ticket_service.release_seat(collections.days, day_id))
+
+    async def fill(self, collections: Collections, day_id: str) -> None:
+        """Book the day's seated entries again, then hand its free seats, if any, to the line."""
+        seated = [entry["_id"] async for entry in collections.waitlist.find({"day_id": day_id, "seated": True})]
+        for entry_id in seated:
+            # Taken by exactly one caller, like a ticket handed out by a seat change
+            entry = await collections.waitlist.find_one_and_delete({"_id": entry_id, "seated": True})
+            if entry is None:
+                continue
+            self.retried += 1
+            if entry["status"] == WAITING and await self._book(collections, day_id, entry):
+                continue
+            self.passed_over += 1
+            await self.promote(collections, day_id, await ticket_service.release_seat(collections.days, day_id))
+        while True:
+            ticket = await ticket_service.fill_seat(collections.days, day_id)
+            if ticket is None:
+                return
+            await self.promote(collections, day_id, ticket)
+
+    def fill_soon(self, day_id: str) -> None:
+        """``fill`` in the background, for seats freed by expired holds (see AvailabilityBroker)."""
+        if db.collections is None:
+            return
+        task = asyncio.create_task(self.fill(db.collections, day_id))
+        self._fills.add(task)
+        task.add_done_callback(self._fill_done)
+
+    def _fill_done(self, task: asyncio.Task) -> None:
+        self._fills.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning("Filling seats from the waitlist failed: %s", task.exception())
+
+    async def promote(self, collections: Collections, day_id: str, ticket: Optional[int]) -> None:
+        """Book the seat handed to waitlist ticket ``ticket`` for its holder, passing it on if need be.
+
+        Each ticket number reaches exactly one caller (the write that handed it the seat), and its
+        entry is taken with one atomic delete, so no one is promoted twice.
+        """
+        while ticket is not None:
+            entry = await self._take(collections.waitlist, day_id, ticket)
+            if entry is not None and await self._book(collections, day_id, entry):
+                return
+            self.passed_over += 1
+            ticket = await ticket_service.release_seat(collections.days, day_id)
+
+    async def _book(self, collections: Collections, day_id: str, entry: dict) -> bool:
+        """Book the seat for a taken entry. False means it goes to the next ticket instead."""
+        day = await reference_data.get_day(collections.days, day_id)
+        if day is None:
+            return False
+        booking = Booking(
+            booking_id=str(uuid.uuid4()),
+            user_id=entry["user_id"],
+            day_id=day_id,
+            festival_id=day["festival_id"],
+            booking_date=datetime.utcnow(),
+            status="confirmed",
+        )
+        # The unique index on bookings.user_id: they booked another day while waiting
+        try:
+            await collections.bookings.insert_one(booking.model_dump())
+        except DuplicateKeyError:
+            return False
+        except Exception:
+            logger.exception("Booking a promoted waitlist entry failed", extra={"user_id": entry["user_id"]})
+            return await self._seat(collections.waitlist, day_id, entry)
+
+        self.promoted += 1
+        logger.info(
+            "Waitlist promoted",
+            extra={
+                "booking_id": booking.booking_id,
+                "user_id": entry["user_id"],
+                "day_id": day_id,
+                "seq": entry["seq"],
+            },
+        )
+        await self._email(collections, entry["user_id"], day)
+        return True
+
+    async def _seat(self, waitlist: AsyncCollection, day_id: str, entry: dict) -> bool:
+        """Put back a taken entry whose seat could not be booked, keeping the seat for it.
+
+        False when the holder has joined another line since, so the seat goes to the next ticket.
+        """
+        try:
+            await waitlist.insert_one({**entry, "seated": True})
+        except DuplicateKeyError:
+            return False
+        except Exception:
+            # The seat stays sold without a booking until tickets_sold is synced from the bookings
+            logger.exception("Keeping a seat for a waitlist entry failed", extra={"user_id": entry["user_id"]})
+            return True
+        asyncio.get_running_loop().call_later(self.retry_seconds, self.fill_soon, day_id)
+        return True
+
+    async def _take(self, waitlist: AsyncCollection, day_id: str, ticket: int) -> Optional[dict]:
+        """Remove and return the waiting entry for a ticket, or None when no one holds it."""
+        query = {"day_id": day_id, "seq": ticket, "status": WAITING}
+        entry = await waitlist.find_one_and_delete(query)
+        if entry is not None:
+            return entry
+        # Either its holder left, or they joined so recently the entry is not stored yet. The
+        # tombstone makes such a join take a new ticket instead of waiting on this one forever.
+        if await self._tombstone(waitlist, day_id, ticket, SKIPPED):
+            return None
+        entry = await waitlist.find_one_and_delete(query)
+        if entry is None:
+            # A "left" tombstone, not needed once the line is past it
+            await waitlist.delete_one({"day_id": day_id, "seq": ticket, "status": LEFT})
+        return entry
+
+    async def _tombstone(self, waitlist: AsyncCollection, day_id: str, ticket: int, status: str) -> bool:
+        """Mark a ticket number as nobody's. False if an entry for it already exists."""
+        # "left" ones are counted by positions until the line reaches them, see the class docstring
+        expires_at = self._tombstone_expiry() if status == SKIPPED else None
+        tombstone = WaitlistEntry(day_id=day_id, seq=ticket, status=status, expires_at=expires_at)
+        try:
+            await waitlist.insert_one(tombstone.model_dump())
+        except DuplicateKeyError:
+            return False
+        return True
+
+    def _tombstone_expiry(self) -> datetime:
+        return datetime.utcnow() + timedelta(seconds=self.tombstone_ttl_seconds)
+
+    async def _email(self, collections: Collections, user_id: str, day: dict) -> None:
+        """Queue the promotion email (best-effort)."""
+        try:
+            user_doc = await collections.users.find_one({"user_id": user_id})
+            if user_doc is None or not user_doc.get("email_opt_in", True):
+                return
+            user = User(**user_doc)
+            festival = await reference_data.get_festival(collections.festivals, day["festival_id"]) or {}
+            email_service.enqueue("waitlist_promotion", user.email, booking_email_context(user, day, festival))
+        except Exception as e:
+            logger.warning("Queueing waitlist promotion email failed: %s", e)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "joined": self.joined,
+            "left": self.left,
+            "promoted": self.promoted,
+            "passed_over": self.passed_over,
+            "retried": self.retried,
+        }
+
+
+waitlist_service = WaitlistService(settings.WAITLIST_TOMBSTONE_TTL_SECONDS, settings.WAITLIST_RETRY_SECONDS)
+availability_broker.seats_freed.append(waitlist_service.fill_soon)
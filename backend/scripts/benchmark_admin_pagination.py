@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the admin bookings listing: full dump vs offset paging vs keyset paging.
+
+Seeds --bookings bookings into a scratch database with the declared indexes, then times
+fetching everything at once (the old /admin/bookings), a page at increasing depths with
+skip/limit, and the same pages with app.core.pagination.keyset_page.
+
+Usage (from the backend directory, with MongoDB running):
+
+    python -m scripts.benchmark_admin_pagination --bookings 100000 --page-size 100
+"""
+
+import argparse
+import asyncio
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, List
+
+from app.api.admin import BOOKING_PAGE_KEYS
+from app.core.config import settings
+from app.core.database import Collections
+from app.core.indexes import ensure_indexes
+from app.core.pagination import encode_cursor, keyset_page
+from pymongo import AsyncMongoClient
+from scripts.benchmark_utils import format_row, summarize, timer
+
+BATCH_SIZE = 10_000
+
+
+async def seed(collections: Collections, booking_count: int) -> None:
+    start = datetime(2030, 1, 1)
+    for batch in range(0, booking_count, BATCH_SIZE):
+        await collections.bookings.insert_many(
+            [
+                {
+                    "booking_id": f"booking-{i:08d}",
+                    "user_id": f"user-{i}",
+                    "day_id": str(i % 5 + 1),
+                    "festival_id": "festival",
+                    "booking_date": start,
+                    "status": "confirmed",
+                    # Collide timestamps in pairs so the booking_id tie-breaker matters
+                    "created_at": start + timedelta(seconds=i // 2),
+                    "updated_at": start + timedelta(seconds=i // 2),
+                }
+                for i in range(batch, min(batch + BATCH_SIZE, booking_count))
+            ]
+        )
+
+
+async def measure(label: str, run: Callable[[], Awaitable], repeat: int) -> None:
+    latencies: List[float] = []
+    for _ in range(repeat):
+        with timer() as elapsed:
+            await run()
+        latencies.append(elapsed[0])
+    print(format_row(label, summarize(latencies)))
+
+
+async def main(booking_count: int, page_size: int, repeat: int) -> None:
+    client = AsyncMongoClient(settings.MONGODB_CONNECTION_STRING)
+    database_name = f"{settings.DATABASE_NAME}_bench_pagination"
+    await client.drop_database(database_name)
+    collections = Collections(client[database_name])
+    bookings = collections.bookings
+    try:
+        print(f"Seeding {booking_count} bookings...")
+        await seed(collections, booking_count)
+        await ensure_indexes(collections.database)
+
+        await measure("full dump", lambda: bookings.find({}, {"_id": 0}).to_list(), max(1, repeat // 10))
+        sort = [(key, 1) for key in BOOKING_PAGE_KEYS]
+        for depth in (0, 0.5, 0.99):
+            offset = int(booking_count * depth)
+            await measure(
+                f"skip/limit offset={offset}",
+                lambda: bookings.find({}, {"_id": 0}).sort(sort).skip(offset).limit(page_size).to_list(),
+                repeat,
+            )
+            # The cursor a client would hold after reading ``offset`` bookings
+            previous = await bookings.find({}, {"_id": 0}).sort(sort).skip(max(offset - 1, 0)).limit(1).to_list()
+            after = encode_cursor(previous[0], BOOKING_PAGE_KEYS) if offset else None
+            await measure(
+                f"keyset offset={offset}",
+                lambda: keyset_page(bookings, {}, BOOKING_PAGE_KEYS, page_size, after),
+                repeat,
+            )
+    finally:
+        await client.drop_database(database_name)
+        await client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bookings", type=int, default=100_000)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.bookings, args.page_size, args.repeat))
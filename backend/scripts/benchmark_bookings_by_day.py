@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the admin bookings-by-day view: Python-side join vs one aggregation.
+
+Seeds --users users (most of whom never book) and --bookings bookings spread over five days
+into a scratch database, then reports latency and Python peak memory for the original
+implementation (load days, users and bookings, join with dicts) and for
+app.api.admin.bookings_by_day_pipeline.
+
+Usage (from the backend directory, with MongoDB running):
+
+    python -m scripts.benchmark_bookings_by_day --users 100000 --bookings 5000
+"""
+
+import argparse
+import asyncio
+import tracemalloc
+from datetime import datetime
+from typing import Awaitable, Callable, List
+
+from app.api.admin import bookings_by_day_pipeline
+from app.core.config import settings
+from app.core.database import Collections
+from app.core.indexes import ensure_indexes
+from pymongo import AsyncMongoClient
+from scripts.benchmark_utils import format_row, summarize, timer
+
+BATCH_SIZE = 10_000
+DAY_COUNT = 5
+
+
+async def seed(collections: Collections, users: int, bookings: int) -> None:
+    now = datetime.utcnow()
+    for start in range(0, users, BATCH_SIZE):
+        await collections.users.insert_many(
+            [
+                {"user_id": f"user-{i}", "google_id": f"google-{i}", "email": f"g{i}@example.com", "name": f"Guest {i}"}
+                for i in range(start, min(start + BATCH_SIZE, users))
+            ]
+        )
+    await collections.bookings.insert_many(
+        [
+            {
+                "booking_id": f"booking-{i}",
+                "user_id": f"user-{i * (users // max(bookings, 1))}",
+                "day_id": str(i % DAY_COUNT + 1),
+                "booking_date": now,
+                "status": "confirmed",
+            }
+            for i in range(bookings)
+        ]
+    )
+    await collections.days.insert_many(
+        [
+            {"day_id": str(d + 1), "date": datetime(2030, 1, d + 1), "theme": f"Theme {d}", "capacity": 6}
+            for d in range(DAY_COUNT)
+        ]
+    )
+
+
+async def legacy(collections: Collections) -> dict:
+    """The original implementation, joining everything in Python."""
+    days = await collections.days.find({}, {"_id": 0}).to_list()
+    users = await collections.users.find({}, {"_id": 0}).to_list()
+    user_by_id = {u["user_id"]: u for u in users}
+    result = [
+        {"day_id": d["day_id"], "date": d.get("date"), "theme": d.get("theme"), "bookings": []}
+        for d in sorted(days, key=lambda dd: dd.get("date"))
+    ]
+    result_by_day_id = {entry["day_id"]: entry for entry in result}
+    for b in await collections.bookings.find({}, {"_id": 0}).to_list():
+        entry = result_by_day_id.get(b.get("day_id"))
+        if entry:
+            user = user_by_id.get(b.get("user_id"), {})
+            entry["bookings"].append({"booking_id": b.get("booking_id"), "user_name": user.get("name")})
+    for entry in result:
+        entry["bookings"].sort(key=lambda bb: (bb.get("user_name") or "").lower())
+    return {"days": result}
+
+
+async def aggregated(collections: Collections) -> dict:
+    cursor = await collections.days.aggregate(bookings_by_day_pipeline())
+    return {"days": await cursor.to_list()}
+
+
+async def measure(label: str, run: Callable[[], Awaitable], repeat: int) -> None:
+    latencies: List[float] = []
+    tracemalloc.start()
+    for _ in range(repeat):
+        with timer() as elapsed:
+            await run()
+        latencies.append(elapsed[0])
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(format_row(label, summarize(latencies)) + f"  peak={peak / 2**20:.1f} MiB")
+
+
+async def main(users: int, bookings: int, repeat: int) -> None:
+    client = AsyncMongoClient(settings.MONGODB_CONNECTION_STRING)
+    database_name = f"{settings.DATABASE_NAME}_bench_by_day"
+    await client.drop_database(database_name)
+    collections = Collections(client[database_name])
+    try:
+        print(f"Seeding {users} users and {bookings} bookings...")
+        await seed(collections, users, bookings)
+        await ensure_indexes(collections.database)
+        await measure("legacy python join", lambda: legacy(collections), repeat)
+        await measure("aggregation", lambda: aggregated(collections), repeat)
+    finally:
+        await client.drop_database(database_name)
+        await client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--bookings", type=int, default=5_000)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+    asyncio.run(main(args.users, args.bookings, args.repeat))
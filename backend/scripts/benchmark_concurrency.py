@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Concurrency benchmark for the public days listing and booking creation.
+
+Fires batches of concurrent requests at a running API and reports p50/p99 latency for
+GET /api/v1/festival/days and POST /api/v1/bookings/ at each concurrency level.
+
+Usage (from the backend directory, with the API and MongoDB running):
+
+    python -m scripts.benchmark_concurrency --base-url http://localhost:8000 --levels 1 50 500
+"""
+
+import argparse
+import asyncio
+import time
+from typing import List, Tuple
+
+import httpx
+from app.core.database import close_mongo_connection, connect_to_mongo, get_collections
+from scripts.benchmark_utils import bench_token, cleanup, format_row, seed_users, summarize
+
+
+async def _timed(client: httpx.AsyncClient, method: str, url: str, **kwargs) -> Tuple[float, int]:
+    start = time.perf_counter()
+    response = await client.request(method, url, **kwargs)
+    return (time.perf_counter() - start) * 1000, response.status_code
+
+
+async def bench_days(client: httpx.AsyncClient, concurrency: int, rounds: int) -> List[float]:
+    latencies: List[float] = []
+    for _ in range(rounds):
+        results = await asyncio.gather(*[_timed(client, "GET", "/api/v1/festival/days") for _ in range(concurrency)])
+        latencies.extend(elapsed for elapsed, _ in results)
+    return latencies
+
+
+async def bench_bookings(client: httpx.AsyncClient, concurrency: int, day_id: str) -> Tuple[List[float], dict]:
+    collections = get_collections()
+    await cleanup(collections)
+    users = await seed_users(collections, concurrency)
+    results = await asyncio.gather(
+        *[
+            _timed(
+                client,
+                "POST",
+                "/api/v1/bookings/",
+                json={"day_id": day_id},
+                headers={"Authorization": f"Bearer {bench_token(user)}"},
+            )
+            for user in users
+        ]
+    )
+    statuses: dict = {}
+    for _, status in results:
+        statuses[status] = statuses.get(status, 0) + 1
+    await cleanup(collections)
+    return [elapsed for elapsed, _ in results], statuses
+
+
+async def main(base_url: str, levels: List[int], rounds: int, day_id: str) -> None:
+    await connect_to_mongo()
+    limits = httpx.Limits(max_connections=max(levels), max_keepalive_connections=max(levels))
+    try:
+        async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+            for concurrency in levels:
+                print(
+                    format_row(
+                        f"GET /festival/days c={concurrency}", summarize(await bench_days(client, concurrency, rounds))
+                    )
+                )
+                latencies, statuses = await bench_bookings(client, concurrency, day_id)
+                print(format_row(f"POST /bookings/ c={concurrency}", summarize(latencies)) + f"  statuses={statuses}")
+    finally:
+        await close_mongo_connection()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 50, 500])
+    parser.add_argument("--rounds", type=int, default=5, help="Rounds of GET requests per concurrency level")
+    parser.add_argument("--day-id", default="1", help="Day to book against")
+    args = parser.parse_args()
+    asyncio.run(main(args.base_url, args.levels, args.rounds, args.day_id))
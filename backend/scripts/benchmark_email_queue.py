@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Benchmark showing that queued email delivery takes SES latency off the request path.
+
+Uses a local SES stand-in that sleeps for --delay seconds per send (and optionally fails a
+fraction of sends), then compares the time a booking handler spends on email when sending
+inline against enqueueing for the background workers, and reports the queue counters once
+the workers have drained everything.
+
+Usage (from the backend directory):
+
+    python -m scripts.benchmark_email_queue --requests 200 --delay 0.3 --failure-rate 0.1
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from typing import Dict, List
+
+from app.core.config import settings
+from app.services.email import EmailService
+from scripts.benchmark_utils import format_row, summarize, timer
+
+CONTEXT = {
+    "user_name": "Bench User",
+    "day_theme": "Autumn Harvest",
+    "booking_date": "November 03, 2024",
+    "price": "50",
+    "location": "Guldbergsgade 51A, 4. tv., 2200 København N",
+}
+
+
+class SlowSES:
+    """Stand-in for the boto3 SES client with artificial latency and failures."""
+
+    def __init__(self, delay: float, failure_rate: float):
+        self.delay = delay
+        self.failure_rate = failure_rate
+        self.sent = 0
+
+    def send_email(self, **kwargs) -> Dict:
+        time.sleep(self.delay)
+        if random.random() < self.failure_rate:
+            raise RuntimeError("Throttling: Maximum sending rate exceeded")
+        self.sent += 1
+        return {"MessageId": f"stub-{self.sent}"}
+
+
+async def main(requests: int, delay: float, failure_rate: float, workers: int) -> None:
+    settings.EMAIL_RETRY_BASE_SECONDS = 0.05
+    ses = SlowSES(delay, failure_rate)
+    service = EmailService(ses_client=ses)
+
+    inline: List[float] = []
+    for _ in range(min(requests, 20)):
+        with timer() as elapsed:
+            try:
+                service.send("booking_confirmation", "bench@example.com", CONTEXT)
+            except RuntimeError:
+                pass
+        inline.append(elapsed[0])
+    print(format_row("inline send (handler waits on SES)", summarize(inline)))
+
+    service.start(workers)
+    queued: List[float] = []
+    drain_start = time.perf_counter()
+    for _ in range(requests):
+        with timer() as elapsed:
+            service.enqueue("booking_confirmation", "bench@example.com", CONTEXT)
+        queued.append(elapsed[0])
+    print(format_row("enqueue (handler returns immediately)", summarize(queued)))
+
+    while (
+        service.queue_stats()["depth"] or service.queue_stats()["in_flight"] or service.queue_stats()["waiting_retry"]
+    ):
+        await asyncio.sleep(0.05)
+    print(f"Drained {requests} emails with {workers} workers in {time.perf_counter() - drain_start:.2f}s")
+    await service.stop()
+    print(f"Queue stats: {service.queue_stats()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--delay", type=float, default=0.3, help="Seconds the SES stand-in sleeps per send")
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--workers", type=int, default=settings.EMAIL_WORKERS)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.delay, args.failure_rate, args.workers))
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark of email rendering: fresh Jinja render per send vs the memoized renderer.
+
+Renders --renders booking confirmations spread over a handful of days (so the shared part
+repeats, like a real booking wave) with a distinct guest name each time, and reports
+renders per second for both paths.
+
+Usage (from the backend directory):
+
+    python -m scripts.benchmark_email_render --renders 10000
+"""
+
+import argparse
+import time
+
+from app.services.email import EMAIL_TEMPLATES, EmailService
+
+DAYS = [
+    ("Autumn Harvest", "November 03, 2024"),
+    ("Mediterranean Night", "November 04, 2024"),
+    ("Asian Fusion", "November 05, 2024"),
+    ("Comfort Classics", "November 06, 2024"),
+    ("Sweet Endings", "November 07, 2024"),
+]
+
+
+def context(i: int) -> dict:
+    theme, date = DAYS[i % len(DAYS)]
+    return {
+        "user_name": f"Guest {i}",
+        "day_theme": theme,
+        "booking_date": date,
+        "price": "50",
+        "location": "Guldbergsgade 51A, 4. tv., 2200 København N",
+    }
+
+
+def main(renders: int) -> None:
+    template_name, _ = EMAIL_TEMPLATES["booking_confirmation"]
+    service = EmailService()
+    contexts = [context(i) for i in range(renders)]
+
+    start = time.perf_counter()
+    for ctx in contexts:
+        service.jinja_env.get_template(template_name).render(**ctx)
+    baseline = time.perf_counter() - start
+
+    service.precompile_templates()
+    start = time.perf_counter()
+    for ctx in contexts:
+        service._render(template_name, ctx)
+    memoized = time.perf_counter() - start
+
+    print(f"fresh render:    {renders / baseline:>10.0f} renders/s ({baseline * 1000:.1f} ms total)")
+    print(f"memoized render: {renders / memoized:>10.0f} renders/s ({memoized * 1000:.1f} ms total)")
+    print(f"speed-up: {baseline / memoized:.1f}x  cache: {service.render_cache.stats()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--renders", type=int, default=10_000)
+    args = parser.parse_args()
+    main(args.renders)
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Peak-memory benchmark for the admin bookings export: build-then-return vs streaming.
+
+Seeds --bookings bookings (and one user each, plus unrelated users who never booked) into a
+scratch database, then measures Python peak memory (tracemalloc), time to first byte and
+total time for the original list-and-join export and for the streaming CSV export.
+
+Usage (from the backend directory, with MongoDB running):
+
+    python -m scripts.benchmark_export --bookings 1000000
+"""
+
+import argparse
+import asyncio
+import time
+import tracemalloc
+from datetime import datetime
+from typing import AsyncIterator, Callable, List
+
+from app.core.config import settings
+from app.core.database import Collections
+from app.core.indexes import ensure_indexes
+from app.services.exports import export_csv, gzip_stream, iter_booking_rows
+from pymongo import AsyncMongoClient
+
+BATCH_SIZE = 10_000
+
+
+async def seed(collections: Collections, bookings: int, idle_users: int) -> None:
+    now = datetime.utcnow()
+    for start in range(0, bookings + idle_users, BATCH_SIZE):
+        indices = range(start, min(start + BATCH_SIZE, bookings + idle_users))
+        await collections.users.insert_many(
+            [
+                {"user_id": f"user-{i}", "google_id": f"google-{i}", "email": f"g{i}@example.com", "name": f"Guest {i}"}
+                for i in indices
+            ]
+        )
+        booked = [i for i in indices if i < bookings]
+        if booked:
+            await collections.bookings.insert_many(
+                [
+                    {
+                        "booking_id": f"booking-{i}",
+                        "user_id": f"user-{i}",
+                        "day_id": str(i % 5 + 1),
+                        "booking_date": now,
+                        "status": "confirmed",
+                    }
+                    for i in booked
+                ]
+            )
+
+
+async def legacy_export(collections: Collections) -> AsyncIterator[bytes]:
+    """The original implementation: load everything, join in memory, return one string."""
+    bookings = await collections.bookings.find({}, {"_id": 0}).to_list()
+    users = await collections.users.find({}, {"_id": 0}).to_list()
+    user_by_id = {u["user_id"]: u for u in users}
+    lines: List[str] = ["booking_id,day_id,user_name,user_email,booking_date,status"]
+    for b in bookings:
+        u = user_by_id.get(b.get("user_id"), {})
+        date_str = b.get("booking_date")
+        if isinstance(date_str, datetime):
+            date_str = date_str.isoformat()
+        name = '"' + u.get("name", "").replace('"', '""') + '"'
+        lines.append(",".join([b["booking_id"], b["day_id"], name, u.get("email", ""), str(date_str), b["status"]]))
+    yield "\n".join(lines).encode()
+
+
+async def measure(label: str, make_stream: Callable[[], AsyncIterator[bytes]]) -> None:
+    tracemalloc.start()
+    start = time.perf_counter()
+    first_byte = None
+    total = 0
+    async for chunk in make_stream():
+        if first_byte is None:
+            first_byte = time.perf_counter() - start
+        total += len(chunk)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(
+        f"{label:<22} peak={peak / 2**20:>8.1f} MiB  first_byte={first_byte * 1000:>9.1f} ms  "
+        f"total={elapsed:>6.2f} s  bytes={total}"
+    )
+
+
+async def main(bookings: int, idle_users: int) -> None:
+    client = AsyncMongoClient(settings.MONGODB_CONNECTION_STRING)
+    database_name = f"{settings.DATABASE_NAME}_bench_export"
+    await client.drop_database(database_name)
+    collections = Collections(client[database_name])
+    try:
+        print(f"Seeding {bookings} bookings and {bookings + idle_users} users...")
+        await seed(collections, bookings, idle_users)
+        await ensure_indexes(collections.database)
+
+        await measure("legacy (in memory)", lambda: legacy_export(collections))
+        await measure(
+            "streaming csv", lambda: export_csv(iter_booking_rows(collections, {}, settings.EXPORT_BATCH_SIZE))
+        )
+        await measure(
+            "streaming csv.gz",
+            lambda: gzip_stream(export_csv(iter_booking_rows(collections, {}, settings.EXPORT_BATCH_SIZE))),
+        )
+    finally:
+        await client.drop_database(database_name)
+        await client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bookings", type=int, default=1_000_000)
+    parser.add_argument("--idle-users", type=int, default=100_000, help="Users without a booking")
+    args = parser.parse_args()
+    asyncio.run(main(args.bookings, args.idle_users))
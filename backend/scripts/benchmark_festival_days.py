@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Benchmark for GET /api/v1/festival/days: per-day count_documents (N+1) vs one aggregation.
+
+Seeds 5, 50 and 500 benchmark days (with a few bookings each, counted in tickets_sold), then
+runs both query strategies directly against MongoDB and reports database round trips and latency.
+
+Usage (from the backend directory, with MongoDB running):
+
+    python -m scripts.benchmark_festival_days --sizes 5 50 500 --repeat 20
+"""
+
+import argparse
+import asyncio
+from datetime import datetime, timedelta
+from typing import List
+
+from app.api.festival import days_with_availability_pipeline
+from app.core.config import settings
+from app.core.database import Collections
+from pymongo import AsyncMongoClient, monitoring
+from scripts.benchmark_utils import BENCH_PREFIX, cleanup, format_row, summarize, timer
+
+
+class CommandCounter(monitoring.CommandListener):
+    def __init__(self):
+        self.count = 0
+
+    def started(self, event):
+        self.count += 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+async def n_plus_one(collections: Collections) -> List[dict]:
+    """The original implementation: one find plus one count per day, sorted in Python."""
+    days = []
+    async for day in collections.days.find():
+        bookings_count = await collections.bookings.count_documents({"day_id": day["day_id"]})
+        days.append({"id": day["day_id"], "date": day["date"].isoformat(), "tickets_sold": bookings_count})
+    days.sort(key=lambda x: x["date"])
+    return days
+
+
+async def aggregated(collections: Collections) -> List[dict]:
+    cursor = await collections.days.aggregate(days_with_availability_pipeline(datetime.utcnow()))
+    return await cursor.to_list()
+
+
+async def seed_days(collections: Collections, count: int) -> None:
+    start = datetime(2030, 1, 1)
+    days = [
+        {
+            "day_id": f"{BENCH_PREFIX}day-{i}",
+            "festival_id": f"{BENCH_PREFIX}festival",
+            "date": start + timedelta(days=i),
+            "theme": f"Theme {i}",
+            "menu": "Benchmark menu",
+            "tickets_sold": i % 4,
+            "capacity": 6,
+        }
+        for i in range(count)
+    ]
+    bookings = [
+        {"booking_id": f"{BENCH_PREFIX}{i}-{j}", "user_id": f"{BENCH_PREFIX}user-{i}-{j}", "day_id": d["day_id"]}
+        for i, d in enumerate(days)
+        for j in range(i % 4)
+    ]
+    await collections.days.insert_many(days)
+    if bookings:
+        await collections.bookings.insert_many(bookings)
+
+
+async def main(sizes: List[int], repeat: int) -> None:
+    counter = CommandCounter()
+    client = AsyncMongoClient(settings.MONGODB_CONNECTION_STRING, event_listeners=[counter])
+    collections = Collections(client[f"{settings.DATABASE_NAME}_bench"])
+    try:
+        for size in sizes:
+            await cleanup(collections)
+            await seed_days(collections, size)
+            for label, strategy in (("N+1 count_documents", n_plus_one), ("aggregation", aggregated)):
+                latencies = []
+                counter.count = 0
+                for _ in range(repeat):
+                    with timer() as elapsed:
+                        await strategy(collections)
+                    latencies.append(elapsed[0])
+                round_trips = counter.count / repeat
+                print(format_row(f"{size:>4} days {label}", summarize(latencies)) + f"  round_trips={round_trips:.0f}")
+    finally:
+        await cleanup(collections)
+        await client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[5, 50, 500])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.sizes, args.repeat))
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Benchmark of Google ID-token verification: tokeninfo round trip vs local signature check.
+
+Starts a local stub of Google's endpoints (a JWKS document and a tokeninfo endpoint, both
+backed by a freshly generated RSA key), then verifies the same signed ID token repeatedly
+with AuthService in "tokeninfo" and "local" mode and reports the latency of each.
+
+Usage (from the backend directory):
+
+    python -m scripts.benchmark_google_login --logins 500
+"""
+
+import argparse
+import asyncio
+import time
+from typing import Dict, List
+
+import uvicorn
+from app.services.auth import AuthService
+from app.services.google_keys import HttpKeySource
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from fastapi import FastAPI, HTTPException, Response
+from jose import jwk, jwt
+from scripts.benchmark_utils import format_row, summarize, timer
+
+CLIENT_ID = "benchmark-client-id"
+KEY_ID = "benchmark-key"
+
+
+def make_keys() -> Dict[str, object]:
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    private_pem = private_key.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    ).decode()
+    public_pem = private_key.public_key().public_bytes(
+        serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+    )
+    public_jwk = {
+        k: v.decode() if isinstance(v, bytes) else v for k, v in jwk.construct(public_pem, "RS256").to_dict().items()
+    }
+    public_jwk.update({"kid": KEY_ID, "use": "sig"})
+    return {"private_pem": private_pem, "jwks": {"keys": [public_jwk]}}
+
+
+def make_stub(keys: Dict[str, object]) -> FastAPI:
+    stub = FastAPI()
+
+    @stub.get("/oauth2/v3/certs")
+    async def certs(response: Response):
+        response.headers["Cache-Control"] = "public, max-age=21600"
+        return keys["jwks"]
+
+    @stub.get("/tokeninfo")
+    async def tokeninfo(id_token: str):
+        try:
+            return jwt.decode(id_token, keys["jwks"], algorithms=["RS256"], audience=CLIENT_ID)
+        except Exception:
+            raise HTTPException(status_code=400, detail="invalid_token")
+
+    return stub
+
+
+def make_id_token(private_pem: str) -> str:
+    now = int(time.time())
+    claims = {
+        "iss": "https://accounts.google.com",
+        "aud": CLIENT_ID,
+        "sub": "benchmark-subject",
+        "email": "bench@example.com",
+        "name": "Bench User",
+        "iat": now,
+        "exp": now + 3600,
+    }
+    return jwt.encode(claims, private_pem, algorithm="RS256", headers={"kid": KEY_ID})
+
+
+async def bench(service: AuthService, token: str, logins: int) -> List[float]:
+    latencies: List[float] = []
+    for _ in range(logins):
+        with timer() as elapsed:
+            await service.verify_google_token(token)
+        latencies.append(elapsed[0])
+    return latencies
+
+
+async def main(logins: int, port: int) -> None:
+    keys = make_keys()
+    server = uvicorn.Server(uvicorn.Config(make_stub(keys), host="127.0.0.1", port=port, log_level="warning"))
+    serving = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+
+    base_url = f"http://127.0.0.1:{port}"
+    token = make_id_token(keys["private_pem"])
+    try:
+        remote = AuthService()
+        remote.google_client_id = CLIENT_ID
+        remote.google_token_verification = "tokeninfo"
+        remote.google_tokeninfo_url = f"{base_url}/tokeninfo"
+
+        local = AuthService(HttpKeySource(f"{base_url}/oauth2/v3/certs"))
+        local.google_client_id = CLIENT_ID
+        local.google_token_verification = "local"
+
+        print(format_row("tokeninfo (HTTP per login)", summarize(await bench(remote, token, logins))))
+        print(format_row("local (cached JWKS)", summarize(await bench(local, token, logins))))
+    finally:
+        server.should_exit = True
+        await serving
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=500)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+    asyncio.run(main(args.logins, args.port))
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Benchmark of client retries on booking creation, with and without an Idempotency-Key.
+
+Creates --users benchmark users and one roomy benchmark day. Each user books once and then
+retries the same request --retries times (as a mobile client on a bad connection would), through
+the app in-process (httpx ASGI transport):
+
+  no key        every retry runs the handler again and gets the "already have a booking" 400
+  key           retries replay the first response; the last round sends all attempts of a
+                user at once, to show concurrent duplicates coalescing into one execution
+
+For each run it prints the latency of first attempts and retries, the status codes of retries,
+the MongoDB commands sent to the days, bookings and idempotency_keys collections, and the
+confirmation emails queued.
+
+Usage (from the backend directory, with MongoDB running):
+
+    python -m scripts.benchmark_idempotency --users 200 --retries 3
+"""
+
+import argparse
+import asyncio
+import time
+import uuid
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import httpx
+from app.core.config import settings
+from app.core.database import Collections, db
+from app.core.idempotency import idempotency_keys
+from app.main import app
+from app.services.email import email_service
+from pymongo import AsyncMongoClient, monitoring
+from scripts.benchmark_utils import BENCH_PREFIX, bench_token, cleanup, format_row, seed_users, summarize
+
+COUNTED = {"days", "bookings", "idempotency_keys"}
+DAY_ID = f"{BENCH_PREFIX}idempotency-day"
+# Keys are scoped to the token subject, which is the benchmark user's google_id
+BENCH_KEYS = {"_id": {"$regex": f"^{BENCH_PREFIX}"}}
+
+
+class CommandCount(monitoring.CommandListener):
+    def __init__(self) -> None:
+        self.commands: Counter = Counter()
+
+    def started(self, event):
+        if event.command.get(event.command_name) in COUNTED:
+            self.commands[f"{event.command_name}:{event.command[event.command_name]}"] += 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+async def reset(collections: Collections, capacity: int) -> None:
+    await collections.bookings.delete_many({"day_id": DAY_ID})
+    await collections.idempotency_keys.delete_many(BENCH_KEYS)
+    await collections.days.update_one(
+        {"day_id": DAY_ID},
+        {
+            "$set": {
+                "festival_id": f"{BENCH_PREFIX}festival",
+                "date": datetime(2030, 1, 1),
+                "theme": "Retries",
+                "menu": "Retries",
+                "tickets_sold": 0,
+                "capacity": capacity,
+            }
+        },
+        upsert=True,
+    )
+    idempotency_keys.cache.clear()
+
+
+async def run(
+    collections: Collections, log: CommandCount, users: List[Dict], retries: int, use_keys: bool, concurrent: bool
+) -> None:
+    await reset(collections, len(users))
+    queued: Counter = Counter()
+    enqueue = email_service.enqueue
+
+    def count_email(template: str, *args, **kwargs):
+        queued[template] += 1
+        return True
+
+    email_service.enqueue = count_email
+    first: List[float] = []
+    repeated: List[float] = []
+    statuses: Counter = Counter()
+    transport = httpx.ASGITransport(app=app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://idempotency", timeout=600) as client:
+
+            async def attempt(user: Dict, key: Optional[str], latencies: List[float]) -> int:
+                headers = {"Authorization": f"Bearer {bench_token(user)}"}
+                if key:
+                    headers["Idempotency-Key"] = key
+                start = time.perf_counter()
+                response = await client.post("/api/v1/bookings/", json={"day_id": DAY_ID}, headers=headers)
+                latencies.append((time.perf_counter() - start) * 1000)
+                return response.status_code
+
+            async def user_session(user: Dict) -> None:
+                key = str(uuid.uuid4()) if use_keys else None
+                if concurrent:
+                    codes = await asyncio.gather(*[attempt(user, key, repeated) for _ in range(retries + 1)])
+                    statuses.update(codes)
+                    return
+                await attempt(user, key, first)
+                for _ in range(retries):
+                    statuses[await attempt(user, key, repeated)] += 1
+
+            log.commands.clear()
+            await asyncio.gather(*[user_session(user) for user in users])
+    finally:
+        email_service.enqueue = enqueue
+
+    stored = await collections.bookings.count_documents({"day_id": DAY_ID})
+    if first:
+        print(format_row("first attempt", summarize(first)))
+    print(format_row("all attempts at once" if concurrent else "retry", summarize(repeated)))
+    print(f"  statuses: {dict(sorted(statuses.items()))}")
+    print(f"  MongoDB commands: {sum(log.commands.values())}  {dict(sorted(log.commands.items()))}")
+    print(f"  bookings stored: {stored}  confirmation emails queued: {queued['booking_confirmation']}")
+
+
+async def main(user_count: int, retries: int) -> None:
+    log = CommandCount()
+    client = AsyncMongoClient(settings.MONGODB_CONNECTION_STRING, event_listeners=[log])
+    db.client = client
+    db.collections = collections = Collections(client[settings.DATABASE_NAME])
+    try:
+        await cleanup(collections)
+        # Fresh users per run, so no run starts on a rate-limit budget spent by the previous one
+        users = await seed_users(collections, user_count * 3)
+        # Opted in, so the confirmation emails a retry would repeat are counted
+        await collections.users.update_many(
+            {"google_id": {"$regex": f"^{BENCH_PREFIX}"}}, {"$set": {"email_opt_in": True}}
+        )
+        print(f"{user_count} users, {retries} retries each\n")
+        print("no key")
+        await run(collections, log, users[:user_count], retries, use_keys=False, concurrent=False)
+        print("\nIdempotency-Key")
+        await run(collections, log, users[user_count : 2 * user_count], retries, use_keys=True, concurrent=False)
+        print("\nIdempotency-Key, duplicates sent concurrently")
+        await run(collections, log, users[2 * user_count :], retries, use_keys=True, concurrent=True)
+        print(f"\n  idempotency: {idempotency_keys.stats()}")
+    finally:
+        await collections.idempotency_keys.delete_many(BENCH_KEYS)
+        await cleanup(collections)
+        await client.close()
+        db.client = None
+        db.collections = None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--retries", type=int, default=3, help="keep below RATE_LIMIT_BOOKINGS_BURST")
+    args = parser.parse_args()
+    asyncio.run(main(args.users, args.retries))
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the hot query paths with and without the declared indexes.
+
+Seeds 100k users and 100k bookings into a scratch database, times the lookups the API
+performs on every request (user by google_id, booking by user_id, bookings per day, ...)
+as collection scans, then runs app.core.indexes.ensure_indexes and times them again.
+
+Usage (from the backend directory, with MongoDB running):
+
+    python -m scripts.benchmark_indexes --users 100000 --repeat 50
+"""
+
+import argparse
+import asyncio
+import random
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, List
+
+from app.api.admin import prefix_range
+from app.core.config import settings
+from app.core.database import Collections
+from app.core.indexes import CASE_INSENSITIVE, ensure_indexes
+from pymongo import AsyncMongoClient
+from scripts.benchmark_utils import format_row, summarize, timer
+
+BATCH_SIZE = 10_000
+DAY_COUNT = 5
+
+
+async def seed(collections: Collections, user_count: int) -> None:
+    now = datetime.utcnow()
+    for start in range(0, user_count, BATCH_SIZE):
+        indices = range(start, min(start + BATCH_SIZE, user_count))
+        await collections.users.insert_many(
+            [
+                {
+                    "user_id": f"user-{i}",
+                    "google_id": f"google-{i}",
+                    "email": f"guest{i}@example.com",
+                    "name": f"Guest {i}",
+                    "created_at": now,
+                    "updated_at": now,
+                }
+                for i in indices
+            ]
+        )
+        await collections.bookings.insert_many(
+            [
+                {
+                    "booking_id": f"booking-{i}",
+                    "user_id": f"user-{i}",
+                    "day_id": str(i % DAY_COUNT + 1),
+                    "festival_id": "festival",
+                    "booking_date": now,
+                    "status": "confirmed",
+                    "created_at": now,
+                    "updated_at": now,
+                }
+                for i in indices
+            ]
+        )
+    await collections.days.insert_many(
+        [{"day_id": str(d + 1), "festival_id": "festival", "date": datetime(2030, 1, d + 1)} for d in range(DAY_COUNT)]
+    )
+    await collections.festivals.insert_one({"festival_id": "festival", "name": "Benchmark"})
+
+
+def hot_queries(collections: Collections, user_count: int) -> Dict[str, Callable[[], Awaitable]]:
+    def rand() -> int:
+        return random.randrange(user_count)
+
+    return {
+        "users.find_one(google_id)": lambda: collections.users.find_one({"google_id": f"google-{rand()}"}),
+        "users.find_one(email)": lambda: collections.users.find_one({"email": f"guest{rand()}@example.com"}),
+        "users.find_one(user_id)": lambda: collections.users.find_one({"user_id": f"user-{rand()}"}),
+        "users.find(email prefix, ci)": lambda: collections.users.find(
+            {"email": prefix_range(f"GUEST{rand()}@")}, collation=CASE_INSENSITIVE
+        ).to_list(),
+        "bookings.find_one(user_id)": lambda: collections.bookings.find_one({"user_id": f"user-{rand()}"}),
+        "bookings.count_documents(day_id)": lambda: collections.bookings.count_documents({"day_id": "3"}),
+        "days.find_one(day_id)": lambda: collections.days.find_one({"day_id": "3"}),
+        "festivals.find_one(festival_id)": lambda: collections.festivals.find_one({"festival_id": "festival"}),
+    }
+
+
+async def measure(queries: Dict[str, Callable[[], Awaitable]], repeat: int, label: str) -> None:
+    for name, query in queries.items():
+        latencies: List[float] = []
+        for _ in range(repeat):
+            with timer() as elapsed:
+                await query()
+            latencies.append(elapsed[0])
+        print(format_row(f"[{label}] {name}", summarize(latencies)))
+
+
+async def main(user_count: int, repeat: int) -> None:
+    client = AsyncMongoClient(settings.MONGODB_CONNECTION_STRING)
+    database_name = f"{settings.DATABASE_NAME}_bench_indexes"
+    await client.drop_database(database_name)
+    collections = Collections(client[database_name])
+    try:
+        print(f"Seeding {user_count} users and bookings...")
+        await seed(collections, user_count)
+        queries = hot_queries(collections, user_count)
+
+        await measure(queries, repeat, "no indexes")
+        report = await ensure_indexes(collections.database)
+        print(f"Index report: {report}")
+        await measure(queries, repeat, "indexed")
+    finally:
+        await client.drop_database(database_name)
+        await client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.users, args.repeat))
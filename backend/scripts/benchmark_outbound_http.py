@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Benchmark of Google token verification ("tokeninfo" mode) against a local stub, comparing a
+new httpx client per login (the old behaviour) with the shared pooled HttpClient.
+
+A small HTTP/1.1 server on localhost plays Google's tokeninfo endpoint and counts the TCP
+connections it accepts. --connect-delay-ms holds every new connection back before answering,
+to stand in for the TCP/TLS handshake round trips a real upstream costs. Loopback connections
+are otherwise nearly free, so without it the difference is mostly the client setup.
+
+The last phase points the shared client at a stub that accepts but never answers and shows
+the circuit breaker: the first HTTP_BREAKER_FAILURES logins wait out the read timeout, the
+rest fail immediately.
+
+Usage (from the backend directory; no MongoDB needed):
+
+    python -m scripts.benchmark_outbound_http --logins 1000 --connect-delay-ms 20
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from typing import List
+
+import httpx
+from app.core.config import settings
+from app.core.http_client import HttpClient, UpstreamUnavailable
+from app.services.auth import AuthService
+from scripts.benchmark_utils import format_row, summarize
+
+TOKENINFO = {"sub": "bench-google-id", "email": "bench@example.com", "name": "Bench User", "aud": "bench"}
+
+
+class StubServer:
+    """Answers every request with TOKENINFO over keep-alive connections, counting connections."""
+
+    def __init__(self, connect_delay: float = 0.0, respond: bool = True) -> None:
+        self.connect_delay = connect_delay
+        self.respond = respond
+        self.connections = 0
+        self.requests = 0
+        self.server: asyncio.AbstractServer
+
+    async def start(self) -> str:
+        self.server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        port = self.server.sockets[0].getsockname()[1]
+        return f"http://127.0.0.1:{port}/tokeninfo"
+
+    async def stop(self) -> None:
+        self.server.close()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+        body = json.dumps(TOKENINFO).encode()
+        try:
+            await asyncio.sleep(self.connect_delay)
+            while True:
+                await reader.readuntil(b"\r\n\r\n")
+                self.requests += 1
+                if not self.respond:
+                    await asyncio.sleep(3600)
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                    + f"Content-Length: {len(body)}\r\n\r\n".encode()
+                    + body
+                )
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+
+
+async def client_per_login(url: str, logins: int) -> List[float]:
+    latencies = []
+    for _ in range(logins):
+        start = time.perf_counter()
+        async with httpx.AsyncClient() as client:
+            response = await client.get(url, params={"id_token": "bench"})
+        response.json()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+async def shared_client(service: AuthService, logins: int) -> List[float]:
+    latencies = []
+    for _ in range(logins):
+        start = time.perf_counter()
+        await service.verify_google_token("bench")
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def auth_service_for(url: str, http: HttpClient) -> AuthService:
+    service = AuthService(http=http)
+    service.google_token_verification = "tokeninfo"
+    service.google_tokeninfo_url = url
+    return service
+
+
+async def run(logins: int, connect_delay_ms: float, read_timeout: float) -> None:
+    stub = StubServer(connect_delay_ms / 1000)
+    url = await stub.start()
+    print(f"{logins} sequential logins, {connect_delay_ms:g} ms per new connection\n")
+
+    latencies = await client_per_login(url, logins)
+    print(format_row("new client per login", summarize(latencies)) + f"  connections={stub.connections}")
+
+    stub.connections = 0
+    http = HttpClient()
+    latencies = await shared_client(auth_service_for(url, http), logins)
+    print(format_row("shared HttpClient", summarize(latencies)) + f"  connections={stub.connections}")
+    await http.stop()
+    await stub.stop()
+
+    settings.HTTP_READ_TIMEOUT_SECONDS = read_timeout
+    dead = StubServer(respond=False)
+    service = auth_service_for(await dead.start(), HttpClient())
+    print(
+        f"\nUnresponsive upstream, {read_timeout:g} s read timeout, breaker opens after {settings.HTTP_BREAKER_FAILURES}"
+    )
+    for attempt in range(settings.HTTP_BREAKER_FAILURES + 3):
+        start = time.perf_counter()
+        try:
+            await service.verify_google_token("bench")
+            outcome = "ok"
+        except UpstreamUnavailable as e:
+            outcome = str(e)[:60]
+        print(f"  login {attempt + 1:>2}: {(time.perf_counter() - start) * 1000:>8.1f} ms  {outcome}")
+    await service.http.stop()
+    await dead.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=1000)
+    parser.add_argument("--connect-delay-ms", type=float, default=0.0)
+    parser.add_argument("--read-timeout", type=float, default=0.5, help="read timeout for the breaker phase")
+    args = parser.parse_args()
+    asyncio.run(run(args.logins, args.connect_delay_ms, args.read_timeout))
+
+
+if __name__ == "__main__":
+    main()
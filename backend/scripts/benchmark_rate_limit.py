@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark of the rate limiter's per-request cost.
+
+Measures, without MongoDB or a network:
+
+  bucket take        TokenBuckets.take on one hot key and spread over --keys callers
+  middleware         one request through RateLimitMiddleware in front of an empty ASGI app,
+                     anonymous (keyed by IP) and with a bearer token (keyed by user), against
+                     the same empty app without the middleware
+  shared buckets     the Redis token-bucket script, when --redis-url is given (one round trip)
+
+Numbers are microseconds per call, the median of --repeat rounds of --calls calls each.
+
+Usage (from the backend directory):
+
+    python -m scripts.benchmark_rate_limit
+    python -m scripts.benchmark_rate_limit --redis-url redis://localhost:6379/0
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from typing import Awaitable, Callable, Optional
+
+from app.api.auth import token_subject
+from app.core.coordination import MemoryBackend, RedisBackend
+from app.core.rate_limit import Budget, RateLimitMiddleware, TokenBuckets
+from scripts.benchmark_utils import bench_token, bench_user
+
+# Generous budgets: the benchmark measures the check, not the 429 path
+BUDGETS = {name: Budget(1e9, 10**9) for name in ("public", "bookings", "admin")}
+
+
+def per_call_us(run: Callable[[int], None], calls: int, repeat: int) -> float:
+    rounds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run(calls)
+        rounds.append((time.perf_counter() - start) / calls * 1_000_000)
+    return statistics.median(rounds)
+
+
+async def per_call_us_async(run: Callable[[int], Awaitable[None]], calls: int, repeat: int) -> float:
+    rounds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await run(calls)
+        rounds.append((time.perf_counter() - start) / calls * 1_000_000)
+    return statistics.median(rounds)
+
+
+def row(label: str, us: float, baseline: Optional[float] = None) -> str:
+    extra = f"  (+{us - baseline:.2f} us over no limiter)" if baseline is not None else ""
+    return f"{label:<40} {us:>8.2f} us{extra}"
+
+
+def bench_buckets(keys: int, calls: int, repeat: int) -> None:
+    buckets = TokenBuckets(max_keys=keys * 2)
+    names = [f"public:ip:10.0.{i // 256}.{i % 256}" for i in range(keys)]
+
+    def hot(n: int) -> None:
+        for _ in range(n):
+            buckets.take("public:ip:10.0.0.1", 1e9, 10**9)
+
+    def spread(n: int) -> None:
+        for i in range(n):
+            buckets.take(names[i % keys], 1e9, 10**9)
+
+    print(row("bucket take, one key", per_call_us(hot, calls, repeat)))
+    print(row(f"bucket take, {keys} keys", per_call_us(spread, calls, repeat)))
+
+
+async def bench_middleware(calls: int, repeat: int) -> None:
+    async def endpoint(scope, receive, send) -> None:
+        pass
+
+    async def receive() -> dict:
+        return {"type": "http.request", "body": b""}
+
+    async def send(message) -> None:
+        pass
+
+    limited = RateLimitMiddleware(endpoint, backend=MemoryBackend(), identify=token_subject, budgets=BUDGETS)
+    token = bench_token(bench_user(0))
+
+    def scope(headers) -> dict:
+        return {
+            "type": "http",
+            "method": "GET",
+            "path": "/api/v1/bookings/my-booking",
+            "headers": headers,
+            "client": ("203.0.113.7", 50000),
+        }
+
+    anonymous = scope([(b"host", b"api"), (b"accept", b"application/json")])
+    authenticated = scope([(b"host", b"api"), (b"authorization", f"Bearer {token}".encode())])
+
+    def through(app, request_scope):
+        async def run(n: int) -> None:
+            for _ in range(n):
+                await app(request_scope, receive, send)
+
+        return run
+
+    baseline = await per_call_us_async(through(endpoint, anonymous), calls, repeat)
+    print(row("no limiter", baseline))
+    print(
+        row("middleware, anonymous (IP)", await per_call_us_async(through(limited, anonymous), calls, repeat), baseline)
+    )
+    await limited(authenticated, receive, send)  # first sight of a token verifies its signature
+    print(
+        row(
+            "middleware, bearer token (user)",
+            await per_call_us_async(through(limited, authenticated), calls, repeat),
+            baseline,
+        )
+    )
+
+
+async def bench_redis(url: str, calls: int, repeat: int) -> None:
+    backend = RedisBackend(url, "bench-ratelimit:")
+    await backend.start()
+    try:
+
+        async def run(n: int) -> None:
+            for _ in range(n):
+                await backend.take_token("public:ip:10.0.0.1", 1e9, 10**9)
+
+        print(row("shared bucket take (Redis)", await per_call_us_async(run, calls, repeat)))
+    finally:
+        await backend.client.delete("bench-ratelimit:ratelimit:public:ip:10.0.0.1")
+        await backend.stop()
+
+
+async def main(keys: int, calls: int, repeat: int, redis_url: Optional[str]) -> None:
+    bench_buckets(keys, calls, repeat)
+    await bench_middleware(calls, repeat)
+    if redis_url:
+        await bench_redis(redis_url, max(1, calls // 20), repeat)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--keys", type=int, default=10000, help="distinct callers for the spread bucket test")
+    parser.add_argument("--calls", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--redis-url", default=None)
+    args = parser.parse_args()
+    asyncio.run(main(args.keys, args.calls, args.repeat, args.redis_url))
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Database round trips per booking endpoint.
+
+Runs the app in-process (httpx ASGI transport) on a MongoDB client with a command listener,
+creates, moves and cancels a booking for a benchmark user, and prints the commands each
+request sent to MongoDB. Reference data (days and festivals) is loaded first, as it is at
+startup.
+
+Usage (from the backend directory, with MongoDB running):
+
+    python -m scripts.benchmark_round_trips
+"""
+
+import argparse
+import asyncio
+from collections import Counter
+from datetime import datetime
+from typing import List
+
+import httpx
+from app.core.config import settings
+from app.core.database import Collections, db
+from app.main import app
+from app.services.reference_data import reference_data
+from pymongo import AsyncMongoClient, monitoring
+from scripts.benchmark_utils import BENCH_PREFIX, bench_token, cleanup, seed_users
+
+# Commands the driver sends on its own (handshakes, monitoring) rather than for a request
+_IGNORED = {"hello", "isMaster", "ismaster", "ping", "endSessions"}
+
+
+class CommandLog(monitoring.CommandListener):
+    def __init__(self):
+        self.commands: List[str] = []
+
+    def started(self, event):
+        if event.command_name not in _IGNORED:
+            self.commands.append(f"{event.command_name}:{event.command.get(event.command_name)}")
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+async def main(email_opt_in: bool) -> None:
+    log = CommandLog()
+    client = AsyncMongoClient(settings.MONGODB_CONNECTION_STRING, event_listeners=[log])
+    db.client = client
+    db.collections = collections = Collections(client[settings.DATABASE_NAME])
+    festival_id = f"{BENCH_PREFIX}festival"
+    day_ids = [f"{BENCH_PREFIX}day-{i}" for i in range(2)]
+    try:
+        await cleanup(collections)
+        await collections.festivals.insert_one({"festival_id": festival_id, "price": 50.0, "location": "Bench"})
+        await collections.days.insert_many(
+            [
+                {
+                    "day_id": day_id,
+                    "festival_id": festival_id,
+                    "date": datetime(2030, 1, i + 1),
+                    "theme": f"Theme {i}",
+                    "menu": "Benchmark menu",
+                    "tickets_sold": 0,
+                    "capacity": 6,
+                }
+                for i, day_id in enumerate(day_ids)
+            ]
+        )
+        (user,) = await seed_users(collections, 1)
+        await collections.users.update_one({"user_id": user["user_id"]}, {"$set": {"email_opt_in": email_opt_in}})
+        await reference_data.load(collections)
+        headers = {"Authorization": f"Bearer {bench_token(user)}"}
+
+        requests = [
+            ("POST", "/api/v1/bookings/", {"day_id": day_ids[0]}),
+            ("GET", "/api/v1/bookings/my-booking", None),
+            ("PUT", "/api/v1/bookings/my-booking", {"day_id": day_ids[1]}),
+            ("PUT", "/api/v1/bookings/my-booking", {"day_id": day_ids[1]}),
+            ("DELETE", "/api/v1/bookings/my-booking", None),
+        ]
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://round-trips") as http:
+            # Warm the authenticated-user cache so only the endpoint's own queries are counted
+            await http.get("/api/v1/auth/me", headers=headers)
+            for method, url, body in requests:
+                log.commands.clear()
+                response = await http.request(method, url, json=body, headers=headers)
+                counts = Counter(command.split(":")[0] for command in log.commands)
+                writes = sum(counts[name] for name in ("insert", "update", "delete", "findAndModify"))
+                print(
+                    f"{method:<6} {url:<30} {response.status_code}  round_trips={len(log.commands)}  "
+                    f"writes={writes}  {', '.join(log.commands)}"
+                )
+    finally:
+        await cleanup(collections)
+        await collections.festivals.delete_one({"festival_id": festival_id})
+        await client.close()
+        db.client = None
+        db.collections = None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--no-email", action="store_true", help="Opt the benchmark user out of emails")
+    args = parser.parse_args()
+    asyncio.run(main(not args.no_email))
@@ -0,0 +1,88 @@
+"""
+Shared helpers for the benchmark and load-test scripts.
+
+Run the scripts from the backend directory as modules, e.g.
+``python -m scripts.benchmark_concurrency``, so both ``app`` and ``scripts`` are importable.
+"""
+
+import math
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterator, List, Sequence
+
+from app.core.database import Collections
+from app.services.auth import auth_service
+
+BENCH_PREFIX = "bench-"
+
+
+def percentile(samples: Sequence[float], pct: float) -> float:
+    """Nearest-rank percentile of ``samples`` (pct in 0-100)."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize(latencies_ms: Sequence[float]) -> Dict[str, float]:
+    return {
+        "n": len(latencies_ms),
+        "p50": percentile(latencies_ms, 50),
+        "p99": percentile(latencies_ms, 99),
+        "max": max(latencies_ms) if latencies_ms else 0.0,
+    }
+
+
+def format_row(label: str, stats: Dict[str, float]) -> str:
+    return (
+        f"{label:<40} n={int(stats['n']):>6}  p50={stats['p50']:>8.2f} ms  "
+        f"p99={stats['p99']:>8.2f} ms  max={stats['max']:>8.2f} ms"
+    )
+
+
+@contextmanager
+def timer() -> Iterator[List[float]]:
+    """Yield a one-element list that receives the elapsed milliseconds on exit."""
+    elapsed: List[float] = [0.0]
+    start = time.perf_counter()
+    try:
+        yield elapsed
+    finally:
+        elapsed[0] = (time.perf_counter() - start) * 1000
+
+
+def bench_user(index: int) -> Dict:
+    now = datetime.utcnow()
+    return {
+        "user_id": f"{BENCH_PREFIX}{uuid.uuid4()}",
+        "google_id": f"{BENCH_PREFIX}{index}",
+        "email": f"bench{index}@example.com",
+        "name": f"Bench User {index}",
+        "email_opt_in": False,
+        "is_admin": False,
+        "created_at": now,
+        "updated_at": now,
+    }
+
+
+def bench_token(user: Dict) -> str:
+    return auth_service.create_access_token(data={"sub": user["google_id"], "email": user["email"]})
+
+
+async def seed_users(collections: Collections, count: int) -> List[Dict]:
+    users = [bench_user(i) for i in range(count)]
+    if users:
+        await collections.users.insert_many([dict(u) for u in users])
+    return users
+
+
+async def cleanup(collections: Collections) -> None:
+    """Remove every document created by the benchmark helpers."""
+    prefix = {"$regex": f"^{BENCH_PREFIX}"}
+    await collections.bookings.delete_many({"user_id": prefix})
+    await collections.users.delete_many({"google_id": prefix})
+    await collections.days.delete_many({"day_id": prefix})
+    await collections.waitlist.delete_many({"day_id": prefix})
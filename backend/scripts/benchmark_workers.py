@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Throughput benchmark of serve.py with one and with several worker processes.
+
+For each worker count, starts ``python serve.py --workers N`` on --port, waits for /health,
+then drives --concurrency clients against each endpoint for --seconds and reports requests
+per second and latency. Use a client machine (or --concurrency) big enough to saturate the server.
+
+Usage (from the backend directory, with MongoDB running; add COORDINATION_BACKEND=redis and
+a Redis server to include the shared backend in the measurement):
+
+    python -m scripts.benchmark_workers --workers 1 4 --concurrency 100 --seconds 10
+"""
+
+import argparse
+import asyncio
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import List
+
+import httpx
+from scripts.benchmark_utils import format_row, summarize
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+ENDPOINTS = ["/health", "/api/v1/festival/days", "/api/v1/festival/availability"]
+
+
+async def wait_until_up(client: httpx.AsyncClient, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if (await client.get("/health")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError("Server did not come up")
+
+
+async def drive(client: httpx.AsyncClient, url: str, concurrency: int, seconds: float) -> List[float]:
+    latencies: List[float] = []
+    deadline = time.perf_counter() + seconds
+
+    async def worker() -> None:
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            response = await client.get(url)
+            latencies.append((time.perf_counter() - start) * 1000)
+            response.raise_for_status()
+
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    return latencies
+
+
+async def run(workers: int, port: int, concurrency: int, seconds: float) -> None:
+    server = subprocess.Popen(
+        [sys.executable, "serve.py", "--workers", str(workers), "--port", str(port)],
+        cwd=BACKEND_DIR,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=30) as client:
+            await wait_until_up(client)
+            for url in ENDPOINTS:
+                latencies = await drive(client, url, concurrency, seconds)
+                print(
+                    format_row(f"workers={workers} {url}", summarize(latencies))
+                    + f"  {len(latencies) / seconds:>8.0f} req/s"
+                )
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+async def main(worker_counts: List[int], port: int, concurrency: int, seconds: float) -> None:
+    for workers in worker_counts:
+        await run(workers, port, concurrency, seconds)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    args = parser.parse_args()
+    asyncio.run(main(args.workers, args.port, args.concurrency, args.seconds))
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Load test of the booking waiting room during a ticket release.
+
+Creates --days benchmark days with --capacity seats each and --users benchmark users, then
+fires one concurrent POST /api/v1/bookings/ per user at the app (in-process, httpx ASGI
+transport), twice:
+
+  no waiting room  availability broker stopped and no concurrency limit: every request
+                   reaches MongoDB
+  waiting room     broker running, ADMISSION_MAX_ACTIVE attempts at a time, full days
+                   answered from memory
+
+For each run it prints the status codes, latency and the MongoDB commands sent to the days
+and bookings collections (user lookups for authentication are not counted), and checks that
+no day was oversold.
+
+Usage (from the backend directory, with MongoDB running):
+
+    python -m scripts.loadtest_admission --users 10000 --days 3 --capacity 6
+"""
+
+import argparse
+import asyncio
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List
+
+import httpx
+from app.core.config import settings
+from app.core.database import Collections, db
+from app.main import app
+from app.services.admission import admission
+from app.services.availability import availability_broker
+from app.services.reference_data import reference_data
+from pymongo import AsyncMongoClient, monitoring
+from scripts.benchmark_utils import BENCH_PREFIX, bench_token, cleanup, format_row, seed_users, summarize
+
+COUNTED = {"days", "bookings"}
+
+
+class CommandCount(monitoring.CommandListener):
+    def __init__(self) -> None:
+        self.commands: Counter = Counter()
+
+    def started(self, event):
+        if event.command.get(event.command_name) in COUNTED:
+            self.commands[f"{event.command_name}:{event.command[event.command_name]}"] += 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+async def seed_days(collections: Collections, count: int, capacity: int) -> List[str]:
+    day_ids = [f"{BENCH_PREFIX}release-day-{i}" for i in range(count)]
+    await collections.days.delete_many({"day_id": {"$in": day_ids}})
+    await collections.bookings.delete_many({"day_id": {"$in": day_ids}})
+    await collections.days.insert_many(
+        [
+            {
+                "day_id": day_id,
+                "festival_id": f"{BENCH_PREFIX}festival",
+                "date": datetime(2030, 1, i + 1),
+                "theme": "Load test",
+                "menu": "Load test",
+                "tickets_sold": 0,
+                "capacity": capacity,
+            }
+            for i, day_id in enumerate(day_ids)
+        ]
+    )
+    return day_ids
+
+
+async def release(
+    collections: Collections, log: CommandCount, users: List[Dict], day_ids: List[str], capacity: int
+) -> None:
+    await collections.bookings.delete_many({"day_id": {"$in": day_ids}})
+    await collections.days.update_many({"day_id": {"$in": day_ids}}, {"$set": {"tickets_sold": 0}})
+    if availability_broker.source != "stopped":
+        await availability_broker.load(collections.days)
+    headers = [{"Authorization": f"Bearer {bench_token(user)}"} for user in users]
+    latencies: List[float] = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://admission", timeout=600) as client:
+
+        async def book(i: int) -> int:
+            start = time.perf_counter()
+            response = await client.post(
+                "/api/v1/bookings/", json={"day_id": day_ids[i % len(day_ids)]}, headers=headers[i]
+            )
+            latencies.append((time.perf_counter() - start) * 1000)
+            return response.status_code
+
+        log.commands.clear()
+        start = time.perf_counter()
+        statuses = Counter(await asyncio.gather(*[book(i) for i in range(len(users))]))
+        elapsed = time.perf_counter() - start
+
+    sold = {day["day_id"]: day["tickets_sold"] async for day in collections.days.find({"day_id": {"$in": day_ids}})}
+    stored = await collections.bookings.count_documents({"day_id": {"$in": day_ids}})
+    print(format_row("booking request", summarize(latencies)) + f"  wall={elapsed:.1f} s")
+    print(f"  statuses: {dict(sorted(statuses.items()))}")
+    print(f"  MongoDB commands on days/bookings: {sum(log.commands.values())}  {dict(log.commands)}")
+    oversold = [day_id for day_id, count in sold.items() if count > capacity]
+    ok = not oversold and stored == sum(sold.values()) == statuses.get(200, 0)
+    print(f"  bookings stored: {stored}  {'ok' if ok else f'MISMATCH, oversold: {oversold}'}")
+
+
+async def main(user_count: int, day_count: int, capacity: int) -> None:
+    log = CommandCount()
+    client = AsyncMongoClient(settings.MONGODB_CONNECTION_STRING, event_listeners=[log])
+    db.client = client
+    db.collections = collections = Collections(client[settings.DATABASE_NAME])
+    try:
+        await cleanup(collections)
+        day_ids = await seed_days(collections, day_count, capacity)
+        users = await seed_users(collections, user_count)
+        await reference_data.load(collections)
+        print(f"{user_count} users, {day_count} days x {capacity} seats\n")
+
+        print("no waiting room")
+        admission.max_active = user_count
+        await release(collections, log, users, day_ids, capacity)
+
+        print(f"\nwaiting room (ADMISSION_MAX_ACTIVE={settings.ADMISSION_MAX_ACTIVE})")
+        admission.max_active = settings.ADMISSION_MAX_ACTIVE
+        settings.AVAILABILITY_SOURCE = "local"
+        await availability_broker.start(collections.days)
+        await release(collections, log, users, day_ids, capacity)
+        print(f"  admission: {admission.stats()}")
+    finally:
+        await availability_broker.stop()
+        await cleanup(collections)
+        await client.close()
+        db.client = None
+        db.collections = None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--days", type=int, default=3)
+    parser.add_argument("--capacity", type=int, default=6)
+    args = parser.parse_args()
+    asyncio.run(main(args.users, args.days, args.capacity))
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Load test of the live availability stream with many idle subscribers.
+
+Opens --subscribers streams of /api/v1/festival/availability/stream in-process (the same
+generators the endpoint serves, without sockets), lets them sit idle, then publishes
+--updates seat changes in quick bursts. Reports memory per idle subscriber and the time
+until every subscriber has received each burst.
+
+Usage (from the backend directory; no database needed):
+
+    python -m scripts.loadtest_availability_stream --subscribers 5000 --updates 200
+"""
+
+import argparse
+import asyncio
+import time
+import tracemalloc
+from datetime import datetime
+from typing import List
+
+from app.api.festival import stream_ticket_availability
+from app.services.availability import availability_broker
+from scripts.benchmark_utils import format_row, summarize
+
+DAY_COUNT = 5
+CAPACITY = 6
+
+
+def day(index: int, tickets_sold: int) -> dict:
+    return {
+        "day_id": str(index + 1),
+        "date": datetime(2030, 1, index + 1),
+        "tickets_sold": tickets_sold,
+        "capacity": CAPACITY,
+    }
+
+
+async def main(subscriber_count: int, updates: int, burst: int) -> None:
+    availability_broker.source = "local"
+    for index in range(DAY_COUNT):
+        availability_broker.notify(day(index, 0))
+
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    streams = [(await stream_ticket_availability()).body_iterator for _ in range(subscriber_count)]
+    for stream in streams:
+        await stream.__anext__()  # snapshot; the stream is now subscribed and idle
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{subscriber_count} idle subscribers: {(after - before) / subscriber_count / 1024:.1f} KiB each")
+
+    # Each burst is coalesced into a single event per subscriber; count who has seen the current one
+    received = [0] * subscriber_count
+    caught_up = 0
+    target = 0
+    done = asyncio.Event()
+
+    async def consume(i: int) -> None:
+        nonlocal caught_up
+        async for message in streams[i]:
+            if message.startswith("event: availability"):
+                received[i] += 1
+                if received[i] == target:
+                    caught_up += 1
+                    if caught_up == subscriber_count:
+                        done.set()
+
+    consumers = [asyncio.create_task(consume(i)) for i in range(subscriber_count)]
+    await asyncio.sleep(0)
+
+    latencies: List[float] = []
+    sold = [0] * DAY_COUNT
+    for start in range(0, updates, burst):
+        target += 1
+        caught_up = 0
+        done.clear()
+        begin = time.perf_counter()
+        for n in range(start, min(start + burst, updates)):
+            index = n % DAY_COUNT
+            sold[index] = (sold[index] + 1) % (CAPACITY + 1)
+            availability_broker.notify(day(index, sold[index]))
+        await done.wait()
+        latencies.append((time.perf_counter() - begin) * 1000)
+
+    print(format_row(f"fan-out of {burst} updates", summarize(latencies)))
+    print(f"broker: {availability_broker.stats()}")
+    for task in consumers:
+        task.cancel()
+    await asyncio.gather(*consumers, return_exceptions=True)
+    for stream in streams:
+        await stream.aclose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--subscribers", type=int, default=5000)
+    parser.add_argument("--updates", type=int, default=200)
+    parser.add_argument("--burst", type=int, default=10, help="Updates published back to back per round")
+    args = parser.parse_args()
+    asyncio.run(main(args.subscribers, args.updates, args.burst))
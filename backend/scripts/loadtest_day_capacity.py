@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Load test proving that a day can never be oversold.
+
+Creates a benchmark day with 6 seats and 1,000 benchmark users, fires one concurrent
+POST /api/v1/bookings/ per user at a running API, and checks that exactly `capacity`
+bookings succeed and that the day's tickets_sold counter matches the bookings stored.
+
+Usage (from the backend directory, with the API and MongoDB running):
+
+    python -m scripts.loadtest_day_capacity --base-url http://localhost:8000 --users 1000
+"""
+
+import argparse
+import asyncio
+import sys
+from datetime import datetime
+
+import httpx
+from app.core.database import close_mongo_connection, connect_to_mongo, get_collections
+from scripts.benchmark_utils import BENCH_PREFIX, bench_token, cleanup, seed_users
+
+DAY_ID = f"{BENCH_PREFIX}capacity-day"
+
+
+async def main(base_url: str, user_count: int, capacity: int) -> bool:
+    await connect_to_mongo()
+    collections = get_collections()
+    await cleanup(collections)
+    try:
+        festival = await collections.festivals.find_one({}) or {}
+        await collections.days.insert_one(
+            {
+                "day_id": DAY_ID,
+                "festival_id": festival.get("festival_id", f"{BENCH_PREFIX}festival"),
+                "date": datetime(2030, 1, 1),
+                "theme": "Load test",
+                "menu": "Load test",
+                "tickets_sold": 0,
+                "capacity": capacity,
+            }
+        )
+        users = await seed_users(collections, user_count)
+
+        limits = httpx.Limits(max_connections=200)
+        async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120) as client:
+            responses = await asyncio.gather(
+                *[
+                    client.post(
+                        "/api/v1/bookings/",
+                        json={"day_id": DAY_ID},
+                        headers={"Authorization": f"Bearer {bench_token(user)}"},
+                    )
+                    for user in users
+                ]
+            )
+
+        statuses: dict = {}
+        for response in responses:
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+        succeeded = statuses.get(200, 0)
+        stored = await collections.bookings.count_documents({"day_id": DAY_ID})
+        day = await collections.days.find_one({"day_id": DAY_ID})
+
+        print(f"Statuses: {statuses}")
+        print(f"Succeeded: {succeeded}  bookings stored: {stored}  tickets_sold: {day['tickets_sold']}")
+        ok = succeeded == stored == day["tickets_sold"] == capacity
+        print("✅ exactly capacity bookings succeeded" if ok else "❌ capacity was not enforced")
+        return ok
+    finally:
+        await cleanup(collections)
+        await close_mongo_connection()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--capacity", type=int, default=6)
+    args = parser.parse_args()
+    sys.exit(0 if asyncio.run(main(args.base_url, args.users, args.capacity)) else 1)
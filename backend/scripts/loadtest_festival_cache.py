@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Load test of the cached public festival endpoints.
+
+Serves the app in-process (httpx ASGI transport, so the HTTP stack is included but no
+sockets) and drives /api/v1/festival/info, /days and /availability with --concurrency
+clients for --seconds each, in three modes:
+
+  uncached     the response cache is invalidated before every request
+  cached       plain GETs answered from the pre-serialized cache
+  conditional  GETs with If-None-Match, answered with 304
+
+Usage (from the backend directory, with MongoDB running and the database populated):
+
+    python -m scripts.loadtest_festival_cache --concurrency 50 --seconds 5
+"""
+
+import argparse
+import asyncio
+import time
+from typing import Dict, List
+
+import httpx
+from app.api.festival import invalidate_public_responses
+from app.core.database import close_mongo_connection, connect_to_mongo, get_collections
+from app.main import app
+from app.services.availability import availability_broker
+from scripts.benchmark_utils import format_row, summarize
+
+ENDPOINTS = ["/api/v1/festival/info", "/api/v1/festival/days", "/api/v1/festival/availability"]
+MODES = ["uncached", "cached", "conditional"]
+
+
+async def run(client: httpx.AsyncClient, url: str, mode: str, concurrency: int, seconds: float) -> None:
+    etag = (await client.get(url)).headers.get("etag", "")
+    headers: Dict[str, str] = {"If-None-Match": etag} if mode == "conditional" else {}
+    expected = 304 if mode == "conditional" else 200
+    latencies: List[float] = []
+    deadline = time.perf_counter() + seconds
+
+    async def worker() -> None:
+        while time.perf_counter() < deadline:
+            if mode == "uncached":
+                invalidate_public_responses()
+            start = time.perf_counter()
+            response = await client.get(url, headers=headers)
+            latencies.append((time.perf_counter() - start) * 1000)
+            if response.status_code != expected:
+                raise RuntimeError(f"{url} ({mode}) answered {response.status_code}")
+
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    label = f"{url.rsplit('/', 1)[-1]} {mode}"
+    print(format_row(label, summarize(latencies)) + f"  {len(latencies) / seconds:>8.0f} req/s")
+
+
+async def main(concurrency: int, seconds: float) -> None:
+    await connect_to_mongo()
+    await availability_broker.start(get_collections().days)
+    transport = httpx.ASGITransport(app=app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadtest") as client:
+            for url in ENDPOINTS:
+                for mode in MODES:
+                    await run(client, url, mode, concurrency, seconds)
+    finally:
+        await availability_broker.stop()
+        await close_mongo_connection()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    args = parser.parse_args()
+    asyncio.run(main(args.concurrency, args.seconds))
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Load test of a ticket release with and without seat holds.
+
+Creates --days benchmark days with --capacity seats each and --users benchmark users. Every user
+checks /festival/availability, picks a day that shows seats left, spends a random sign-in time
+of up to --checkout-ms, and then books, all at once through the app in-process (httpx ASGI
+transport, one client address per user):
+
+  no holds    the seat is only taken by POST /bookings/, after sign-in
+  holds       POST /bookings/holds first (anonymously, as before sign-in), then the booking
+              converts the hold
+
+For each run it prints how many users booked, how many were told the day was full before
+signing in, and how many signed in and then lost the seat at checkout, and checks that no day
+was oversold. Set SEAT_HOLD_TTL_SECONDS above --checkout-ms.
+
+Usage (from the backend directory, with MongoDB running):
+
+    python -m scripts.loadtest_seat_holds --users 500 --days 3 --capacity 6 --checkout-ms 2000
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List
+
+import httpx
+from app.core.config import settings
+from app.core.database import Collections, db
+from app.main import app
+from app.services.availability import availability_broker
+from app.services.reference_data import reference_data
+from pymongo import AsyncMongoClient
+from scripts.benchmark_utils import BENCH_PREFIX, bench_token, cleanup, format_row, seed_users, summarize
+
+
+async def seed_days(collections: Collections, count: int, capacity: int) -> List[str]:
+    day_ids = [f"{BENCH_PREFIX}hold-day-{i}" for i in range(count)]
+    await collections.days.delete_many({"day_id": {"$in": day_ids}})
+    await collections.days.insert_many(
+        [
+            {
+                "day_id": day_id,
+                "festival_id": f"{BENCH_PREFIX}festival",
+                "date": datetime(2030, 1, i + 1),
+                "theme": "Seat holds",
+                "menu": "Seat holds",
+                "tickets_sold": 0,
+                "capacity": capacity,
+            }
+            for i, day_id in enumerate(day_ids)
+        ]
+    )
+    return day_ids
+
+
+def client_address(index: int) -> str:
+    return f"10.{index // 65536 % 256}.{index // 256 % 256}.{index % 256}"
+
+
+async def release(
+    collections: Collections, users: List[Dict], day_ids: List[str], checkout_ms: float, use_holds: bool
+) -> None:
+    await collections.bookings.delete_many({"day_id": {"$in": day_ids}})
+    await collections.days.update_many(
+        {"day_id": {"$in": day_ids}}, {"$set": {"tickets_sold": 0}, "$unset": {"holds": ""}}
+    )
+    await availability_broker.load(collections.days)
+    outcomes: Counter = Counter()
+    latencies: List[float] = []
+
+    async def guest(i: int, user: Dict) -> None:
+        transport = httpx.ASGITransport(app=app, client=(client_address(i), 50000))
+        async with httpx.AsyncClient(transport=transport, base_url="http://holds", timeout=600) as client:
+            shown = (await client.get("/api/v1/festival/availability")).json()
+            open_days = [day["day_id"] for day in shown if day["day_id"] in day_ids and day["available"] > 0]
+            if not open_days:
+                outcomes["saw sold out"] += 1
+                return
+            day_id = random.choice(open_days)
+            body = {"day_id": day_id}
+            if use_holds:
+                hold = await client.post("/api/v1/bookings/holds", json=body)
+                if hold.status_code != 200:
+                    outcomes[f"hold refused ({hold.status_code})"] += 1
+                    return
+                body["hold_id"] = hold.json()["hold_id"]
+            await asyncio.sleep(random.uniform(0, checkout_ms) / 1000)  # signing in
+            start = time.perf_counter()
+            booking = await client.post(
+                "/api/v1/bookings/", json=body, headers={"Authorization": f"Bearer {bench_token(user)}"}
+            )
+            latencies.append((time.perf_counter() - start) * 1000)
+            outcomes["booked" if booking.status_code == 200 else f"lost at checkout ({booking.status_code})"] += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*[guest(i, user) for i, user in enumerate(users)])
+    elapsed = time.perf_counter() - start
+
+    sold = {day["day_id"]: day for day in await collections.days.find({"day_id": {"$in": day_ids}}).to_list()}
+    stored = await collections.bookings.count_documents({"day_id": {"$in": day_ids}})
+    print(format_row("booking request", summarize(latencies)) + f"  wall={elapsed:.1f} s")
+    print(f"  outcomes: {dict(sorted(outcomes.items()))}")
+    oversold = [day_id for day_id, day in sold.items() if day["tickets_sold"] > day["capacity"]]
+    ok = not oversold and stored == sum(day["tickets_sold"] for day in sold.values()) == outcomes["booked"]
+    print(f"  bookings stored: {stored}  {'ok' if ok else f'MISMATCH, oversold: {oversold}'}")
+
+
+async def main(user_count: int, day_count: int, capacity: int, checkout_ms: float) -> None:
+    client = AsyncMongoClient(settings.MONGODB_CONNECTION_STRING)
+    db.client = client
+    db.collections = collections = Collections(client[settings.DATABASE_NAME])
+    settings.AVAILABILITY_SOURCE = "local"
+    try:
+        await cleanup(collections)
+        day_ids = await seed_days(collections, day_count, capacity)
+        users = await seed_users(collections, user_count)
+        await reference_data.load(collections)
+        await availability_broker.start(collections.days)
+        print(f"{user_count} users, {day_count} days x {capacity} seats, sign-in up to {checkout_ms:.0f} ms\n")
+        print("no holds")
+        await release(collections, users, day_ids, checkout_ms, use_holds=False)
+        print(f"\nholds (SEAT_HOLD_TTL_SECONDS={settings.SEAT_HOLD_TTL_SECONDS:g})")
+        await release(collections, users, day_ids, checkout_ms, use_holds=True)
+    finally:
+        await availability_broker.stop()
+        await cleanup(collections)
+        await client.close()
+        db.client = None
+        db.collections = None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--days", type=int, default=3)
+    parser.add_argument("--capacity", type=int, default=6)
+    parser.add_argument("--checkout-ms", type=float, default=2000)
+    args = parser.parse_args()
+    asyncio.run(main(args.users, args.days, args.capacity, args.checkout_ms))
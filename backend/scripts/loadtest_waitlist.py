@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Load test of waitlist promotion under concurrent cancellations.
+
+Creates one benchmark day with --capacity seats, books all of them, and puts --waiting more
+benchmark users on its waitlist (all at once). Then, through the app in-process (httpx ASGI
+transport), every booked user cancels at the same moment while every --leave-every-th waiting
+user leaves the line, and it checks that:
+
+  - each freed seat went to exactly one waiting user, and none was promoted twice
+  - promotions followed the line: the first --capacity users still waiting got the seats
+  - the day holds as many bookings as ``tickets_sold`` says, within capacity
+  - one promotion email was queued per promotion
+
+This repeats for --rounds rounds. Then it plays through single-seat scenarios that must hand a
+free seat on rather than leave it stuck:
+
+  - an admin raising the capacity of a full day promotes the head of its waitlist
+  - the last waiter leaving while a seat is free puts the seat back on sale
+  - deleting a day takes its waitlist with it
+
+Afterwards it times position lookups at the front and the back of a --depth long line, to show
+the cost does not grow with the position.
+
+Usage (from the backend directory, with MongoDB running):
+
+    python -m scripts.loadtest_waitlist --capacity 50 --waiting 200 --rounds 5 --depth 10000
+"""
+
+import argparse
+import asyncio
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import httpx
+from app.core.config import settings
+from app.core.database import Collections, db
+from app.core.indexes import ensure_indexes
+from app.main import app
+from app.services.availability import availability_broker
+from app.services.email import email_service
+from app.services.reference_data import reference_data
+from app.services.waitlist import waitlist_service
+from pymongo import AsyncMongoClient
+from scripts.benchmark_utils import BENCH_PREFIX, bench_token, cleanup, format_row, seed_users, summarize
+
+DAY_ID = f"{BENCH_PREFIX}waitlist-day"
+
+
+def auth(user: Dict) -> Dict[str, str]:
+    return {"Authorization": f"Bearer {bench_token(user)}"}
+
+
+async def reset(collections: Collections, capacity: int) -> None:
+    await collections.bookings.delete_many({"day_id": DAY_ID})
+    await collections.waitlist.delete_many({"day_id": DAY_ID})
+    await collections.days.delete_many({"day_id": DAY_ID})
+    await collections.days.insert_one(
+        {
+            "day_id": DAY_ID,
+            "festival_id": f"{BENCH_PREFIX}festival",
+            "date": datetime(2030, 1, 1),
+            "theme": "Waitlist",
+            "menu": "Waitlist",
+            "tickets_sold": 0,
+            "capacity": capacity,
+        }
+    )
+    await availability_broker.load(collections.days)
+
+
+async def run_round(
+    client: httpx.AsyncClient,
+    collections: Collections,
+    users: List[Dict],
+    capacity: int,
+    leave_every: int,
+    queued: Counter,
+) -> bool:
+    await reset(collections, capacity)
+    # Opted in, so the promotion emails are counted
+    await collections.users.update_many(
+        {"user_id": {"$in": [user["user_id"] for user in users]}}, {"$set": {"email_opt_in": True}}
+    )
+    booked, waiting = users[:capacity], users[capacity:]
+    for user in booked:
+        response = await client.post("/api/v1/bookings/", json={"day_id": DAY_ID}, headers=auth(user))
+        assert response.status_code == 200, response.text
+    joins = await asyncio.gather(
+        *[client.post("/api/v1/bookings/waitlist", json={"day_id": DAY_ID}, headers=auth(user)) for user in waiting]
+    )
+    assert all(response.status_code == 200 for response in joins), Counter(r.status_code for r in joins)
+
+    # The line in ticket order, and who will leave it while the seats are being freed
+    line = [entry["user_id"] async for entry in collections.waitlist.find({"day_id": DAY_ID}).sort("seq", 1)]
+    by_id = {user["user_id"]: user for user in waiting}
+    leaving = line[::leave_every] if leave_every else []
+
+    queued.clear()
+    start = time.perf_counter()
+    cancels = asyncio.gather(*[client.delete("/api/v1/bookings/my-booking", headers=auth(u)) for u in booked])
+    leaves = asyncio.gather(*[client.delete("/api/v1/bookings/waitlist", headers=auth(by_id[u])) for u in leaving])
+    cancelled, left = await asyncio.gather(cancels, leaves)
+    elapsed = (time.perf_counter() - start) * 1000
+
+    bookings = [booking["user_id"] async for booking in collections.bookings.find({"day_id": DAY_ID})]
+    promoted = Counter(bookings)
+    day = await collections.days.find_one({"day_id": DAY_ID})
+    # Leaving races the promotions, so a leaver may have been promoted first; everyone else in
+    # line order must have been served before anyone behind them
+    left_in_time = {user_id for user_id, response in zip(leaving, left) if response.status_code == 200}
+    expected = [user_id for user_id in line if user_id not in left_in_time][:capacity]
+
+    checks = {
+        "no double promotion": all(count == 1 for count in promoted.values()),
+        "in line order": sorted(promoted) == sorted(expected),
+        "counter matches bookings": day["tickets_sold"] == len(bookings) <= capacity,
+        "one email per promotion": queued["waitlist_promotion"] == len(bookings),
+    }
+    print(
+        f"  {Counter(r.status_code for r in cancelled)} cancellations, {len(left_in_time)} left in time, "
+        f"{len(bookings)} promoted in {elapsed:.0f} ms: "
+        + ", ".join(f"{name} {'ok' if ok else 'FAILED'}" for name, ok in checks.items())
+    )
+    return all(checks.values())
+
+
+async def run_scenarios(client: httpx.AsyncClient, collections: Collections, users: List[Dict]) -> bool:
+    admin, first, second = users[:3]
+    await collections.users.update_one({"user_id": admin["user_id"]}, {"$set": {"is_admin": True}})
+
+    async def booked_day(user: Dict) -> Optional[str]:
+        booking = await collections.bookings.find_one({"user_id": user["user_id"]})
+        return booking and booking["day_id"]
+
+    async def full_day_with_waiter() -> None:
+        await reset(collections, 1)
+        await collections.bookings.delete_many({"user_id": {"$in": [u["user_id"] for u in users]}})
+        response = await client.post("/api/v1/bookings/", json={"day_id": DAY_ID}, headers=auth(first))
+        assert response.status_code == 200, response.text
+        response = await client.post("/api/v1/bookings/waitlist", json={"day_id": DAY_ID}, headers=auth(second))
+        assert response.status_code == 200, response.text
+
+    checks = {}
+    await full_day_with_waiter()
+    response = await client.put(f"/api/v1/admin/days/{DAY_ID}", json={"capacity": 2}, headers=auth(admin))
+    assert response.status_code == 200, response.text
+    checks["capacity raised promotes"] = await booked_day(second) == DAY_ID
+
+    # A hold runs out before anything reports it, so its seat is free while someone waits
+    await reset(collections, 1)
+    response = await client.post("/api/v1/bookings/holds", json={"day_id": DAY_ID})
+    assert response.status_code == 200, response.text
+    response = await client.post("/api/v1/bookings/waitlist", json={"day_id": DAY_ID}, headers=auth(second))
+    assert response.status_code == 200, response.text
+    await collections.days.update_one({"day_id": DAY_ID}, {"$set": {"holds.0.expires_at": datetime(2000, 1, 1)}})
+    await client.delete("/api/v1/bookings/waitlist", headers=auth(second))
+    response = await client.post("/api/v1/bookings/", json={"day_id": DAY_ID}, headers=auth(first))
+    checks["last waiter leaving frees seat"] = response.status_code == 200
+
+    await reset(collections, 0)
+    response = await client.post("/api/v1/bookings/waitlist", json={"day_id": DAY_ID}, headers=auth(second))
+    assert response.status_code == 200, response.text
+    response = await client.delete(f"/api/v1/admin/days/{DAY_ID}", headers=auth(admin))
+    assert response.status_code == 200, response.text
+    waiting = (await client.get("/api/v1/bookings/waitlist", headers=auth(second))).json()
+    checks["deleting a day empties its line"] = waiting is None
+
+    print("  " + ", ".join(f"{name} {'ok' if ok else 'FAILED'}" for name, ok in checks.items()))
+    return all(checks.values())
+
+
+async def time_positions(collections: Collections, depth: int, samples: int) -> None:
+    await reset(collections, 0)
+    now = datetime.utcnow()
+    entries = [
+        {"day_id": DAY_ID, "seq": seq, "user_id": f"{BENCH_PREFIX}line-{seq}", "status": "waiting", "joined_at": now}
+        for seq in range(1, depth + 1)
+    ]
+    await collections.waitlist.insert_many(entries)
+    await collections.days.update_one({"day_id": DAY_ID}, {"$set": {"waitlist_issued": depth}})
+    for label, seq in (("position at the front", 1), ("position at the back", depth)):
+        latencies = []
+        for _ in range(samples):
+            start = time.perf_counter()
+            place = await waitlist_service.position(collections, f"{BENCH_PREFIX}line-{seq}")
+            latencies.append((time.perf_counter() - start) * 1000)
+        print(format_row(f"{label} ({place['position']})", summarize(latencies)))
+
+
+async def main(capacity: int, waiting: int, rounds: int, leave_every: int, depth: int) -> None:
+    client = AsyncMongoClient(settings.MONGODB_CONNECTION_STRING)
+    db.client = client
+    db.collections = collections = Collections(client[settings.DATABASE_NAME])
+    settings.AVAILABILITY_SOURCE = "local"
+    queued: Counter = Counter()
+    enqueue = email_service.enqueue
+
+    def count_email(kind: str, *args, **kwargs):
+        queued[kind] += 1
+        return True
+
+    email_service.enqueue = count_email
+    try:
+        # The unique indexes on the waitlist are part of how promotions stay exactly-once
+        await ensure_indexes(collections.database)
+        await cleanup(collections)
+        await reference_data.load(collections)
+        await availability_broker.start(collections.days)
+        print(f"{capacity} seats, {waiting} on the waitlist, every {leave_every}th leaving, {rounds} rounds\n")
+        ok = True
+        transport = httpx.ASGITransport(app=app)
+        # Fresh users per round, so no round starts on a rate-limit budget spent by the previous one
+        users = await seed_users(collections, (capacity + waiting) * rounds + 3)
+        users, scenario_users = users[:-3], users[-3:]
+        async with httpx.AsyncClient(transport=transport, base_url="http://waitlist", timeout=600) as http:
+            for start in range(0, len(users), capacity + waiting):
+                chunk = users[start : start + capacity + waiting]
+                ok = await run_round(http, collections, chunk, capacity, leave_every, queued) and ok
+            print("\nscenarios")
+            ok = await run_scenarios(http, collections, scenario_users) and ok
+        print(f"\n  waitlist: {waitlist_service.stats()}")
+        print(f"\n{depth} waiting")
+        await time_positions(collections, depth, samples=200)
+        print(f"\n{'all rounds ok' if ok else 'SOME CHECKS FAILED'}")
+    finally:
+        email_service.enqueue = enqueue
+        await availability_broker.stop()
+        await collections.waitlist.delete_many({"day_id": DAY_ID})
+        await cleanup(collections)
+        await client.close()
+        db.client = None
+        db.collections = None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--capacity", type=int, default=50)
+    parser.add_argument("--waiting", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--leave-every", type=int, default=7, help="0 for nobody leaving")
+    parser.add_argument("--depth", type=int, default=10000)
+    args = parser.parse_args()
+    asyncio.run(main(args.capacity, args.waiting, args.rounds, args.leave_every, args.depth))
@@ -2,20 +2,21 @@
 """
 Script to populate the MongoDB database with festival data
 """
+import asyncio
 from datetime import datetime
 
 from app.core.config import settings
-from app.core.database import connect_to_mongo, get_database
+from app.core.database import close_mongo_connection, connect_to_mongo, get_database
 
 
-def populate_database():
+async def populate_database():
     """Populate the database with festival and day data"""
 
     # Connect to MongoDB
-    connect_to_mongo()
+    await connect_to_mongo()
     db = get_database()
 
-    if not db:
+    if db is None:
         print("❌ Failed to connect to database")
         return
 
@@ -36,7 +37,7 @@ def populate_database():
     }
 
     # Insert festival (MongoDB will create the _id automatically)
-    result = database.festivals.insert_one(festival_data)
+    result = await database.festivals.insert_one(festival_data)
     festival_id = str(result.inserted_id)
     print(f"✅ Festival document created with ID: {festival_id}")
 
@@ -48,6 +49,7 @@ def populate_database():
             "date": datetime(2024, 11, 3),
             "theme": "Autumn Harvest",
             "menu": "Seasonal vegetables, roasted meats, and warm spices",
+            "tickets_sold": 0,
             "capacity": 6,
             "created_at": datetime.utcnow(),
             "updated_at": datetime.utcnow(),
@@ -58,6 +60,7 @@ def populate_database():
             "date": datetime(2024, 11, 4),
             "theme": "Mediterranean Night",
             "menu": "Fresh seafood, olive oil, and Mediterranean herbs",
+            "tickets_sold": 0,
             "capacity": 6,
             "created_at": datetime.utcnow(),
             "updated_at": datetime.utcnow(),
@@ -68,6 +71,7 @@ def populate_database():
             "date": datetime(2024, 11, 5),
             "theme": "Asian Fusion",
             "menu": "Sushi, stir-fries, and exotic spices",
+            "tickets_sold": 0,
             "capacity": 6,
             "created_at": datetime.utcnow(),
             "updated_at": datetime.utcnow(),
@@ -78,6 +82,7 @@ def populate_database():
             "date": datetime(2024, 11, 6),
             "theme": "Comfort Classics",
             "menu": "Homestyle cooking, comfort foods, and hearty portions",
+            "tickets_sold": 0,
             "capacity": 6,
             "created_at": datetime.utcnow(),
             "updated_at": datetime.utcnow(),
@@ -88,6 +93,7 @@ def populate_database():
             "date": datetime(2024, 11, 7),
             "theme": "Sweet Endings",
             "menu": "Desserts, pastries, and sweet treats",
+            "tickets_sold": 0,
             "capacity": 6,
             "created_at": datetime.utcnow(),
             "updated_at": datetime.utcnow(),
@@ -97,7 +103,7 @@ def populate_database():
     # Insert each day (MongoDB will create the _id automatically)
     day_ids = []
     for day_data in days_data:
-        result = database.days.insert_one(day_data)
+        result = await database.days.insert_one(day_data)
         day_id = str(result.inserted_id)
         day_ids.append(day_id)
         print(f"✅ Day {day_id} ({day_data['theme']}) created")
@@ -109,6 +115,8 @@ def populate_database():
     print("\n🎉 Database population completed!")
     print(f"📊 Created/Updated: 1 festival, {len(days_data)} days")
 
+    await close_mongo_connection()
+
 
 if __name__ == "__main__":
-    populate_database()
+    asyncio.run(populate_database())
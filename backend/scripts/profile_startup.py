@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Cold-start profile of the API: what importing the app costs, and how long a fresh process
+takes to answer its first request.
+
+1. Runs ``python -X importtime -c "import app.main"`` in a clean interpreter and reports the
+   total, the slowest top-level packages (self time summed over their modules) and the slowest
+   modules by cumulative time.
+2. Times ``import app.main`` in --runs fresh interpreters, minus a bare interpreter start.
+3. Starts ``python serve.py`` --runs times and measures from spawn until --path answers 200
+   (time to first request, including lifespan startup). Needs MongoDB; skip with --no-server.
+
+Usage (from the backend directory):
+
+    python -m scripts.profile_startup --runs 5 --top 15
+    python -m scripts.profile_startup --no-server
+"""
+
+import argparse
+import re
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from scripts.benchmark_utils import format_row, summarize
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+_IMPORTTIME = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def import_times(module: str) -> List[Tuple[str, float, float]]:
+    """(module, self ms, cumulative ms) for every module imported by ``import module``."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        match = _IMPORTTIME.match(line)
+        if match:
+            rows.append((match.group(4), int(match.group(1)) / 1000, int(match.group(2)) / 1000))
+    return rows
+
+
+def report_import_times(module: str, top: int) -> None:
+    rows = import_times(module)
+    total = next((cumulative for name, _, cumulative in reversed(rows) if name == module), 0.0)
+    print(f"-X importtime: import {module} = {total:.1f} ms over {len(rows)} modules")
+
+    by_package: Dict[str, float] = defaultdict(float)
+    for name, self_ms, _ in rows:
+        by_package[name.split(".")[0]] += self_ms
+    print("\nSlowest packages (self time)")
+    for package, self_ms in sorted(by_package.items(), key=lambda item: -item[1])[:top]:
+        share = self_ms / total if total else 0.0
+        print(f"  {package:<40} {self_ms:>8.1f} ms  {share:>6.1%}")
+
+    print("\nSlowest modules (cumulative)")
+    for name, _, cumulative in sorted(rows, key=lambda row: -row[2])[:top]:
+        print(f"  {name:<60} {cumulative:>8.1f} ms")
+
+
+def wall_time(code: str) -> float:
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", code], cwd=BACKEND_DIR, check=True, capture_output=True)
+    return (time.perf_counter() - start) * 1000
+
+
+def first_request(port: int, path: str, timeout: float) -> float:
+    """Milliseconds from spawning serve.py until ``path`` answers 200."""
+    url = f"http://127.0.0.1:{port}{path}"
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "serve.py", "--workers", "1", "--port", str(port)],
+        cwd=BACKEND_DIR,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            try:
+                with urllib.request.urlopen(url, timeout=1.0) as response:
+                    if response.status == 200:
+                        return (time.perf_counter() - start) * 1000
+            except (urllib.error.URLError, ConnectionError):
+                pass
+            if server.poll() is not None:
+                raise RuntimeError(f"serve.py exited with {server.returncode} before answering")
+            time.sleep(0.005)
+        raise RuntimeError(f"No answer from {url} within {timeout}s")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--path", default="/health")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--no-server", action="store_true", help="skip the time-to-first-request measurement")
+    args = parser.parse_args()
+
+    report_import_times(args.module, args.top)
+
+    print()
+    bare = [wall_time("pass") for _ in range(args.runs)]
+    imports = [wall_time(f"import {args.module}") for _ in range(args.runs)]
+    print(format_row("interpreter start", summarize(bare)))
+    print(format_row(f"interpreter start + import {args.module}", summarize(imports)))
+    print(format_row(f"import {args.module} only", summarize([i - summarize(bare)["p50"] for i in imports])))
+
+    if not args.no_server:
+        samples = [first_request(args.port, args.path, args.timeout) for _ in range(args.runs)]
+        print(format_row(f"spawn -> first 200 on {args.path}", summarize(samples)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+"""
+Recompute every day's tickets_sold counter from the bookings collection.
+
+Days without a counter get one when the app starts (TicketService.backfill_tickets_sold). Run
+this when the counters are suspected to have drifted, e.g. after editing bookings by hand, and
+preferably while no bookings are being made, as it overwrites counters changed meanwhile:
+
+    python -m scripts.sync_tickets_sold
+"""
+
+import asyncio
+
+from app.core.database import close_mongo_connection, connect_to_mongo, get_collections
+from app.services.tickets import ticket_service
+
+
+async def sync_tickets_sold():
+    await connect_to_mongo()
+    try:
+        collections = get_collections()
+        changed = await ticket_service.sync_tickets_sold(collections.days, collections.bookings)
+        print(f"✅ tickets_sold synced, {changed} day(s) updated")
+    finally:
+        await close_mongo_connection()
+
+
+if __name__ == "__main__":
+    asyncio.run(sync_tickets_sold())
@@ -0,0 +1,37 @@
+"""
+Production launcher: several uvicorn worker processes, no auto-reload.
+
+    python serve.py --workers 4
+
+Workers default to WEB_CONCURRENCY. With more than one worker, set COORDINATION_BACKEND=redis
+so cache invalidations, availability updates and the email queue are shared between them.
+Behind a load balancer or reverse proxy, set FORWARDED_ALLOW_IPS to its addresses so client
+addresses come from X-Forwarded-For. For development with auto-reload use run.py.
+"""
+
+import argparse
+
+import uvicorn
+from app.core.config import settings
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=settings.WEB_CONCURRENCY)
+    args = parser.parse_args()
+
+    if args.workers > 1 and settings.COORDINATION_BACKEND != "redis":
+        print(
+            f"Warning: {args.workers} workers with COORDINATION_BACKEND={settings.COORDINATION_BACKEND}; "
+            "caches and live availability will not be shared between them"
+        )
+    uvicorn.run(
+        "app.main:app",
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        reload=False,
+        proxy_headers=True,
+        forwarded_allow_ips=settings.FORWARDED_ALLOW_IPS,
+    )